@@ -0,0 +1,331 @@
+"""
+Processamento de prompts em lote
+
+O main.py envia um único prompt por execução e espera cada resposta antes de continuar. Este roteiro lê os prompts
+de um arquivo JSONL, envia várias requisições ao mesmo tempo e grava as respostas na ordem dos prompts:
+
+    - um semáforo limita a quantidade de requisições simultâneas
+    - um balde de fichas (token bucket) limita a quantidade de requisições por minuto, respeitando a cota da API
+    - as requisições que falham por erros temporários (tempo esgotado, limite de requisições, erros 5xx) são repetidas
+      com espera exponencial e uma variação aleatória; os outros erros (4xx, autenticação, prompts bloqueados pelos
+      filtros de segurança) são gravados imediatamente, sem novas tentativas
+    - o transporte é substituível: GeminiTransport chama a API, e HTTPTransport envia os prompts para um servidor
+      HTTP, como o servidor falso local criado com --fake
+
+Cada linha do arquivo de entrada é um objeto {"id": ..., "prompt": "..."} ou apenas o texto do prompt entre aspas.
+Cada linha do arquivo de saída é {"id": ..., "prompt": "...", "response": "..."}, ou "error" no lugar de "response"
+quando todas as tentativas falharam.
+
+python assistent/batch.py prompts.jsonl respostas.jsonl --concurrency 8 --rpm 900
+python assistent/batch.py prompts.jsonl respostas.jsonl --fake
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class TransientError(Exception):
+    """Um erro temporário do transporte: a requisição pode ser repetida."""
+
+
+# Erros que justificam uma nova tentativa. Os transportes convertem os erros temporários das suas bibliotecas em
+# TransientError; qualquer outro erro é definitivo
+TRANSIENT_ERRORS = (TransientError, TimeoutError, ConnectionError)
+
+# Códigos HTTP temporários: limite de requisições e erros do servidor
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limita a taxa de requisições.
+
+    O balde começa cheio e recebe fichas continuamente; cada requisição consome uma ficha e espera quando ele está
+    vazio.
+
+    Args:
+        rate (float): Fichas recebidas por segundo.
+        capacity (int): Quantidade máxima de fichas (o tamanho da rajada inicial).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Espera até haver uma ficha disponível e a consome."""
+        # O cadeado mantém a ordem de chegada: quem espera a próxima ficha segura os demais
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeminiTransport:
+    """
+    Envia os prompts para o modelo Gemini.
+
+    Args:
+        model_name (str, opcional): O nome do modelo. Padrão: "gemini-2.0-flash"
+    """
+
+    def __init__(self, model_name="gemini-2.0-flash"):
+        # Importados aqui para que os outros transportes funcionem sem a biblioteca e sem a chave da API
+        import google.generativeai as genai
+        from google.api_core import exceptions
+        from ze import config
+
+        genai.configure(api_key=config("API_KEY"))
+        self.model = genai.GenerativeModel(model_name)
+        self.transient = (
+            exceptions.TooManyRequests,
+            exceptions.ResourceExhausted,
+            exceptions.ServerError,
+            exceptions.DeadlineExceeded,
+        )
+
+    async def __call__(self, prompt):
+        try:
+            response = await self.model.generate_content_async(prompt)
+        except self.transient as error:
+            raise TransientError(str(error)) from error
+        # Prompts bloqueados pelos filtros de segurança geram um ValueError aqui, que não é repetido
+        return response.text
+
+
+class HTTPTransport:
+    """
+    Envia os prompts para um servidor HTTP.
+
+    Cada prompt é enviado como POST {"prompt": "..."} e a resposta deve ser {"text": "..."}.
+
+    Args:
+        url (str): O endereço do servidor.
+        timeout (float, opcional): Tempo máximo de cada requisição, em segundos. Padrão: 60
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+
+    def _send(self, prompt):
+        data = json.dumps({"prompt": prompt}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)["text"]
+        except urllib.error.HTTPError as error:
+            if error.code in TRANSIENT_STATUS:
+                raise TransientError(f"HTTP {error.code}") from error
+            raise
+        except urllib.error.URLError as error:
+            # Falhas de conexão e tempo esgotado
+            raise TransientError(str(error.reason)) from error
+
+    async def __call__(self, prompt):
+        return await asyncio.to_thread(self._send, prompt)
+
+
+def fake_server(host="127.0.0.1", port=0, delay=0.05, error_rate=0.1):
+    """
+    Inicia, em uma thread, um servidor HTTP falso que responde aos prompts do HTTPTransport.
+
+    Args:
+        host (str, opcional): O endereço. Padrão: "127.0.0.1"
+        port (int, opcional): A porta. Padrão: 0 (uma porta livre)
+        delay (float, opcional): Tempo de resposta, em segundos. Padrão: 0.05
+        error_rate (float, opcional): Proporção de requisições que falham com o erro 503. Padrão: 0.1
+
+    Returns:
+        ThreadingHTTPServer: O servidor. O endereço fica em server.server_address; use server.shutdown() para parar.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["prompt"]
+            time.sleep(delay)
+            if random.random() < error_rate:
+                self.send_error(503)
+                return
+            body = json.dumps({"text": f"Resposta para: {prompt}"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def read_prompts(filepath):
+    """
+    Lê os prompts de um arquivo JSONL.
+
+    Yields:
+        dict: {"id": ..., "prompt": "..."}. Sem "id", o número da linha é usado.
+    """
+    with open(filepath, encoding="utf-8") as file:
+        for number, line in enumerate(file):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            record.setdefault("id", number)
+            yield record
+
+
+async def call_with_retries(transport, prompt, bucket, semaphore=None, max_retries=5, backoff=1.0, max_backoff=60.0):
+    """
+    Envia um prompt, repetindo a requisição em caso de erro temporário (TRANSIENT_ERRORS).
+
+    Cada tentativa consome uma ficha do balde e ocupa uma vaga do semáforo somente enquanto a requisição está em
+    andamento: durante a espera entre as tentativas, a vaga fica livre para outros prompts. A espera dobra a cada
+    falha (backoff, 2 * backoff, 4 * backoff...), até max_backoff, e é multiplicada por um fator aleatório entre 0.5 e
+    1.5 para que as requisições que falharam juntas não sejam repetidas juntas.
+
+    Args:
+        transport (callable): Função assíncrona que recebe o prompt e retorna o texto da resposta.
+        prompt (str): O prompt.
+        bucket (TokenBucket): O limitador de taxa.
+        semaphore (asyncio.Semaphore, opcional): O limitador de requisições simultâneas.
+        max_retries (int, opcional): Quantidade máxima de repetições. Padrão: 5
+        backoff (float, opcional): A primeira espera, em segundos. Padrão: 1
+        max_backoff (float, opcional): A maior espera, em segundos. Padrão: 60
+
+    Returns:
+        str: O texto da resposta. Erros definitivos e o erro da última tentativa são propagados.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore or nullcontext():
+                await bucket.acquire()
+                return await transport(prompt)
+        except TRANSIENT_ERRORS:
+            if attempt == max_retries:
+                raise
+        await asyncio.sleep(min(backoff * 2**attempt, max_backoff) * random.uniform(0.5, 1.5))
+
+
+async def process_prompts(records, transport, concurrency=8, requests_per_minute=60, max_retries=5, backoff=1.0):
+    """
+    Envia os prompts simultaneamente e retorna as respostas na ordem dos prompts.
+
+    No máximo 4 * concurrency prompts ficam em andamento ou esperando a vez de serem gravados, então arquivos grandes
+    não são carregados inteiros na memória.
+
+    Args:
+        records (iterable): Os prompts, no formato de read_prompts.
+        transport (callable): Função assíncrona que recebe o prompt e retorna o texto da resposta.
+        concurrency (int, opcional): Quantidade máxima de requisições simultâneas. Padrão: 8
+        requests_per_minute (float, opcional): Quantidade máxima de requisições por minuto. Padrão: 60
+        max_retries (int, opcional): Quantidade máxima de repetições de cada prompt. Padrão: 5
+        backoff (float, opcional): A primeira espera entre as repetições, em segundos. Padrão: 1
+
+    Yields:
+        dict: O registro do prompt com a chave "response", ou "error" se todas as tentativas falharam.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(requests_per_minute / 60, capacity=concurrency)
+
+    async def handle(record):
+        try:
+            response = await call_with_retries(transport, record["prompt"], bucket, semaphore, max_retries, backoff)
+            return {**record, "response": response}
+        except Exception as error:
+            return {**record, "error": f"{type(error).__name__}: {error}"}
+
+    # As tarefas ficam em uma fila na ordem dos prompts; a primeira é sempre a próxima a ser gravada
+    pending = deque()
+    for record in records:
+        pending.append(asyncio.ensure_future(handle(record)))
+        if len(pending) >= 4 * concurrency:
+            yield await pending.popleft()
+    while pending:
+        yield await pending.popleft()
+
+
+async def run_batch(input_path, output_path, transport, **kwargs):
+    """
+    Processa um arquivo JSONL de prompts e grava as respostas em outro arquivo JSONL.
+
+    Args:
+        input_path (str): O arquivo de prompts.
+        output_path (str): O arquivo de respostas.
+        transport (callable): Função assíncrona que recebe o prompt e retorna o texto da resposta.
+        **kwargs: Os parâmetros de process_prompts.
+
+    Returns:
+        tuple: Quantidade de respostas e quantidade de erros.
+    """
+    total, errors = 0, 0
+    with open(output_path, "w", encoding="utf-8") as file:
+        async for result in process_prompts(read_prompts(input_path), transport, **kwargs):
+            file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            total += 1
+            errors += "error" in result
+    return total, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envia os prompts de um arquivo JSONL em lote.")
+    parser.add_argument("input", help="arquivo JSONL de prompts")
+    parser.add_argument("output", help="arquivo JSONL de respostas")
+    parser.add_argument("--concurrency", type=int, default=8, help="requisições simultâneas (padrão: 8)")
+    parser.add_argument("--rpm", type=float, default=60, help="requisições por minuto (padrão: 60)")
+    parser.add_argument("--retries", type=int, default=5, help="repetições de cada prompt (padrão: 5)")
+    parser.add_argument("--backoff", type=float, default=1.0, help="primeira espera entre repetições (padrão: 1s)")
+    parser.add_argument("--model", default="gemini-2.0-flash", help="modelo Gemini (padrão: gemini-2.0-flash)")
+    parser.add_argument("--url", help="envia os prompts para um servidor HTTP em vez da API")
+    parser.add_argument("--fake", action="store_true", help="usa um servidor falso local em vez da API")
+    args = parser.parse_args()
+
+    if args.fake:
+        server = fake_server()
+        transport = HTTPTransport("http://%s:%d" % server.server_address)
+    elif args.url:
+        transport = HTTPTransport(args.url)
+    else:
+        transport = GeminiTransport(args.model)
+
+    start = time.perf_counter()
+    total, errors = asyncio.run(
+        run_batch(
+            args.input,
+            args.output,
+            transport,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            max_retries=args.retries,
+            backoff=args.backoff,
+        )
+    )
+    print(f"Respostas: {total}, erros: {errors}, tempo: {time.perf_counter() - start:.1f}s")
+
+# Saída (com 200 prompts; o tempo varia):
+# python assistent/batch.py prompts.jsonl respostas.jsonl --fake --rpm 6000 --backoff 0.1
+"""
+Respostas: 200, erros: 0, tempo: 2.2s
+"""
@@ -49,13 +49,20 @@ Para fazer a correspondência de uma expressão em um texto, chame o comparador
 Ele retornará as correspondências.
 """
 print("\n1")
-import spacy
-
 # Importa o comparador (Matcher)
 from spacy.matcher import Matcher
 
-# Carregar o fluxo (pipeline) de processamento e criar o objeto nlp
-nlp = spacy.load("pt_core_news_md")
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_1/correspondencias.py), sem a raiz do projeto no caminho de importação: os
+    # pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    get_model = spacy.load
+
+# Carregar o fluxo (pipeline) de processamento e criar o objeto nlp (uma única vez por processo)
+nlp = get_model("pt_core_news_md")
 
 # Inicializar o comparador com o vocabulário
 matcher = Matcher(nlp.vocab)
@@ -100,9 +107,7 @@ E um token que é uma pontuação.
 Esta expressão tem correspondência com "Copa do Mundo FIFA 2002:".
 """
 
-# Carregar o fluxo (pipeline) de processamento e criar o objeto nlp
-nlp = spacy.load("pt_core_news_md")
-
+# Reutilizar o objeto nlp já carregado: carregar o fluxo novamente só repetiria a leitura dos pesos
 # Inicializar o comparador com o vocabulário
 matcher = Matcher(nlp.vocab)
 
@@ -137,8 +142,6 @@ Um verbo com o lema "amar", seguido de um substantivo.
 Esta expressão terá correspondência com "amava cachorros" e "amo gatos".
 """
 
-# Carregar o fluxo (pipeline) de processamento e criar o objeto nlp
-nlp = spacy.load("pt_core_news_md")
 matcher = Matcher(nlp.vocab)
 pattern = [
     {"POS": "PRON"},
@@ -116,8 +116,8 @@ doc = nlp(
 
 # Iterar os tokens de um documento doc
 for token in doc:
-    # Checar se o token é composto por algarismos numéricos
-    if token.like_num:
+    # Checar se o token é composto por algarismos numéricos e não é o último do documento
+    if token.like_num and token.i + 1 < len(doc):
         # Selecionar o próximo token do documento
         next_token = doc[token.i + 1]
         # Checar se o texto do próximo token é igual a "%"
@@ -128,4 +128,8 @@ for token in doc:
 """
 Percentuais encontrados: 60
 Percentuais encontrados: 4
+
+Sem a verificação token.i + 1 < len(doc), um documento terminado em número geraria um IndexError.
+Para grandes volumes de texto, o componente quantity_extractor (ferramentas/quantidades.py) encontra percentuais,
+valores monetários e anos de forma vetorizada e converte os números para float.
 """
@@ -55,8 +55,18 @@ Neste exemplo, o modelo previu corretamente "Palmeiras" como um nome próprio e
 """
 import spacy
 
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_1/pipeline.py), sem a raiz do projeto no caminho de importação: os pacotes
+    # são carregados com spacy.load, sem o registro
+    import spacy
+
+    get_model = spacy.load
+
 # Carregamento do fluxo (pipeline) de processamento em português
-nlp = spacy.load("pt_core_news_md")
+# get_model carrega o pacote uma única vez por processo, mesmo que outros módulos também o usem
+nlp = get_model("pt_core_news_md")
 
 # Processar um texto
 doc = nlp("O Palmeiras não tem mundial.")
@@ -141,6 +151,9 @@ Uma dica: Para obter a definição dos marcadores mais comuns, você pode usar a
 Por exemplo, a sigla "GPE" para entidade geopolítica (geopolitical entity) não é muito intuitiva, mas o comando 
 spacy.explain irá lhe explicar que se refere a países, cidades e estados.
 O mesmo vale para marcadores de classes gramaticais e termos sintáticos.
+
+Para explicar os marcadores de todos os tokens de documentos grandes, veja ferramentas/marcadores.py: a tabela de
+marcadores é montada uma única vez por fluxo e consultada pelo código hash.
 """
 print(spacy.explain("PROPN"))
 print(spacy.explain("NOUN"))
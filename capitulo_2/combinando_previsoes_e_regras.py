@@ -47,14 +47,22 @@ Cada correspondência é uma tupla consistindo de um identificador ID, e o índi
 """
 
 print("\n1")
-import spacy
 import json
 import os
 from spacy.matcher import Matcher
 from spacy.matcher import PhraseMatcher
 from spacy.tokens import Span
 
-nlp = spacy.load("pt_core_news_md")
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_2/combinando_previsoes_e_regras.py), sem a raiz do projeto no caminho de
+    # importação: os pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    get_model = spacy.load
+
+nlp = get_model("pt_core_news_md")
 matcher = Matcher(nlp.vocab)
 
 # Expressões são listas de dicionários descrevendo os tokens
@@ -183,8 +191,10 @@ matcher = Matcher(nlp.vocab)
 matcher.add("PATTERN1", [pattern1])
 matcher.add("PATTERN2", [pattern2])
 
-print(f"Quantidade de correspondências: {len(matcher(doc))}")
-for match_id, start, end in matcher(doc):
+# Chamar o comparador uma única vez e reutilizar as correspondências
+matches = matcher(doc)
+print(f"Quantidade de correspondências: {len(matches)}")
+for match_id, start, end in matches:
     print(doc.vocab.strings[match_id], doc[start:end].text)
 
 """
@@ -221,6 +231,8 @@ print("\n6")
 """
 Vamos usar esse comparador em um texto maior, fazer análise sintática e atualizar as entidades do documento com os
 países encontrados.
+
+Para não processar o mesmo texto a cada execução enquanto ajustamos as regras, veja ferramentas/cache_de_corpus.py.
 """
 
 # Criar um doc e reiniciar (zerar) as entidades existentes
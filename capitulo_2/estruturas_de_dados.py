@@ -34,10 +34,18 @@ Para obter a string que representa um código hash, fazemos a consulta com o has
 O objeto Doc também expõe o vocabulário compartilhados e suas strings e códigos hash.
 """
 
-import spacy
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_2/estruturas_de_dados.py), sem a raiz do projeto no caminho de importação:
+    # os pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    get_model = spacy.load
 
 print("\n1")
-nlp = spacy.load("pt_core_news_sm")
+# get_model carrega o pacote uma única vez por processo; as próximas seções recebem o mesmo objeto nlp
+nlp = get_model("pt_core_news_sm")
 doc = nlp("Eu gosto de café")
 hash_id = nlp.vocab.strings["café"]
 print(f"Valor de hash: {hash_id}")
@@ -203,9 +211,7 @@ doc.ents = [span]
 # Imprimir o texto e os marcadores das entidades
 print([(ent.text, ent.label_) for ent in doc.ents])
 
-import spacy
-
-nlp = spacy.load("en_core_web_sm")
+nlp = get_model("en_core_web_sm")
 doc = nlp("Berlin looks like a nice city")
 
 # Este código não é eficiente
@@ -214,23 +220,31 @@ token_texts = [token.text for token in doc]
 pos_tags = [token.pos_ for token in doc]
 
 for index, pos in enumerate(pos_tags):
-    # Verifica se o token atual é um substantivo próprio.
-    if pos == "PROPN":
+    # Verifica se o token atual é um substantivo próprio e não é o último do documento
+    if pos == "PROPN" and index + 1 < len(pos_tags):
         # Verifica se o próximo token é um verbo
         if pos_tags[index + 1] == "VERB":
             result = token_texts[index]
             print("Found proper noun before a verb:", result)
 
 # Este código é eficiente
-import spacy
-
-nlp = spacy.load("pt_core_news_sm")
+nlp = get_model("pt_core_news_sm")
 doc = nlp("Berlin parece ser uma cidade bonita.")
 
 # Iterar nos tokens
 for token in doc:
-    # Verifica se o token atual é um substantivo próprio.
-    if token.pos_ == "PROPN":
+    # Verifica se o token atual é um substantivo próprio e não é o último do documento
+    if token.pos_ == "PROPN" and token.i + 1 < len(doc):
         # Verifica se o próximo token é um verbo
         if doc[token.i + 1].pos_ == "VERB":
             print(f"Encontrado nome próprio antes de um verbo: {token.text}")
+
+"""
+Sem a verificação token.i + 1 < len(doc), um documento terminado em nome próprio geraria um IndexError.
+Para dezenas de verificações como esta em muitos documentos, o SequenceScanner (ferramentas/sequencias.py) compara
+sequências de marcadores com arrays NumPy, sem percorrer os tokens em Python:
+
+scanner = SequenceScanner(nlp.vocab)
+scanner.add("PROPN_VERB", ["PROPN", "VERB"])
+starts = scanner(doc)["PROPN_VERB"]
+"""
@@ -35,10 +35,17 @@ De acordo com os vetores de palavras, os tokens "pizza" e "torta" são relativam
 """
 
 print("\n1")
-import spacy
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_2/vetores_das_palavras.py), sem a raiz do projeto no caminho de importação:
+    # os pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    get_model = spacy.load
 
 # Carregar o fluxo (pipeline) de processamento maior com os vetores
-nlp = spacy.load("pt_core_news_md")
+nlp = get_model("pt_core_news_md")
 
 # Comparar dois documentos
 doc1 = nlp("Eu gosto de comida rápida")
@@ -105,13 +105,23 @@ Isso significa que ele será aplicado logo no início do processamento do docume
 """
 
 # Exemplo: um componente simples
-import spacy
 from spacy.language import Language
 from spacy.matcher import PhraseMatcher
 from spacy.tokens import Span
 
+try:
+    from ferramentas.registro_de_modelos import copy_pipeline
+except ImportError:
+    # Executado diretamente (python capitulo_3/componentes_do_fluxo_de_processamento.py), sem a raiz do projeto no
+    # caminho de importação: os pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    copy_pipeline = spacy.load
+
 # Criar um objeto nlp
-nlp = spacy.load("pt_core_news_sm")
+# copy_pipeline carrega o pacote uma única vez por processo e retorna uma cópia barata do fluxo, à qual podemos
+# adicionar componentes sem alterar o modelo compartilhado
+nlp = copy_pipeline("pt_core_news_sm")
 
 
 # Definir um componente personalizado
@@ -169,7 +179,6 @@ def length_component_function(doc):
     return doc
 
 
-nlp = spacy.load("pt_core_news_sm")
 nlp.add_pipe("length_component", first=True)
 print(f"{nlp.pipe_names}\n")
 """
@@ -193,7 +202,7 @@ print("\n2")
 Exemplo de um componente personalizado que usará o PhraseMatcher para identificar nomes de animais no documento e 
 adicionar as partições reconhecidas ao doc.ents.
 """
-nlp = spacy.load("pt_core_news_sm")
+nlp = copy_pipeline("pt_core_news_sm")
 animals = ["Golden Retriever", "gato", "tartaruga", "Rattus norvegicus"]
 animals_patterns = list(nlp.pipe(animals))
 print(f"animal_patterns: {animals_patterns}")
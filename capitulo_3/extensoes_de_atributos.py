@@ -148,20 +148,31 @@ print(doc._.has_token("cloud"), "- cloud")
 
 True - blue
 False - cloud
+
+Essa implementação percorre o documento inteiro e cria uma lista a cada chamada. Para fazer muitas consultas ao mesmo
+documento, use o índice de tokens do módulo ferramentas.indice_de_tokens, que registra has_token, positions_of,
+has_all e has_any e constrói o índice uma única vez por documento.
 """
 
 # Exemplos
 print("\n1")
 # Definindo extensões de propriedades
-import spacy
 import json
 import os
 from spacy.tokens import Token, Doc, Span
 from spacy.language import Language
 from spacy.matcher import PhraseMatcher
 
+try:
+    from ferramentas.registro_de_modelos import copy_pipeline, get_model
+except ImportError:
+    # Executado diretamente (python capitulo_3/extensoes_de_atributos.py), sem a raiz do projeto no caminho de
+    # importação: os pacotes são carregados com spacy.load, sem o registro
+    import spacy
+
+    copy_pipeline = get_model = spacy.load
 
-nlp = spacy.load("pt_core_news_sm")
+nlp = get_model("pt_core_news_sm")
 
 # Definir o atributo "is_country" com o valor padrão como falso (False)
 Token.set_extension("is_country", default=False)
@@ -299,7 +310,8 @@ with open(countries_file_path, encoding="utf-8") as file:
 with open(capitals_file_path, encoding="utf-8") as file:
     CAPITALS = json.loads(file.read())
 
-nlp = spacy.load("pt_core_news_md")
+# Uma cópia do fluxo compartilhado, já que o componente countries_components será adicionado a ela
+nlp = copy_pipeline("pt_core_news_md")
 matcher = PhraseMatcher(nlp.vocab)
 matcher.add("COUNTRY", list(nlp.pipe(COUNTRIES)))
 
@@ -93,9 +93,16 @@ Aprendendo a escrever os próprios componentes e adicioná-los ao fluxo de proce
 personalizados para adicionar metadados aos documentos, partições e tokens.
 """
 print("\n1")
-import spacy
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python capitulo_3/fluxo_de_processamento.py), sem a raiz do projeto no caminho de
+    # importação: os pacotes são carregados com spacy.load, sem o registro
+    import spacy
 
-nlp = spacy.load("pt_core_news_sm")
+    get_model = spacy.load
+
+nlp = get_model("pt_core_news_sm")
 
 # Imprime o nome dos componentes do fluxo
 print(nlp.pipe_names)
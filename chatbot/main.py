@@ -11,9 +11,16 @@ database = {
 }
 
 # Processar perguntas
-import spacy
+try:
+    from ferramentas.registro_de_modelos import get_model
+except ImportError:
+    # Executado diretamente (python chatbot/main.py), sem a raiz do projeto no caminho de importação: os pacotes são
+    # carregados com spacy.load, sem o registro
+    import spacy
 
-nlp = spacy.load("pt_core_news_md")
+    get_model = spacy.load
+
+nlp = get_model("pt_core_news_md")
 
 
 def process_question(question):
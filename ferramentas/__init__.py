@@ -0,0 +1,7 @@
+"""
+Ferramentas reutilizáveis construídas a partir dos exemplos dos capítulos.
+
+Os módulos deste diretório reúnem componentes, extensões e utilitários pensados para processar grandes volumes de
+texto com a spaCy. Para usá-los a partir dos roteiros dos capítulos, execute os roteiros a partir da raiz do
+repositório com python -m, por exemplo: python -m ferramentas.indice_de_tokens
+"""
@@ -0,0 +1,224 @@
+"""
+Cache de documentos processados
+
+Nenhum roteiro guarda os documentos processados: o capítulo 2 processa o paises.txt com o pacote completo a cada
+execução, mesmo quando só as regras do Comparador mudaram. Em corpora grandes, a análise é de longe a etapa mais cara.
+
+O CorpusCache guarda os documentos processados em arquivos DocBin, divididos em partes (shards) de tamanho fixo:
+
+    - cada documento é identificado pelo código hash do texto (textos alterados recebem um novo código)
+    - os arquivos ficam em um diretório identificado pela impressão digital (fingerprint) do fluxo de processamento:
+      idioma, componentes, versão do pacote e configuração. Mudar o fluxo cria um novo cache, sem misturar documentos
+      processados de formas diferentes
+    - somente os textos que ainda não estão no cache são processados, e os novos documentos vão para novas partes;
+      as partes existentes nunca são regravadas
+    - os documentos são lidos sob demanda, uma parte de cada vez, incluindo o doc.user_data (e portanto as extensões
+      armazenadas nele, como as de extensoes_colunares)
+
+-----------------------------------------------------------------------------------------------------------------------
+Arquivo                            | Conteúdo
+-----------------------------------------------------------------------------------------------------------------------
+<path>/<fingerprint>/index.json    | mapeia o código hash de cada texto para a parte e a posição do documento
+<path>/<fingerprint>/00000.spacy   | as partes, no formato DocBin
+-----------------------------------------------------------------------------------------------------------------------
+
+cache = CorpusCache("cache", nlp)
+for doc in cache.pipe(texts):
+    matches = matcher(doc)
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from spacy.tokens import DocBin
+
+INDEX_FILE = "index.json"
+
+
+def text_key(text):
+    """Retorna o código hash (hexadecimal) que identifica um texto no cache."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def pipeline_fingerprint(nlp):
+    """
+    Retorna a impressão digital do fluxo de processamento.
+
+    Inclui o idioma, o nome e a versão do pacote, os componentes ativos, a tabela de vetores e a configuração.
+    """
+    description = {
+        "lang": nlp.lang,
+        "name": nlp.meta.get("name"),
+        "version": nlp.meta.get("version"),
+        "pipeline": nlp.pipe_names,
+        "vectors": [nlp.vocab.vectors.name, list(nlp.vocab.vectors.shape)],
+        "config": nlp.config.to_str(),
+    }
+    data = json.dumps(description, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class CorpusCache:
+    """
+    Cache de documentos processados em arquivos DocBin.
+
+    Args:
+        path (str): O diretório do cache.
+        nlp (Language): O fluxo de processamento.
+        shard_size (int, opcional): Quantidade de documentos por parte. Padrão: 1000
+        max_open_shards (int, opcional): Quantidade de partes mantidas na memória durante a leitura. Padrão: 4
+    """
+
+    def __init__(self, path, nlp, shard_size=1000, max_open_shards=4):
+        self.nlp = nlp
+        self.fingerprint = pipeline_fingerprint(nlp)
+        self.path = os.path.join(path, self.fingerprint)
+        self.shard_size = shard_size
+        self.max_open_shards = max_open_shards
+        self._open_shards = OrderedDict()
+        os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        self.index = {}
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as file:
+                self.index = json.load(file)
+        self.n_shards = max((shard for shard, _ in self.index.values()), default=-1) + 1
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, text):
+        return text_key(text) in self.index
+
+    def _shard_path(self, shard):
+        return os.path.join(self.path, f"{shard:05d}.spacy")
+
+    def _save_index(self):
+        # Grava em um arquivo temporário e renomeia, para que uma interrupção não corrompa o índice
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(f"{index_path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(self.index, file)
+        os.replace(f"{index_path}.tmp", index_path)
+
+    def _write_shard(self, keys, docs):
+        doc_bin = DocBin(store_user_data=True, docs=docs)
+        shard = self.n_shards
+        doc_bin.to_disk(self._shard_path(shard))
+        self.n_shards += 1
+        for position, key in enumerate(keys):
+            self.index[key] = [shard, position]
+
+    def update(self, texts, batch_size=1000):
+        """
+        Processa e guarda os textos que ainda não estão no cache.
+
+        Args:
+            texts (iterable): Os textos.
+            batch_size (int, opcional): Quantidade de textos processados por lote no nlp.pipe. Padrão: 1000
+
+        Returns:
+            int: Quantidade de textos processados.
+        """
+        missing = OrderedDict()
+        for text in texts:
+            key = text_key(text)
+            if key not in self.index:
+                missing[key] = text
+        keys, docs = [], []
+        for key, doc in zip(missing, self.nlp.pipe(missing.values(), batch_size=batch_size)):
+            keys.append(key)
+            docs.append(doc)
+            if len(docs) == self.shard_size:
+                self._write_shard(keys, docs)
+                keys, docs = [], []
+        if docs:
+            self._write_shard(keys, docs)
+        if missing:
+            self._save_index()
+        return len(missing)
+
+    def _shard(self, shard):
+        docs = self._open_shards.get(shard)
+        if docs is None:
+            doc_bin = DocBin(store_user_data=True).from_disk(self._shard_path(shard))
+            docs = self._open_shards[shard] = list(doc_bin.get_docs(self.nlp.vocab))
+            if len(self._open_shards) > self.max_open_shards:
+                self._open_shards.popitem(last=False)
+        else:
+            self._open_shards.move_to_end(shard)
+        return docs
+
+    def get(self, text):
+        """Retorna o documento processado do texto, ou None se ele não estiver no cache."""
+        location = self.index.get(text_key(text))
+        if location is None:
+            return None
+        shard, position = location
+        return self._shard(shard)[position]
+
+    def docs(self, texts=None):
+        """
+        Lê os documentos do cache sob demanda.
+
+        Args:
+            texts (iterable, opcional): Os textos, na ordem desejada. Padrão: todos os documentos, na ordem das partes
+
+        Yields:
+            Doc: Os documentos processados.
+        """
+        if texts is not None:
+            for text in texts:
+                doc = self.get(text)
+                if doc is None:
+                    raise KeyError(f"Texto não está no cache: {text[:50]!r}")
+                yield doc
+            return
+        for shard in range(self.n_shards):
+            # A leitura sequencial não passa pelo cache de partes abertas
+            doc_bin = DocBin(store_user_data=True).from_disk(self._shard_path(shard))
+            yield from doc_bin.get_docs(self.nlp.vocab)
+
+    def pipe(self, texts, batch_size=1000):
+        """
+        Como nlp.pipe, mas processando apenas os textos que não estão no cache.
+
+        Returns:
+            generator: Os documentos processados, na ordem dos textos.
+        """
+        texts = list(texts)
+        self.update(texts, batch_size=batch_size)
+        return self.docs(texts)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    import spacy
+
+    # Registra o componente "quantity_extractor"
+    import ferramentas.quantidades
+
+    nlp = spacy.blank("pt")
+    nlp.add_pipe("quantity_extractor")
+    with open("capitulo_2/paises.txt", encoding="utf-8") as file:
+        texts = file.read().splitlines() + ["O preço médio da picanha em 2024 foi de R$ 71,00."]
+
+    path = tempfile.mkdtemp()
+    start = time.perf_counter()
+    cache = CorpusCache(path, nlp, shard_size=40)
+    print(f"Processados: {cache.update(texts)} em {time.perf_counter() - start:.3f}s")
+
+    # Uma nova execução: só o texto novo é processado
+    cache = CorpusCache(path, nlp, shard_size=40)
+    docs = list(cache.pipe(texts + ["Menos de 4% está nessa situação."]))
+    print(f"Documentos: {len(docs)}, no cache: {len(cache)}, partes: {cache.n_shards}")
+    print([(span.text, span._.quantity_value) for span in docs[-2].spans["quantities"]])
+    """
+    Saída (os tempos variam):
+    Processados: 101 em 0.265s
+    Documentos: 102, no cache: 102, partes: 4
+    [('2024', 2024.0), ('R$ 71,00', 71.0)]
+    """
@@ -0,0 +1,315 @@
+"""
+Compilador de expressões do Comparador para arrays NumPy
+
+As expressões do capítulo 1 são listas de dicionários com tamanho fixo, sem operadores:
+
+[{"LOWER": "copa"}, {"LOWER": "do"}, {"LOWER": "mundo"}, {"LOWER": "fifa"}, {"IS_DIGIT": True}, {"IS_PUNCT": True}]
+[{"TEXT": "iOS"}, {"IS_DIGIT": True}]
+
+Uma expressão assim corresponde a uma posição inicial i do documento se o token i satisfizer o primeiro dicionário, o
+token i + 1 o segundo, e assim por diante. Podemos calcular isso para todas as posições de uma só vez:
+
+    1. Obter os atributos de todos os tokens com doc.to_array([LOWER, IS_DIGIT, IS_PUNCT, ...])
+    2. Para cada dicionário da expressão, criar uma máscara booleana com os tokens que o satisfazem
+    3. Deslocar a máscara do k-ésimo dicionário em k posições e combinar todas com o operador E (AND)
+
+As posições verdadeiras da máscara final são os inícios das correspondências.
+As máscaras de condições repetidas ({"IS_PUNCT": True}, por exemplo) são calculadas uma única vez por documento, o que
+é especialmente vantajoso com conjuntos grandes de regras.
+
+Expressões com operadores ("OP"), extensões ("_") ou predicados que não podem ser comparados diretamente (REGEX, >=,
+etc.) são enviadas a um Comparador (Matcher) comum, então as correspondências são sempre as mesmas do Matcher. Como no
+Matcher, uma correspondência (identificador, início, fim) encontrada por mais de uma expressão aparece uma única vez.
+
+A ordem também é a do Matcher: pelo fim, depois pelo início e depois pela ordem em que as expressões foram
+adicionadas. A única diferença possível é entre correspondências com o mesmo início e fim em que alguma vem de uma
+expressão enviada ao Matcher comum: elas seguem a ordem da primeira expressão desse tipo de cada identificador.
+
+matcher = CompiledMatcher(nlp.vocab)
+matcher.add("IOS_VERSION_PATTERN", [[{"TEXT": "iOS"}, {"IS_DIGIT": True}]])
+matches = matcher(doc)
+"""
+
+import time
+
+import numpy
+from spacy.attrs import IDS as ATTR_IDS
+from spacy.matcher import Matcher
+
+STRING_ATTRS = {"ORTH", "LOWER", "NORM", "LEMMA", "POS", "TAG", "DEP", "ENT_TYPE", "SHAPE", "PREFIX", "SUFFIX"}
+
+FLAG_ATTRS = {
+    "IS_ALPHA",
+    "IS_ASCII",
+    "IS_DIGIT",
+    "IS_LOWER",
+    "IS_PUNCT",
+    "IS_SPACE",
+    "IS_TITLE",
+    "IS_UPPER",
+    "IS_STOP",
+    "IS_BRACKET",
+    "IS_QUOTE",
+    "IS_LEFT_PUNCT",
+    "IS_RIGHT_PUNCT",
+    "IS_CURRENCY",
+    "LIKE_NUM",
+    "LIKE_URL",
+    "LIKE_EMAIL",
+}
+
+INT_ATTRS = {"LENGTH"}
+
+SET_PREDICATES = {"IN", "NOT_IN"}
+
+
+def _attr_name(key):
+    key = key.upper()
+    return "ORTH" if key == "TEXT" else key
+
+
+def compile_token_spec(spec, strings):
+    """
+    Converte o dicionário de um token em uma tupla de condições (atributo, predicado, valores).
+
+    Args:
+        spec (dict): O dicionário da expressão para um token.
+        strings (StringStore): O armazenamento de strings do vocabulário.
+
+    Returns:
+        tuple: As condições, ou None se o dicionário não puder ser compilado.
+    """
+    conditions = []
+    for key, value in spec.items():
+        name = _attr_name(key)
+        if name not in STRING_ATTRS | FLAG_ATTRS | INT_ATTRS:
+            return None
+        if isinstance(value, dict):
+            if len(value) != 1 or not set(value) <= SET_PREDICATES:
+                return None
+            predicate, values = next(iter(value.items()))
+        else:
+            predicate, values = "IN", [value]
+        if name in STRING_ATTRS:
+            if not all(isinstance(item, str) for item in values):
+                return None
+            values = [strings[item] for item in values]
+        elif name in FLAG_ATTRS:
+            if not all(isinstance(item, bool) for item in values):
+                return None
+            values = [int(item) for item in values]
+        elif not all(isinstance(item, int) for item in values):
+            return None
+        conditions.append((name, predicate, tuple(sorted(values))))
+    return tuple(sorted(conditions))
+
+
+def compile_pattern(pattern, strings):
+    """
+    Compila uma expressão de tamanho fixo, retornando uma tupla de condições por token ou None.
+
+    Args:
+        pattern (list): A expressão (lista de dicionários).
+        strings (StringStore): O armazenamento de strings do vocabulário.
+    """
+    if not pattern:
+        return None
+    compiled = []
+    for spec in pattern:
+        conditions = compile_token_spec(spec, strings)
+        if conditions is None:
+            return None
+        compiled.append(conditions)
+    return tuple(compiled)
+
+
+class CompiledMatcher:
+    """
+    Comparador que executa expressões de tamanho fixo com operações vetorizadas e as demais com o Matcher.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+        validate (bool, opcional): Valida as expressões enviadas ao Matcher. Padrão: False
+    """
+
+    def __init__(self, vocab, validate=False):
+        self.vocab = vocab
+        self.fallback = Matcher(vocab, validate=validate)
+        # (identificador, ordem, condições por token) de cada expressão compilada
+        self.compiled = []
+        self.attrs = []
+        # A ordem em que as expressões foram adicionadas, usada para desempatar como no Matcher
+        self.n_patterns = 0
+        self.fallback_ranks = {}
+
+    def __len__(self):
+        return len(self.compiled) + len(self.fallback)
+
+    def add(self, key, patterns, greedy=None):
+        """
+        Adiciona expressões com o mesmo identificador, como o matcher.add.
+
+        Expressões com o parâmetro greedy são sempre enviadas ao Matcher.
+        """
+        key_id = self.vocab.strings.add(key)
+        fallback = []
+        for pattern in patterns:
+            rank = self.n_patterns
+            self.n_patterns += 1
+            compiled = None if greedy else compile_pattern(pattern, self.vocab.strings)
+            if compiled is None:
+                fallback.append(pattern)
+                self.fallback_ranks.setdefault(key_id, rank)
+                continue
+            self.compiled.append((key_id, rank, compiled))
+            for conditions in compiled:
+                for name, _, _ in conditions:
+                    if name not in self.attrs:
+                        self.attrs.append(name)
+        if fallback:
+            self.fallback.add(key, fallback, greedy=greedy)
+
+    def _mask(self, columns, conditions, cache, length):
+        if conditions not in cache:
+            mask = numpy.ones(length, dtype=bool)
+            for name, predicate, values in conditions:
+                column = columns[name]
+                if len(values) == 1:
+                    matched = column == values[0]
+                else:
+                    matched = numpy.isin(column, values)
+                mask &= matched if predicate == "IN" else ~matched
+            cache[conditions] = mask
+        return cache[conditions]
+
+    def find_arrays(self, doc):
+        """
+        Retorna as correspondências como três arrays: identificadores, inícios e fins.
+
+        Args:
+            doc (Doc): O documento.
+        """
+        found = []
+        length = len(doc)
+        if self.compiled and length:
+            names = self.attrs
+            columns = {}
+            if names:
+                array = doc.to_array([ATTR_IDS[name] for name in names]).reshape(length, len(names))
+                columns = {name: array[:, i] for i, name in enumerate(names)}
+            cache = {}
+            for key_id, rank, compiled in self.compiled:
+                size = len(compiled)
+                if size > length:
+                    continue
+                window = length - size + 1
+                # Deslocar a máscara do k-ésimo token em k posições e combinar com AND
+                mask = self._mask(columns, compiled[0], cache, length)[:window].copy()
+                for offset, conditions in enumerate(compiled[1:], 1):
+                    mask &= self._mask(columns, conditions, cache, length)[offset : offset + window]
+                starts = numpy.flatnonzero(mask)
+                if len(starts):
+                    block = numpy.empty((len(starts), 4), dtype=numpy.uint64)
+                    block[:, 0] = key_id
+                    block[:, 1] = starts
+                    block[:, 2] = starts + size
+                    block[:, 3] = rank
+                    found.append(block)
+        if len(self.fallback):
+            matches = self.fallback(doc)
+            if matches:
+                block = numpy.array(matches, dtype=numpy.uint64)
+                ranks = [self.fallback_ranks[key_id] for key_id, _, _ in matches]
+                found.append(numpy.column_stack([block, numpy.array(ranks, dtype=numpy.uint64)]))
+        if not found:
+            empty = numpy.empty(0, dtype=numpy.int64)
+            return numpy.empty(0, dtype=numpy.uint64), empty, empty
+        matches = numpy.concatenate(found)
+        # Ordenar como o Matcher: pelo fim, pelo início e pela ordem das expressões
+        matches = matches[numpy.lexsort((matches[:, 3], matches[:, 1], matches[:, 2]))]
+        # Remover as correspondências repetidas (expressões diferentes do mesmo identificador), mantendo a primeira
+        _, first = numpy.unique(matches[:, :3], axis=0, return_index=True)
+        matches = matches[numpy.sort(first)]
+        return matches[:, 0], matches[:, 1].astype(numpy.int64), matches[:, 2].astype(numpy.int64)
+
+    def __call__(self, doc):
+        """Retorna a lista de tuplas (match_id, start, end), como o Matcher."""
+        key_ids, starts, ends = self.find_arrays(doc)
+        return list(zip(key_ids.tolist(), starts.tolist(), ends.tolist()))
+
+
+def benchmark(nlp, patterns, texts, repeat=3):
+    """
+    Compara o tempo do Matcher com o do CompiledMatcher nos mesmos documentos e confere se os resultados são iguais,
+    incluindo a ordem. Se alguma expressão foi enviada ao Matcher comum, a ordem entre correspondências com o mesmo
+    início e fim não é comparada.
+
+    Args:
+        nlp (Language): O objeto nlp usado para criar os documentos.
+        patterns (dict): Mapeia o identificador para a lista de expressões.
+        texts (list): Os textos a serem processados.
+        repeat (int, opcional): Quantas vezes cada comparador é executado. Padrão: 3
+
+    Returns:
+        dict: O melhor tempo em segundos de cada comparador e o número de correspondências.
+    """
+    docs = list(nlp.pipe(texts))
+    matcher = Matcher(nlp.vocab)
+    compiled = CompiledMatcher(nlp.vocab)
+    for key, key_patterns in patterns.items():
+        matcher.add(key, key_patterns)
+        compiled.add(key, key_patterns)
+
+    results = {}
+    for name, candidate in (("Matcher", matcher), ("CompiledMatcher", compiled)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches = [candidate(doc) for doc in docs]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if len(compiled.fallback):
+            matches = [sorted(doc_matches, key=lambda match: (match[2], match[1], match[0])) for doc_matches in matches]
+        results[name] = {"seconds": best, "matches": sum(len(m) for m in matches), "found": matches}
+
+    if results["Matcher"]["found"] != results["CompiledMatcher"]["found"]:
+        raise AssertionError("O CompiledMatcher encontrou correspondências diferentes do Matcher")
+    return {
+        name: {"seconds": result["seconds"], "matches": result["matches"]}
+        for name, result in results.items()
+    }
+
+
+if __name__ == "__main__":
+    import random
+
+    import spacy
+
+    nlp = spacy.blank("pt")
+    text = (
+        "Copa do Mundo FIFA 2002: Brasil venceu! A maioria da roupagem do iOS 11 permanece a mesma que o iOS 10. "
+    )
+    words = text.split()
+    random.seed(0)
+    texts = [" ".join(random.choices(words, k=5000)) + " " + text for _ in range(20)]
+
+    patterns = {
+        "COPA_DO_MUNDO_FIFA_PATTERN": [
+            [
+                {"LOWER": "copa"},
+                {"LOWER": "do"},
+                {"LOWER": "mundo"},
+                {"LOWER": "fifa"},
+                {"IS_DIGIT": True},
+                {"IS_PUNCT": True},
+            ]
+        ],
+        # Variações da mesma regra: as duas expressões encontram "iOS 11", que deve aparecer uma única vez
+        "IOS_VERSION_PATTERN": [[{"TEXT": "iOS"}, {"IS_DIGIT": True}], [{"LOWER": "ios"}, {"IS_DIGIT": True}]],
+    }
+    # Conjunto grande de regras: uma expressão para cada par de palavras do texto
+    for i, (first, second) in enumerate(zip(words, words[1:])):
+        patterns[f"BIGRAM_{i}"] = [[{"LOWER": first.lower()}, {"TEXT": second}]]
+
+    for name, result in benchmark(nlp, patterns, texts).items():
+        print(f"{name}: {result['seconds']:.3f}s, {result['matches']} correspondências")
@@ -0,0 +1,167 @@
+"""
+Conjuntos compactos de partições
+
+O capítulo 2 cria uma partição Span para cada entidade e cada correspondência:
+
+span = Span(doc, 0, 2, label="SAUDACAO")
+doc.ents = [span]
+
+Cada objeto Span ocupa algumas centenas de bytes. Guardar 100 mil partições por parte do corpus só para contar
+rótulos, ordenar e remover sobreposições consome mais memória do que os próprios documentos.
+
+O SpanSet estende o MatchResults (ferramentas/resultados.py) e guarda as partições como três arrays NumPy (rótulo,
+início e fim), com 16 bytes por partição. Além de contar, filtrar e remover sobreposições sem criar partições, ele:
+
+    - ordena as partições pelo início e pelo fim
+    - grava os arrays em doc.user_data, que é serializado junto com o documento (DocBin com store_user_data=True)
+    - converte para doc.spans (um SpanGroup, que guarda as partições em estruturas C, sem objetos Python) ou para
+      doc.ents; doc.ents é preenchido com doc.from_array, sem criar nenhum objeto Span
+
+spans = SpanSet.from_matcher(matcher, doc).filter_overlaps()
+spans.save("countries")
+spans.to_ents()
+"""
+
+import numpy
+from spacy.attrs import ENT_IOB, ENT_TYPE
+from spacy.tokens import Span, SpanGroup
+
+from ferramentas.resultados import MatchResults
+
+SPANS_KEY = "._spans."
+
+# Códigos de doc.to_array(ENT_IOB)
+IOB_INSIDE, IOB_OUTSIDE, IOB_BEGIN = 1, 2, 3
+
+
+class SpanSet(MatchResults):
+    """
+    Partições de um documento armazenadas em arrays.
+
+    Args:
+        doc (Doc): O documento.
+        labels: Os códigos hash dos rótulos.
+        starts: Os índices dos tokens iniciais.
+        ends: Os índices dos tokens finais (não incluídos).
+    """
+
+    @property
+    def labels(self):
+        """Os códigos hash dos rótulos (o mesmo array que match_ids)."""
+        return self.match_ids
+
+    @classmethod
+    def from_spans(cls, doc, spans):
+        """Cria o conjunto a partir de partições, por exemplo doc.ents ou um SpanGroup."""
+        spans = list(spans)
+        return cls(
+            doc,
+            [span.label for span in spans],
+            [span.start for span in spans],
+            [span.end for span in spans],
+        )
+
+    @classmethod
+    def load(cls, doc, key):
+        """Lê um conjunto gravado com save, ou retorna um conjunto vazio."""
+        data = doc.user_data.get((SPANS_KEY, key))
+        if data is None:
+            return cls(doc, [], [], [])
+        return cls(doc, *data)
+
+    def save(self, key):
+        """Grava os arrays em doc.user_data, sob a chave informada."""
+        self.doc.user_data[(SPANS_KEY, key)] = (self.match_ids, self.starts, self.ends)
+        return self
+
+    def sort(self):
+        """Retorna as partições ordenadas pelo início, pelo fim e pelo rótulo."""
+        return self.select(numpy.lexsort((self.match_ids, self.ends, self.starts)))
+
+    def has_overlaps(self):
+        """Indica se alguma partição se sobrepõe a outra."""
+        if len(self) < 2:
+            return False
+        order = numpy.lexsort((self.ends, self.starts))
+        # Ordenadas pelo início, há sobreposição se alguma partição começa antes do maior fim anterior
+        max_ends = numpy.maximum.accumulate(self.ends[order])
+        return bool((self.starts[order][1:] < max_ends[:-1]).any())
+
+    def to_span_group(self, key, attach=True):
+        """
+        Converte o conjunto em um SpanGroup.
+
+        Os objetos Span criados para montar o grupo são descartados em seguida: o SpanGroup guarda apenas os
+        índices e os rótulos.
+
+        Args:
+            key (str): O nome do grupo.
+            attach (bool, opcional): Também guarda o grupo em doc.spans[key]. Padrão: True
+        """
+        group = SpanGroup(self.doc, name=key, spans=list(self.spans()))
+        if attach:
+            self.doc.spans[key] = group
+        return group
+
+    def to_ents(self, filter_overlaps=True):
+        """
+        Substitui doc.ents pelas partições, preenchendo as colunas ENT_IOB e ENT_TYPE com doc.from_array.
+
+        Args:
+            filter_overlaps (bool, opcional): Remove as sobreposições antes, já que as entidades não podem se
+                sobrepor. Padrão: True
+        """
+        spans = self.filter_overlaps() if filter_overlaps else self
+        if spans.has_overlaps():
+            raise ValueError("As entidades não podem se sobrepor: use filter_overlaps=True")
+        length = len(self.doc)
+        lengths = spans.lengths()
+        # Marca o início e o fim de cada partição e soma: os tokens dentro de alguma partição ficam com 1
+        boundaries = numpy.zeros(length + 1, dtype=numpy.int64)
+        numpy.add.at(boundaries, spans.starts, 1)
+        numpy.add.at(boundaries, spans.ends, -1)
+        inside = numpy.cumsum(boundaries[:-1]) > 0
+        iob = numpy.where(inside, IOB_INSIDE, IOB_OUTSIDE).astype(numpy.uint64)
+        iob[spans.starts] = IOB_BEGIN
+        # O índice de cada token de cada partição: o início da partição mais a posição do token dentro dela
+        offsets = numpy.arange(lengths.sum()) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        ent_type = numpy.zeros(length, dtype=numpy.uint64)
+        ent_type[numpy.repeat(spans.starts, lengths) + offsets] = numpy.repeat(spans.match_ids, lengths)
+        self.doc.from_array([ENT_IOB, ENT_TYPE], numpy.stack([iob, ent_type], axis=1))
+        return self.doc.ents
+
+
+if __name__ == "__main__":
+    import tracemalloc
+
+    import spacy
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("pt")
+    doc = Doc(nlp.vocab, words=["Eu", "adoro", "David", "Bowie", "e", "o", "Brasil"])
+    label = nlp.vocab.strings.add("PERSON")
+    starts = numpy.random.default_rng(0).integers(0, 6, size=100_000)
+
+    tracemalloc.start()
+    objects = [Span(doc, int(start), int(start) + 1, label=label) for start in starts]
+    print(f"Objetos Span: {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MB")
+    del objects
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    spans = SpanSet(doc, numpy.full(len(starts), label), starts, starts + 1)
+    print(f"SpanSet: {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MB")
+    tracemalloc.stop()
+
+    spans = SpanSet(doc, [label, label, nlp.vocab.strings.add("GPE")], [2, 3, 6], [4, 4, 7])
+    print(spans.label_counts(), spans.has_overlaps())
+    print([(ent.text, ent.label_) for ent in spans.to_ents()])
+    print(SpanSet.load(doc, "vazio").save("vazio").labels)
+    """
+    Saída:
+    Objetos Span: 10.7 MB
+    SpanSet: 1.5 MB
+    {'PERSON': 2, 'GPE': 1} True
+    [('David Bowie', 'PERSON'), ('Brasil', 'GPE')]
+    []
+    """
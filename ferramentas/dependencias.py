@@ -0,0 +1,196 @@
+"""
+Análise sintática de partições com arrays
+
+O capítulo 2 obtém, para cada correspondência, a raiz da partição, o seu token cabeçalho e o token anterior:
+
+for match_id, start, end in matcher(doc):
+    span = doc[start:end]
+    print(span.root.text, span.root.head.text, doc[start - 1].pos_)
+
+Cada span.root percorre a árvore sintática em Python, e cada acesso a .head, .text e .pos_ cria um objeto Token. Com
+milhões de correspondências, esse acesso aos atributos domina o tempo de execução. Além disso, doc[start - 1] retorna o
+último token do documento quando a partição começa no primeiro token.
+
+Este módulo lê doc.to_array([HEAD, DEP, POS]) uma única vez por documento e calcula, para todas as partições ao mesmo
+tempo:
+
+    - root: a raiz da partição (a mesma regra de span.root: o token com menos ancestrais entre os que têm o token
+      principal fora da partição)
+    - head: o token principal da raiz (root.head)
+    - verb: o verbo que governa a partição (o primeiro verbo entre root.head e os seus ancestrais)
+    - previous: o token anterior à partição
+
+Todos são arrays de índices de tokens, com -1 quando o token não existe.
+
+deps = analyze_spans(doc, starts, ends)
+for verb, span in zip(deps.texts("verb"), spans):
+    print(verb, "-->", span.text)
+"""
+
+import numpy
+from spacy.attrs import DEP, HEAD, POS
+
+VERB_POS = ("VERB",)
+
+
+def _ancestor_arrays(heads, pos, verb_ids):
+    """
+    Calcula a profundidade de cada token na árvore e o verbo mais próximo entre o próprio token e os seus ancestrais.
+
+    As duas buscas sobem a árvore em todos os tokens ao mesmo tempo, um nível por iteração.
+    """
+    length = len(heads)
+    depth = numpy.zeros(length, dtype=numpy.int32)
+    nearest_verb = numpy.full(length, -1, dtype=numpy.int64)
+    is_verb = numpy.isin(pos, verb_ids)
+    current = numpy.arange(length)
+    # Uma árvore com n tokens tem no máximo n níveis; o limite também evita laços infinitos em árvores inválidas
+    for _ in range(length):
+        found = (nearest_verb == -1) & is_verb[current]
+        nearest_verb[found] = current[found]
+        parent = heads[current]
+        active = parent != current
+        if not active.any():
+            break
+        depth += active
+        current = parent
+    return depth, nearest_verb
+
+
+class SpanDependencies:
+    """
+    Raízes, tokens principais, verbos e tokens anteriores de um lote de partições de um documento.
+
+    Args:
+        doc (Doc): O documento.
+        root, head, verb, previous (numpy.ndarray): Os índices dos tokens, -1 quando o token não existe.
+        pos, dep (numpy.ndarray): A classe gramatical e o termo sintático de cada token do documento.
+    """
+
+    def __init__(self, doc, root, head, verb, previous, pos, dep):
+        self.doc = doc
+        self.root = root
+        self.head = head
+        self.verb = verb
+        self.previous = previous
+        self._pos = pos
+        self._dep = dep
+
+    def __len__(self):
+        return len(self.root)
+
+    def _labels(self, name, values):
+        strings = self.doc.vocab.strings
+        indices = getattr(self, name)
+        return [strings[int(values[i])] if i >= 0 else None for i in indices.tolist()]
+
+    def pos(self, name):
+        """Retorna a classe gramatical (str) dos tokens indicados por name ("root", "head", "verb" ou "previous")."""
+        return self._labels(name, self._pos)
+
+    def dep(self, name):
+        """Retorna o termo sintático (str) dos tokens indicados por name."""
+        return self._labels(name, self._dep)
+
+    def texts(self, name):
+        """Retorna o texto dos tokens indicados por name, ou None quando o token não existe."""
+        doc = self.doc
+        return [doc[i].text if i >= 0 else None for i in getattr(self, name).tolist()]
+
+
+def analyze_spans(doc, starts, ends, verb_pos=VERB_POS):
+    """
+    Analisa um lote de partições de um documento em uma única passada.
+
+    Args:
+        doc (Doc): O documento, processado por um fluxo com analisador sintático.
+        starts: Os índices dos tokens iniciais das partições.
+        ends: Os índices dos tokens finais (não incluídos).
+        verb_pos (tuple, opcional): As classes gramaticais consideradas verbos. Padrão: ("VERB",)
+
+    Returns:
+        SpanDependencies: Os índices da raiz, do token principal, do verbo e do token anterior de cada partição.
+    """
+    starts = numpy.asarray(starts, dtype=numpy.int64)
+    ends = numpy.asarray(ends, dtype=numpy.int64)
+    array = doc.to_array([HEAD, DEP, POS]).reshape(len(doc), 3)
+    # HEAD é a distância até o token principal, armazenada como uint64
+    heads = array[:, 0].view(numpy.int64) + numpy.arange(len(doc))
+    dep, pos = array[:, 1], array[:, 2]
+    strings = doc.vocab.strings
+    verb_ids = numpy.array([strings[label] for label in verb_pos], dtype=numpy.uint64)
+    depth, nearest_verb = _ancestor_arrays(heads, pos, verb_ids)
+
+    # Todos os tokens de todas as partições em um único array, com o número da partição de cada um
+    lengths = numpy.maximum(ends - starts, 0)
+    offsets = numpy.concatenate([[0], numpy.cumsum(lengths)[:-1]]).astype(numpy.int64)
+    span_ids = numpy.repeat(numpy.arange(len(starts)), lengths)
+    tokens = starts[span_ids] + numpy.arange(lengths.sum()) - offsets[span_ids]
+
+    # Candidatos a raiz: tokens cujo token principal é ele mesmo ou está fora da partição
+    token_heads = heads[tokens]
+    outside = (
+        (token_heads == tokens) | (token_heads < starts[span_ids]) | (token_heads >= ends[span_ids])
+    )
+    score = numpy.where(outside, depth[tokens], len(doc) + 1)
+    # Ordena por partição, depois pela profundidade e depois pela posição: o primeiro de cada partição é a raiz
+    order = numpy.lexsort((tokens, score, span_ids))
+    root = numpy.full(len(starts), -1, dtype=numpy.int64)
+    filled = lengths > 0
+    first = order[offsets[filled]]
+    # Como em span.root, uma partição sem candidatos a raiz fica com o primeiro token
+    root[filled] = numpy.where(score[first] > len(doc), starts[filled], tokens[first])
+
+    head = numpy.where(root >= 0, heads[numpy.maximum(root, 0)], -1)
+    # A raiz da sentença não tem token principal, então também não é governada por nenhum verbo
+    governed = (root >= 0) & (head != root)
+    verb = numpy.where(governed, nearest_verb[numpy.maximum(head, 0)], -1)
+    previous = numpy.where(starts > 0, starts - 1, -1)
+    return SpanDependencies(doc, root, head, verb, previous, pos, dep)
+
+
+def analyze_docs(docs_and_spans, verb_pos=VERB_POS):
+    """
+    Analisa as partições de vários documentos.
+
+    Args:
+        docs_and_spans (iterable): Tuplas (doc, starts, ends).
+        verb_pos (tuple, opcional): As classes gramaticais consideradas verbos.
+
+    Yields:
+        SpanDependencies: O resultado de cada documento.
+    """
+    for doc, starts, ends in docs_and_spans:
+        yield analyze_spans(doc, starts, ends, verb_pos)
+
+
+if __name__ == "__main__":
+    import spacy
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("pt")
+    doc = Doc(
+        nlp.vocab,
+        words=["Eu", "nunca", "tive", "um", "Golden", "Retriever"],
+        pos=["PRON", "ADV", "VERB", "DET", "PROPN", "PROPN"],
+        deps=["nsubj", "advmod", "ROOT", "det", "compound", "obj"],
+        heads=[2, 2, 2, 5, 5, 2],
+    )
+    starts, ends = [4, 0, 2], [6, 1, 3]
+    deps = analyze_spans(doc, starts, ends)
+    for span, root, head, verb, previous, previous_pos in zip(
+        (doc[s:e] for s, e in zip(starts, ends)),
+        deps.texts("root"),
+        deps.texts("head"),
+        deps.texts("verb"),
+        deps.texts("previous"),
+        deps.pos("previous"),
+    ):
+        assert root == span.root.text
+        print(f"{span.text}: raiz={root}, cabeça={head}, verbo={verb}, anterior={previous} ({previous_pos})")
+    """
+    Saída:
+    Golden Retriever: raiz=Retriever, cabeça=tive, verbo=tive, anterior=um (DET)
+    Eu: raiz=Eu, cabeça=tive, verbo=tive, anterior=None (None)
+    tive: raiz=tive, cabeça=tive, verbo=None, anterior=nunca (ADV)
+    """
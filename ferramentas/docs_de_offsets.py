@@ -0,0 +1,168 @@
+"""
+Criação de documentos a partir de textos já toquenizados
+
+O capítulo 2 cria um Doc manualmente a partir de listas de palavras e de espaços em branco:
+
+doc = Doc(nlp.vocab, words=words, spaces=spaces)
+
+Quando os textos já chegam toquenizados de outro sistema, normalmente no formato de um texto único com as posições
+(offsets) de início e fim de cada token, não faz sentido executar o toquenizador da spaCy novamente nem montar listas
+de palavras e espaços token a token em Python.
+
+Este módulo recebe:
+
+    - text: um texto único com todos os documentos
+    - starts, ends: arrays NumPy com as posições dos caracteres de início e fim (não incluído) de cada token em text
+    - doc_bounds: um array com o índice do primeiro token de cada documento, mais o total de tokens no final
+      (o mesmo formato dos índices de uma matriz esparsa CSR)
+
+Os espaços em branco são calculados de uma só vez com NumPy, comparando o fim de cada token com o início do próximo.
+Para cada documento, a única lista criada é a das palavras, exigida pelo construtor Doc. Espaços em branco
+diferentes de um único " " entre dois tokens viram tokens de espaço, como faz o toquenizador da spaCy, e doc.text
+continua igual ao trecho original, do início do primeiro token ao fim do último.
+
+Os documentos criados seguem direto para os componentes estatísticos com nlp.pipe, sem passar pelo toquenizador.
+
+for doc in pipe_from_offsets(nlp, text, starts, ends, doc_bounds):
+    print(doc.ents)
+"""
+
+import numpy
+from spacy.tokens import Doc
+
+SPACE = ord(" ")
+
+
+def _codepoints(text):
+    """Retorna os caracteres do texto como um array de códigos Unicode (uint32)."""
+    return numpy.frombuffer(text.encode("utf-32-le"), dtype=numpy.uint32)
+
+
+def docs_from_offsets(vocab, text, starts, ends, doc_bounds):
+    """
+    Cria os documentos a partir das posições dos tokens em um texto único.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+        text (str): O texto com todos os documentos.
+        starts (numpy.ndarray): A posição do caractere inicial de cada token.
+        ends (numpy.ndarray): A posição do caractere final (não incluído) de cada token.
+        doc_bounds (numpy.ndarray): O índice do primeiro token de cada documento, mais o total de tokens no final.
+
+    Yields:
+        Doc: Um documento para cada intervalo de doc_bounds.
+    """
+    starts = numpy.asarray(starts, dtype=numpy.int64)
+    ends = numpy.asarray(ends, dtype=numpy.int64)
+    doc_bounds = numpy.asarray(doc_bounds, dtype=numpy.int64)
+
+    # O espaço depois de cada token: a distância até o início do próximo token do mesmo documento
+    gaps = numpy.zeros(len(starts), dtype=numpy.int64)
+    gaps[:-1] = starts[1:] - ends[:-1]
+    last_tokens = doc_bounds[1:] - 1
+    gaps[last_tokens[last_tokens >= 0]] = 0
+    if (gaps < 0).any():
+        raise ValueError("As posições dos tokens se sobrepõem ou não estão em ordem")
+    chars = _codepoints(text)
+    single_space = gaps == 1
+    single_space[single_space] = chars[ends[single_space]] == SPACE
+    # Qualquer outro espaço entre tokens (vários espaços, quebras de linha) precisa de tokens de espaço
+    irregular = (gaps > 0) & ~single_space
+
+    starts_list, ends_list = starts.tolist(), ends.tolist()
+    spaces_list = single_space.tolist()
+    for doc_start, doc_end in zip(doc_bounds[:-1].tolist(), doc_bounds[1:].tolist()):
+        if not irregular[doc_start:doc_end].any():
+            words = [text[starts_list[i] : ends_list[i]] for i in range(doc_start, doc_end)]
+            yield Doc(vocab, words=words, spaces=spaces_list[doc_start:doc_end])
+            continue
+        words, spaces = [], []
+        for i in range(doc_start, doc_end):
+            words.append(text[starts_list[i] : ends_list[i]])
+            if not irregular[i]:
+                spaces.append(spaces_list[i])
+                continue
+            gap = text[ends_list[i] : starts_list[i + 1]]
+            # Como no toquenizador: o primeiro espaço fica com o token, e o resto vira um token de espaço
+            if gap[0] == " ":
+                spaces.append(True)
+                gap = gap[1:]
+            else:
+                spaces.append(False)
+            words.append(gap)
+            spaces.append(False)
+        yield Doc(vocab, words=words, spaces=spaces)
+
+
+def pipe_from_offsets(nlp, text, starts, ends, doc_bounds, batch_size=1000, n_process=1):
+    """
+    Cria os documentos a partir das posições dos tokens e os processa com os componentes do fluxo.
+
+    O toquenizador não é executado: nlp.pipe recebe os documentos já criados.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        text, starts, ends, doc_bounds: Veja docs_from_offsets.
+        batch_size (int, opcional): Quantidade de documentos processados por lote. Padrão: 1000
+        n_process (int, opcional): Quantidade de processos. Padrão: 1
+
+    Yields:
+        Doc: Os documentos processados.
+    """
+    docs = docs_from_offsets(nlp.vocab, text, starts, ends, doc_bounds)
+    yield from nlp.pipe(docs, batch_size=batch_size, n_process=n_process)
+
+
+def offsets_from_docs(docs):
+    """
+    Faz o caminho inverso: retorna o texto único e os arrays de posições de uma lista de documentos.
+
+    Os tokens de espaço não são incluídos. Útil para testes e para gravar documentos nesse formato.
+
+    Returns:
+        tuple: text, starts, ends, doc_bounds
+    """
+    texts, starts, ends, bounds = [], [], [], [0]
+    offset = 0
+    for doc in docs:
+        for token in doc:
+            if not token.is_space:
+                starts.append(offset + token.idx)
+                ends.append(offset + token.idx + len(token))
+        texts.append(doc.text)
+        offset += len(doc.text)
+        bounds.append(len(starts))
+    return (
+        "".join(texts),
+        numpy.array(starts, dtype=numpy.int64),
+        numpy.array(ends, dtype=numpy.int64),
+        numpy.array(bounds, dtype=numpy.int64),
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    import spacy
+
+    nlp = spacy.blank("pt")
+    texts = ["O preço médio da picanha em 2024 foi de R$ 71,00.", "Eu adoro  David Bowie!\nE você?"] * 5000
+    text, starts, ends, doc_bounds = offsets_from_docs(nlp.pipe(texts))
+
+    start = time.perf_counter()
+    list(nlp.tokenizer.pipe(texts))
+    print(f"Toquenizador: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    docs = list(docs_from_offsets(nlp.vocab, text, starts, ends, doc_bounds))
+    print(f"A partir das posições: {time.perf_counter() - start:.2f}s")
+
+    print(all(doc.text == original for doc, original in zip(docs, texts)))
+    print([token.text for token in docs[1]])
+    """
+    Saída (os tempos variam):
+    Toquenizador: 0.54s
+    A partir das posições: 0.23s
+    True
+    ['Eu', 'adoro', ' ', 'David', 'Bowie', '!', '\n', 'E', 'você', '?']
+    """
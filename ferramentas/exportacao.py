@@ -0,0 +1,246 @@
+"""
+Exportação colunar das anotações dos tokens
+
+O capítulo 1 imprime token.text, token.pos_, token.dep_ e token.head.text para cada token, e o capítulo 2 monta listas
+de classes gramaticais manualmente. Para análises sobre grandes volumes de texto é muito mais barato processar os
+textos uma única vez e guardar as anotações em formato colunar, com uma coluna por atributo:
+
+-----------------------------------------------------------------------------------------------------------------------
+Coluna      | Tipo    | Conteúdo
+-----------------------------------------------------------------------------------------------------------------------
+doc_id      | int64   | identificador do documento
+token_idx   | int32   | índice do token no documento (token.i)
+ORTH        | uint64  | código hash do texto
+LEMMA       | uint64  | código hash do lema
+POS         | uint64  | identificador da classe gramatical
+DEP         | uint64  | código hash do termo sintático
+HEAD        | int32   | índice do token principal (token.head.i) no documento
+ENT_TYPE    | uint64  | código hash do tipo de entidade (0 se o token não faz parte de uma entidade)
+-----------------------------------------------------------------------------------------------------------------------
+
+As strings de todos os códigos hash ficam em uma tabela separada (strings), então quem lê o arquivo não precisa do
+vocabulário da spaCy.
+
+Se a biblioteca pyarrow estiver instalada, as colunas são gravadas em um arquivo Parquet (um grupo de linhas por
+bloco). Caso contrário, é criado um diretório com um arquivo .npz por bloco, usando apenas NumPy.
+
+with ColumnarWriter("anotacoes") as writer:
+    writer.write(nlp.pipe(texts))
+
+for columns in read_columns("anotacoes"):
+    print(columns["POS"])
+"""
+
+import json
+import os
+
+import numpy
+from spacy.attrs import IDS as ATTR_IDS
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_ATTRS = ["ORTH", "LEMMA", "POS", "DEP", "HEAD", "ENT_TYPE"]
+
+STRINGS_FILE = "strings.json"
+
+
+class ColumnarWriter:
+    """
+    Grava as anotações de lotes de documentos em blocos colunares.
+
+    Args:
+        path (str): O arquivo Parquet (com pyarrow) ou o diretório dos arquivos .npz.
+        attrs (list, opcional): Os atributos exportados. Padrão: ORTH, LEMMA, POS, DEP, HEAD, ENT_TYPE
+        chunk_size (int, opcional): Quantidade de tokens por bloco. Padrão: 100000
+        use_arrow (bool, opcional): Grava em Parquet. Padrão: True se o pyarrow estiver instalado
+        overwrite (bool, opcional): Apaga uma exportação anterior no mesmo caminho. Sem overwrite, um caminho já
+            exportado gera um FileExistsError, já que read_columns misturaria os blocos antigos com os novos.
+            Padrão: False
+    """
+
+    def __init__(self, path, attrs=EXPORT_ATTRS, chunk_size=100_000, use_arrow=None, overwrite=False):
+        if use_arrow is None:
+            use_arrow = pyarrow is not None
+        if use_arrow and pyarrow is None:
+            raise ImportError("A gravação em Parquet requer a biblioteca pyarrow")
+        self.path = path
+        self.attrs = list(attrs)
+        self.attr_ids = [ATTR_IDS[attr] for attr in self.attrs]
+        self.chunk_size = chunk_size
+        self.use_arrow = use_arrow
+        self.strings = {}
+        self.next_doc_id = 0
+        self.chunks_written = 0
+        self._pending = []
+        self._pending_tokens = 0
+        self._arrow_writer = None
+        previous = _exported_files(path)
+        if previous and not overwrite:
+            raise FileExistsError(f"Já existe uma exportação em '{path}': use overwrite=True para substituí-la")
+        for filepath in previous:
+            os.remove(filepath)
+        if not use_arrow:
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, docs, doc_ids=None):
+        """
+        Adiciona documentos ao arquivo.
+
+        Args:
+            docs (iterable): Os documentos processados.
+            doc_ids (iterable, opcional): Os identificadores dos documentos. Padrão: números sequenciais
+        """
+        doc_ids = iter(doc_ids) if doc_ids is not None else None
+        for doc in docs:
+            doc_id = next(doc_ids) if doc_ids is not None else self.next_doc_id
+            self.next_doc_id = doc_id + 1
+            self.add(doc, doc_id)
+
+    def add(self, doc, doc_id):
+        """Adiciona um documento ao bloco atual."""
+        length = len(doc)
+        array = doc.to_array(self.attr_ids).reshape(length, len(self.attrs))
+        columns = {
+            "doc_id": numpy.full(length, doc_id, dtype=numpy.int64),
+            "token_idx": numpy.arange(length, dtype=numpy.int32),
+        }
+        strings = doc.vocab.strings
+        for i, attr in enumerate(self.attrs):
+            column = array[:, i]
+            if attr == "HEAD":
+                # to_array retorna a distância até o token principal; guardamos o índice absoluto
+                columns[attr] = column.view(numpy.int64).astype(numpy.int32) + columns["token_idx"]
+                continue
+            columns[attr] = column
+            for key in numpy.unique(column).tolist():
+                if key and key not in self.strings:
+                    self.strings[key] = strings[key]
+        self._pending.append(columns)
+        self._pending_tokens += length
+        if self._pending_tokens >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Grava o bloco atual."""
+        if not self._pending:
+            return
+        chunk = {
+            name: numpy.concatenate([columns[name] for columns in self._pending])
+            for name in self._pending[0]
+        }
+        self._pending = []
+        self._pending_tokens = 0
+        if self.use_arrow:
+            table = pyarrow.table(chunk)
+            if self._arrow_writer is None:
+                self._arrow_writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._arrow_writer.write_table(table)
+        else:
+            numpy.savez(os.path.join(self.path, f"chunk_{self.chunks_written:05d}.npz"), **chunk)
+        self.chunks_written += 1
+
+    def close(self):
+        """Grava o último bloco e a tabela de strings."""
+        self.flush()
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+        with open(strings_path(self.path), "w", encoding="utf-8") as file:
+            json.dump({str(key): value for key, value in self.strings.items()}, file, ensure_ascii=False)
+
+
+def _is_chunk(name):
+    return name.startswith("chunk_") and name.endswith(".npz")
+
+
+def _exported_files(path):
+    """Retorna os arquivos de uma exportação existente no caminho: blocos, arquivo Parquet e tabela de strings."""
+    files = []
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if _is_chunk(name)]
+    elif os.path.exists(path):
+        files = [path]
+    if os.path.exists(strings_path(path)):
+        files.append(strings_path(path))
+    return files
+
+
+def strings_path(path):
+    """Retorna o caminho da tabela de strings de um arquivo exportado."""
+    if os.path.isdir(path):
+        return os.path.join(path, STRINGS_FILE)
+    return f"{path}.{STRINGS_FILE}"
+
+
+def read_strings(path):
+    """Retorna a tabela que mapeia os códigos hash (int) para as strings."""
+    with open(strings_path(path), encoding="utf-8") as file:
+        return {int(key): value for key, value in json.load(file).items()}
+
+
+def read_columns(path):
+    """
+    Lê um arquivo exportado, um bloco de cada vez.
+
+    Yields:
+        dict: Mapeia o nome de cada coluna para um array NumPy.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if _is_chunk(name):
+                with numpy.load(os.path.join(path, name)) as chunk:
+                    yield {column: chunk[column] for column in chunk.files}
+        return
+    if pyarrow is None:
+        raise ImportError("A leitura de arquivos Parquet requer a biblioteca pyarrow")
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    for i in range(parquet_file.num_row_groups):
+        table = parquet_file.read_row_group(i)
+        yield {column: table.column(column).to_numpy() for column in table.column_names}
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import spacy
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("pt")
+    doc = Doc(
+        nlp.vocab,
+        words=["O", "Palmeiras", "não", "tem", "mundial", "."],
+        pos=["DET", "PROPN", "ADV", "VERB", "ADJ", "PUNCT"],
+        deps=["det", "nsubj", "advmod", "ROOT", "obj", "punct"],
+        heads=[1, 3, 3, 3, 3, 3],
+        ents=["O", "B-ORG", "O", "O", "O", "O"],
+    )
+
+    path = os.path.join(tempfile.mkdtemp(), "anotacoes")
+    with ColumnarWriter(path, use_arrow=False) as writer:
+        writer.write([doc, doc])
+
+    strings = read_strings(path)
+    for columns in read_columns(path):
+        # HEAD é o índice dentro do documento: convertemos para a linha correspondente no bloco
+        head_rows = numpy.arange(len(columns["HEAD"])) - columns["token_idx"] + columns["HEAD"]
+        for orth, pos, dep, head in zip(columns["ORTH"], columns["POS"], columns["DEP"], head_rows):
+            print(strings[orth], strings[pos], strings[dep], strings[columns["ORTH"][head]])
+    """
+    Saída (para cada um dos dois documentos):
+    O DET det Palmeiras
+    Palmeiras PROPN nsubj tem
+    não ADV advmod tem
+    tem VERB ROOT tem
+    mundial ADJ obj tem
+    . PUNCT punct tem
+    """
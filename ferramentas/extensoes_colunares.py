@@ -0,0 +1,282 @@
+"""
+Extensões tipadas armazenadas em colunas
+
+Os valores dos atributos personalizados (._) ficam guardados em doc.user_data, um dicionário com uma entrada para
+cada token ou partição que recebeu um valor. Quando salvamos documentos com DocBin(store_user_data=True), esse
+dicionário inteiro é serializado e pode ficar maior do que os próprios dados dos tokens.
+
+Este módulo permite declarar extensões tipadas (bool, int, float ou um conjunto pequeno de strings) cujos valores são
+guardados em um único array NumPy por documento:
+
+    - Token: um array com uma posição por token
+    - Span: um array com os valores e outro com os índices (início, fim) das partições
+    - Doc: um array com uma única posição
+    - extensões bool, int ou float sem valor padrão (default=None) guardam também uma máscara com os valores
+      definidos, para que os valores ausentes continuem retornando None
+
+# Declarar as extensões
+set_typed_extension(Token, "is_country", "bool", default=False)
+set_typed_extension(Span, "capital", "enum", categories=["Brasília", "Madrid"])
+
+# Usar normalmente
+doc[3]._.is_country = True
+
+# Salvar e carregar com DocBin
+doc_bin = DocBin(store_user_data=True, docs=[doc])
+
+Os arrays são serializados em formato binário compacto pelo DocBin e recuperados ao carregar os documentos.
+Atributos calculados por uma função getter, como reversed ou has_number, não precisam ser armazenados.
+"""
+
+import numpy
+from spacy.tokens import Doc, Span, Token
+
+COLUMN_KEY = "._col."
+
+DTYPES = {
+    "bool": numpy.bool_,
+    "int": numpy.int64,
+    "float": numpy.float32,
+}
+
+LEVELS = {Doc: "doc", Span: "span", Token: "token"}
+
+# Extensões declaradas, indexadas por (nível, nome)
+_EXTENSIONS = {}
+
+
+class TypedExtension:
+    """
+    Descreve uma extensão tipada e converte os valores de e para o array que os armazena.
+
+    Args:
+        level (str): "doc", "span" ou "token".
+        name (str): O nome da extensão.
+        dtype (str): "bool", "int", "float" ou "enum".
+        default (opcional): O valor retornado quando nenhum valor foi definido.
+        categories (list, opcional): Os valores possíveis de uma extensão "enum".
+    """
+
+    def __init__(self, level, name, dtype, default=None, categories=None):
+        if dtype == "enum":
+            if not categories:
+                raise ValueError(f"A extensão '{name}' do tipo enum precisa de categories")
+            self.categories = [None] + list(categories)
+            self.codes = {value: code for code, value in enumerate(self.categories)}
+            # O código 0 é reservado para o valor padrão
+            self.numpy_dtype = (
+                numpy.uint8 if len(self.categories) <= 2**8 else numpy.uint16
+            )
+            self.fill = 0
+        elif dtype in DTYPES:
+            self.categories = None
+            self.numpy_dtype = DTYPES[dtype]
+            self.fill = default if default is not None else 0
+        else:
+            raise ValueError(
+                f"Tipo '{dtype}' inválido para a extensão '{name}'. "
+                f"Use um destes: {', '.join([*DTYPES, 'enum'])}"
+            )
+        self.level = level
+        self.name = name
+        self.dtype = dtype
+        self.default = default
+        self.key = (COLUMN_KEY, level, name)
+        self.spans_key = (COLUMN_KEY, level, name, "spans")
+        # Sem valor padrão, 0 não distingue um valor definido de um valor ausente: uma máscara indica os definidos
+        self.masked = self.categories is None and default is None
+        self.mask_key = (COLUMN_KEY, level, name, "mask")
+
+    def encode(self, value):
+        if self.categories is None:
+            return self.fill if value is None else value
+        if value is None or value == self.default:
+            return 0
+        if value not in self.codes:
+            raise ValueError(f"Valor '{value}' não é uma categoria da extensão '{self.name}'")
+        return self.codes[value]
+
+    def decode(self, value):
+        if self.categories is None:
+            return value.item()
+        if value == 0:
+            return self.default
+        return self.categories[value]
+
+    def column(self, doc, create=False):
+        """Retorna o array da extensão no documento, criando-o se create for True."""
+        values = doc.user_data.get(self.key)
+        if values is None:
+            if not create:
+                return None
+            size = {"doc": 1, "span": 0, "token": len(doc)}[self.level]
+            values = numpy.full(size, self.fill, dtype=self.numpy_dtype)
+            doc.user_data[self.key] = values
+            if self.masked:
+                doc.user_data[self.mask_key] = numpy.zeros(size, dtype=numpy.bool_)
+            if self.level == "span":
+                doc.user_data[self.spans_key] = numpy.empty((0, 2), dtype=numpy.int32)
+        elif create and not values.flags.writeable:
+            # Arrays recuperados do DocBin são somente leitura
+            values = doc.user_data[self.key] = values.copy()
+            if self.masked:
+                doc.user_data[self.mask_key] = doc.user_data[self.mask_key].copy()
+            if self.level == "span":
+                doc.user_data[self.spans_key] = doc.user_data[self.spans_key].copy()
+        return values
+
+    def mask(self, doc):
+        """Retorna o array que indica os valores definidos, ou None se a extensão tem valor padrão."""
+        if not self.masked:
+            return None
+        return doc.user_data.get(self.mask_key)
+
+    def _value(self, doc, index):
+        values = self.column(doc)
+        if values is None or (self.masked and not doc.user_data[self.mask_key][index]):
+            return self.default
+        return self.decode(values[index])
+
+    def _span_row(self, span):
+        spans = span.doc.user_data.get(self.spans_key)
+        if spans is None:
+            return None
+        rows = numpy.flatnonzero((spans[:, 0] == span.start) & (spans[:, 1] == span.end))
+        return rows[0] if len(rows) else None
+
+    def get(self, obj):
+        if self.level == "token":
+            return self._value(obj.doc, obj.i)
+        if self.level == "doc":
+            return self._value(obj, 0)
+        row = self._span_row(obj)
+        if row is None:
+            return self.default
+        return self._value(obj.doc, row)
+
+    def set(self, obj, value):
+        code = self.encode(value)
+        if self.level == "token":
+            doc, index = obj.doc, obj.i
+            self.column(doc, create=True)[index] = code
+        elif self.level == "doc":
+            doc, index = obj, 0
+            self.column(doc, create=True)[index] = code
+        else:
+            doc = obj.doc
+            self.column(doc, create=True)
+            index = self._span_row(obj)
+            if index is None:
+                index = len(doc.user_data[self.key])
+                doc.user_data[self.key] = numpy.append(
+                    doc.user_data[self.key], numpy.array([code], dtype=self.numpy_dtype)
+                )
+                doc.user_data[self.spans_key] = numpy.vstack(
+                    [doc.user_data[self.spans_key], [[obj.start, obj.end]]]
+                ).astype(numpy.int32)
+                if self.masked:
+                    doc.user_data[self.mask_key] = numpy.append(doc.user_data[self.mask_key], False)
+            else:
+                doc.user_data[self.key][index] = code
+        if self.masked:
+            doc.user_data[self.mask_key][index] = value is not None
+
+
+def set_typed_extension(cls, name, dtype, default=None, categories=None, force=False):
+    """
+    Registra uma extensão tipada armazenada em colunas na classe global Doc, Span ou Token.
+
+    Args:
+        cls: A classe Doc, Span ou Token.
+        name (str): O nome da extensão.
+        dtype (str): "bool", "int", "float" ou "enum".
+        default (opcional): O valor retornado quando nenhum valor foi definido.
+        categories (list, opcional): Os valores possíveis de uma extensão "enum".
+        force (bool, opcional): Sobrescreve uma extensão já registrada com o mesmo nome. Padrão: False
+
+    Returns:
+        TypedExtension: A descrição da extensão registrada.
+    """
+    if cls not in LEVELS:
+        raise ValueError(f"Classe inválida: {cls}. Use Doc, Span ou Token")
+    extension = TypedExtension(LEVELS[cls], name, dtype, default, categories)
+    cls.set_extension(name, getter=extension.get, setter=extension.set, force=force)
+    _EXTENSIONS[(extension.level, name)] = extension
+    return extension
+
+
+def get_column(doc, name, level="token"):
+    """
+    Retorna o array com os valores de uma extensão tipada, ou None se nenhum valor foi definido no documento.
+
+    Para extensões "enum" o array contém os códigos das categorias (0 para o valor padrão). Para extensões bool, int
+    ou float sem valor padrão, os valores não definidos aparecem como 0: use get_mask para identificá-los.
+    """
+    return _EXTENSIONS[(level, name)].column(doc)
+
+
+def get_mask(doc, name, level="token"):
+    """
+    Retorna o array que indica quais valores de uma extensão sem valor padrão foram definidos.
+
+    Retorna None se a extensão tem valor padrão ou se nenhum valor foi definido no documento.
+    """
+    return _EXTENSIONS[(level, name)].mask(doc)
+
+
+def set_column(doc, name, values, level="token", spans=None):
+    """
+    Define de uma só vez os valores de uma extensão tipada.
+
+    Args:
+        doc (Doc): O documento.
+        name (str): O nome da extensão.
+        values: Uma sequência com um valor por token, por partição ou um único valor para o documento.
+        level (str, opcional): "token", "span" ou "doc". Padrão: "token"
+        spans (list, opcional): Para extensões de partições, os pares (início, fim) de cada valor.
+    """
+    extension = _EXTENSIONS[(level, name)]
+    codes = [extension.encode(value) for value in values]
+    if extension.level == "span":
+        if spans is None:
+            raise ValueError("Informe os pares (início, fim) das partições no parâmetro spans")
+        doc.user_data[extension.key] = numpy.asarray(codes, dtype=extension.numpy_dtype)
+        doc.user_data[extension.spans_key] = numpy.asarray(spans, dtype=numpy.int32).reshape(-1, 2)
+        if extension.masked:
+            mask = [value is not None for value in values]
+            doc.user_data[extension.mask_key] = numpy.asarray(mask, dtype=numpy.bool_)
+        return doc.user_data[extension.key]
+    column = extension.column(doc, create=True)
+    column[:] = codes
+    if extension.masked:
+        doc.user_data[extension.mask_key][:] = [value is not None for value in values]
+    return column
+
+
+if __name__ == "__main__":
+    import spacy
+    import srsly
+    from spacy.tokens import DocBin
+
+    set_typed_extension(Token, "is_country", "bool", default=False)
+    set_typed_extension(Doc, "has_number", "bool", default=False)
+    set_typed_extension(Span, "capital", "enum", categories=["Madrid", "Bratislava"])
+
+    nlp = spacy.blank("pt")
+    doc = nlp("Eu moro na Espanha desde 2012")
+    doc[3]._.is_country = True
+    doc._.has_number = True
+    doc[3:4]._.capital = "Madrid"
+
+    doc_bin = DocBin(store_user_data=True, docs=[doc])
+    doc = list(DocBin().from_bytes(doc_bin.to_bytes()).get_docs(nlp.vocab))[0]
+
+    print([(token.text, token._.is_country) for token in doc])
+    print(doc._.has_number, doc[3:4]._.capital, doc[0:1]._.capital)
+    print(f"user_data: {len(srsly.msgpack_dumps(doc.user_data))} bytes")
+    """
+    Saída:
+    [('Eu', False), ('moro', False), ('na', False), ('Espanha', True), ('desde', False), ('2012', False)]
+    True Madrid None
+    user_data: 278 bytes
+    """
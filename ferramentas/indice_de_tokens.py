@@ -0,0 +1,151 @@
+"""
+Índice de tokens por documento
+
+O método extendido has_token do capítulo 3 percorre todos os tokens do documento e cria uma lista a cada chamada:
+
+def has_token(doc, token_text):
+    in_doc = token_text in [token.text for token in doc]
+    return in_doc
+
+Quando precisamos fazer dezenas de perguntas ao mesmo documento, é mais eficiente construir uma única vez um índice
+que mapeia o código hash do texto de cada token (ORTH) para as posições em que ele aparece.
+O índice é construído de forma preguiçosa: somente na primeira consulta ao documento. As consultas seguintes custam
+O(1) para um termo e O(k) para k termos.
+
+    Doc._.token_index: o índice do documento (TokenIndex)
+    Doc._.has_token("texto"): verifica se o texto aparece no documento
+    Doc._.positions_of("texto"): retorna as posições (token.i) em que o texto aparece
+    Doc._.has_all(["a", "b"]) / Doc._.has_any(["a", "b"]): consultas com vários termos
+
+O índice fica guardado fora do doc.user_data, portanto não aumenta o tamanho dos documentos serializados.
+"""
+
+import weakref
+
+import numpy
+from spacy.attrs import ORTH
+from spacy.tokens import Doc
+
+# Índices já construídos; a entrada some junto com o documento
+_INDEXES = weakref.WeakKeyDictionary()
+
+
+class TokenIndex:
+    """
+    Mapeia o código hash do texto de cada token para as posições em que ele aparece no documento.
+
+    Args:
+        doc (Doc): O documento a ser indexado.
+    """
+
+    def __init__(self, doc):
+        self.strings = doc.vocab.strings
+        self.length = len(doc)
+        orths = doc.to_array(ORTH)
+        # Ordenação estável: as posições de cada texto ficam em ordem crescente
+        order = numpy.argsort(orths, kind="stable")
+        keys, starts = numpy.unique(orths[order], return_index=True)
+        ends = numpy.append(starts[1:], len(order))
+        self._positions = {
+            key: order[start:end]
+            for key, start, end in zip(keys.tolist(), starts.tolist(), ends.tolist())
+        }
+
+    def __len__(self):
+        # Quantidade de textos distintos no documento
+        return len(self._positions)
+
+    def _key(self, token_text):
+        if isinstance(token_text, str):
+            return self.strings[token_text]
+        return token_text
+
+    def has_token(self, token_text):
+        """Retorna True se algum token tiver exatamente o texto (ou código hash) informado."""
+        return self._key(token_text) in self._positions
+
+    def positions_of(self, token_text):
+        """Retorna um array com as posições (token.i) em que o texto aparece, vazio se não aparecer."""
+        positions = self._positions.get(self._key(token_text))
+        if positions is None:
+            return numpy.empty(0, dtype=numpy.intp)
+        return positions
+
+    def count(self, token_text):
+        """Retorna o número de ocorrências do texto no documento."""
+        return len(self.positions_of(token_text))
+
+    def has_all(self, token_texts):
+        """Retorna True se todos os textos aparecerem no documento."""
+        return all(self._key(text) in self._positions for text in token_texts)
+
+    def has_any(self, token_texts):
+        """Retorna True se pelo menos um dos textos aparecer no documento."""
+        return any(self._key(text) in self._positions for text in token_texts)
+
+
+def get_token_index(doc):
+    """
+    Retorna o índice do documento, construindo-o na primeira chamada.
+
+    Se o documento mudar de tamanho (por exemplo, depois de doc.retokenize()), o índice é reconstruído.
+
+    Args:
+        doc (Doc): O documento a ser consultado.
+    """
+    index = _INDEXES.get(doc)
+    if index is None or index.length != len(doc):
+        index = TokenIndex(doc)
+        _INDEXES[doc] = index
+    return index
+
+
+def has_token(doc, token_text):
+    return get_token_index(doc).has_token(token_text)
+
+
+def positions_of(doc, token_text):
+    return get_token_index(doc).positions_of(token_text)
+
+
+def has_all(doc, token_texts):
+    return get_token_index(doc).has_all(token_texts)
+
+
+def has_any(doc, token_texts):
+    return get_token_index(doc).has_any(token_texts)
+
+
+def register_extensions(force=False):
+    """
+    Registra as extensões de índice na classe global Doc.
+
+    Args:
+        force (bool, opcional): Sobrescreve extensões já registradas com o mesmo nome, como o has_token do
+            capítulo 3. Padrão: False
+    """
+    Doc.set_extension("token_index", getter=get_token_index, force=force)
+    Doc.set_extension("has_token", method=has_token, force=force)
+    Doc.set_extension("positions_of", method=positions_of, force=force)
+    Doc.set_extension("has_all", method=has_all, force=force)
+    Doc.set_extension("has_any", method=has_any, force=force)
+
+
+if __name__ == "__main__":
+    import spacy
+
+    register_extensions()
+
+    nlp = spacy.blank("pt")
+    doc = nlp("O céu é azul. O mar também é azul.")
+    print(doc._.has_token("azul"), "- azul")
+    print(doc._.has_token("nuvem"), "- nuvem")
+    print(doc._.positions_of("azul"))
+    print(doc._.has_all(["céu", "mar"]), doc._.has_any(["nuvem", "sol"]))
+    """
+    Saída:
+    True - azul
+    False - nuvem
+    [3 9]
+    True False
+    """
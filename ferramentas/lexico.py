@@ -0,0 +1,144 @@
+"""
+Atributos léxicos em alta velocidade
+
+O capítulo 1 mostra que is_alpha, is_punct e like_num vêm de um fluxo spacy.blank("pt"), sem nenhum modelo: são
+atributos léxicos, que dependem apenas da entrada do vocabulário e não do contexto.
+
+Quando só precisamos desses atributos (por exemplo, para filtrar textos antes de processá-los com o fluxo completo),
+não é necessário executar nenhum componente nem criar objetos Token. Este módulo:
+
+    - toqueniza os textos em lote com nlp.tokenizer.pipe
+    - retorna, para cada documento, um array NumPy com uma linha por token e uma coluna por atributo
+      (doc.to_array, que lê os atributos diretamente dos lexemas)
+    - distribui os textos entre vários processos, mantendo a ordem dos resultados
+
+for array in lexical_arrays(nlp, texts):
+    columns = as_columns(array)
+    print(columns["LIKE_NUM"].sum(), "números")
+"""
+
+import multiprocessing
+import os
+from collections import deque
+
+import spacy
+from spacy.attrs import IDS as ATTR_IDS
+
+from ferramentas.vocabulario import load_snapshot
+
+LEXICAL_ATTRS = ["ORTH", "LOWER", "LENGTH", "IS_ALPHA", "IS_DIGIT", "IS_PUNCT", "IS_STOP", "LIKE_NUM"]
+
+
+def lexical_arrays(nlp, texts, attrs=LEXICAL_ATTRS, batch_size=1000):
+    """
+    Toqueniza os textos e retorna um array de atributos léxicos por documento.
+
+    Args:
+        nlp (Language): O objeto nlp. Apenas o toquenizador é usado.
+        texts (iterable): Os textos.
+        attrs (list, opcional): Os nomes dos atributos, na ordem das colunas.
+        batch_size (int, opcional): Quantidade de textos toquenizados por lote. Padrão: 1000
+
+    Yields:
+        numpy.ndarray: Um array uint64 com formato (tokens, atributos) para cada texto.
+    """
+    attr_ids = [ATTR_IDS[attr] for attr in attrs]
+    for doc in nlp.tokenizer.pipe(texts, batch_size=batch_size):
+        yield doc.to_array(attr_ids).reshape(len(doc), len(attr_ids))
+
+
+def as_columns(array, attrs=LEXICAL_ATTRS):
+    """Retorna um dicionário que mapeia o nome de cada atributo para a sua coluna no array."""
+    return {attr: array[:, i] for i, attr in enumerate(attrs)}
+
+
+_WORKER_NLP = None
+
+
+def _init_worker(lang, vocab_snapshot):
+    global _WORKER_NLP
+    _WORKER_NLP = spacy.blank(lang)
+    if vocab_snapshot is not None:
+        load_snapshot(_WORKER_NLP, vocab_snapshot)
+
+
+def _process_chunk(args):
+    texts, attrs, batch_size = args
+    return list(lexical_arrays(_WORKER_NLP, texts, attrs, batch_size))
+
+
+def _chunks(texts, size):
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def lexical_arrays_parallel(
+    lang,
+    texts,
+    attrs=LEXICAL_ATTRS,
+    n_process=None,
+    chunk_size=1000,
+    batch_size=1000,
+    vocab_snapshot=None,
+    max_pending=2,
+):
+    """
+    Como lexical_arrays, mas distribuindo os textos entre vários processos.
+
+    Cada processo cria o seu próprio spacy.blank(lang) uma única vez. Os resultados são retornados na mesma ordem
+    dos textos. Os valores de ORTH e LOWER são códigos hash, iguais em todos os processos.
+
+    Os textos são lidos sob demanda: no máximo n_process * max_pending partes ficam enviadas aos processos e ainda
+    não consumidas, então um gerador com milhões de textos não é carregado inteiro na memória. (O Pool.imap não
+    serve aqui, porque a sua thread de envio consome o gerador inteiro sem esperar o consumidor.)
+
+    Args:
+        lang (str): O código do idioma, por exemplo "pt".
+        texts (iterable): Os textos.
+        attrs (list, opcional): Os nomes dos atributos, na ordem das colunas.
+        n_process (int, opcional): O número de processos. Padrão: o número de CPUs
+        chunk_size (int, opcional): Quantidade de textos enviados a cada processo por vez. Padrão: 1000
+        batch_size (int, opcional): Quantidade de textos toquenizados por lote. Padrão: 1000
+        vocab_snapshot (str, opcional): Um instantâneo do vocabulário (veja vocabulario.save_snapshot), carregado
+            por cada processo ao iniciar, para que os lexemas não sejam criados durante a toquenização.
+        max_pending (int, opcional): Quantidade de partes pendentes por processo. Padrão: 2
+
+    Yields:
+        numpy.ndarray: Um array uint64 com formato (tokens, atributos) para cada texto.
+    """
+    n_process = n_process or os.cpu_count()
+    with multiprocessing.Pool(n_process, initializer=_init_worker, initargs=(lang, vocab_snapshot)) as pool:
+        # Os resultados ficam em uma fila na ordem dos textos; uma nova parte só é enviada quando há espaço
+        pending = deque()
+        for chunk in _chunks(texts, chunk_size):
+            pending.append(pool.apply_async(_process_chunk, ((chunk, attrs, batch_size),)))
+            if len(pending) >= n_process * max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+if __name__ == "__main__":
+    import time
+
+    nlp = spacy.blank("pt")
+    texts = [" ".join(["O preço médio da picanha em 2024 foi de R$ 71,00."] * 20)] * 2500
+
+    start = time.perf_counter()
+    rows = [[token.is_alpha, token.is_punct, token.like_num] for doc in nlp.pipe(texts) for token in doc]
+    print(f"Objetos Token: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    numbers = sum(as_columns(array)["LIKE_NUM"].sum() for array in lexical_arrays(nlp, texts))
+    print(f"Arrays léxicos: {time.perf_counter() - start:.2f}s ({numbers} números)")
+
+    # Com uma única CPU, a criação dos processos e a cópia dos arrays tornam a versão paralela mais lenta
+    start = time.perf_counter()
+    numbers = sum(as_columns(array)["LIKE_NUM"].sum() for array in lexical_arrays_parallel("pt", texts))
+    print(f"Arrays léxicos em {os.cpu_count()} processos: {time.perf_counter() - start:.2f}s ({numbers} números)")
@@ -0,0 +1,176 @@
+"""
+Ligação de entidades em lote
+
+No capítulo 3, as propriedades extendidas wikipedia_url e capital são calculadas por funções getter:
+
+def get_wikipedia_url(span):
+    if span.label_ in ("PERSON", "ORG", "GPE", "LOCATION", "PER"):
+        entity_text = span.text.replace(" ", "_")
+        return "https://en.wikipedia.org/w/index.php?search=" + entity_text
+
+get_capital = lambda span: CAPITALS.get(span.text)
+
+A função getter é executada toda vez que o atributo é lido. Em laços que leem os mesmos atributos muitas vezes, a
+mesma substituição de strings e as mesmas consultas ao dicionário são refeitas a cada acesso.
+
+Este componente resolve todas as entidades de doc.ents de uma só vez, logo após o identificador de entidades (ou um
+componente baseado em regras, como o countries_components), consultando uma tabela de conhecimento carregada uma
+única vez. Os resultados são armazenados nas próprias entidades:
+
+    ent._.wikipedia_url: endereço de busca na Wikipedia
+    ent._.capital: capital do país, se houver
+    ent._.iso_code: código ISO do país, se houver (também disponível em ent.kb_id_)
+
+As consultas são memorizadas em um cache LRU indexado pelo texto e rótulo da entidade, já que os mesmos nomes se
+repetem em muitos documentos.
+
+nlp.add_pipe("entity_table_linker", after="ner", config={"table_path": "knowledge.json"})
+
+O arquivo da tabela é um JSON que mapeia o texto da entidade para seus dados:
+
+{"Espanha": {"capital": "Madrid", "iso_code": "ES"}, ...}
+"""
+
+import json
+from functools import lru_cache
+
+from spacy.language import Language
+from spacy.tokens import Span
+
+WIKIPEDIA_SEARCH_URL = "https://en.wikipedia.org/w/index.php?search="
+
+EXTENSIONS = ("wikipedia_url", "capital", "iso_code")
+
+
+def load_knowledge_table(path):
+    """
+    Carrega a tabela de conhecimento de um arquivo JSON.
+
+    Args:
+        path (str): Caminho de um arquivo JSON que mapeia o texto da entidade para um dicionário com as chaves
+            opcionais "capital", "iso_code" e "slug".
+
+    Returns:
+        dict: A tabela de conhecimento.
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.loads(file.read())
+
+
+def register_extensions():
+    """
+    Registra as extensões de atributo usadas pelo componente, sem substituir extensões já registradas.
+
+    Uma extensão de atributo com o mesmo nome (criada com default) é reaproveitada. Uma extensão com getter ou método,
+    como as do capítulo 3, gera um erro: o componente não pode gravar valores nela.
+    """
+    for name in EXTENSIONS:
+        if not Span.has_extension(name):
+            Span.set_extension(name, default=None)
+            continue
+        _, method, getter, _ = Span.get_extension(name)
+        if method is not None or getter is not None:
+            raise ValueError(
+                f"A extensão Span._.{name} já está registrada com um getter ou método. O componente "
+                f"entity_table_linker precisa de uma extensão de atributo: remova a existente com "
+                f"Span.remove_extension('{name}') antes de adicionar o componente"
+            )
+
+
+class EntityTableLinker:
+    """
+    Componente que resolve todas as entidades do documento em uma única passada.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        name (str): O nome do componente no fluxo de processamento.
+        labels (list): Rótulos das entidades que recebem o endereço da Wikipedia.
+        table_path (str, opcional): Caminho da tabela de conhecimento em JSON.
+        cache_size (int): Quantidade de textos de entidades memorizados no cache LRU.
+    """
+
+    def __init__(self, nlp, name, labels, table_path, cache_size):
+        self.name = name
+        self.labels = set(labels)
+        self.table = load_knowledge_table(table_path) if table_path else {}
+        self.cache_size = cache_size
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+        register_extensions()
+
+    def add_entries(self, entries):
+        """Adiciona entradas à tabela de conhecimento e limpa o cache."""
+        self.table.update(entries)
+        self._resolve_cached.cache_clear()
+
+    def _resolve(self, text, label):
+        entry = self.table.get(text, {})
+        url = None
+        if label in self.labels:
+            slug = entry.get("slug") or text.replace(" ", "_")
+            url = WIKIPEDIA_SEARCH_URL + slug
+        return url, entry.get("capital"), entry.get("iso_code")
+
+    def __call__(self, doc):
+        ents = []
+        for ent in doc.ents:
+            url, capital, iso_code = self._resolve_cached(ent.text, ent.label_)
+            if iso_code and not ent.kb_id_:
+                ent = Span(doc, ent.start, ent.end, label=ent.label, kb_id=iso_code)
+            ents.append((ent, url, capital, iso_code))
+        if any(ent.kb_id_ for ent, *_ in ents):
+            doc.ents = [ent for ent, *_ in ents]
+        # Os valores das extensões ficam associados ao início e fim da partição
+        for ent, url, capital, iso_code in ents:
+            ent._.wikipedia_url = url
+            ent._.capital = capital
+            ent._.iso_code = iso_code
+        return doc
+
+    def cache_info(self):
+        """Retorna as estatísticas do cache LRU (acertos, falhas, tamanho)."""
+        return self._resolve_cached.cache_info()
+
+
+@Language.factory(
+    "entity_table_linker",
+    default_config={
+        "labels": ["PERSON", "ORG", "GPE", "LOCATION", "PER", "LOC"],
+        "table_path": None,
+        "cache_size": 4096,
+    },
+)
+def create_entity_table_linker(nlp, name, labels, table_path, cache_size):
+    return EntityTableLinker(nlp, name, labels, table_path, cache_size)
+
+
+if __name__ == "__main__":
+    import spacy
+
+    nlp = spacy.blank("pt")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [
+            {"label": "GPE", "pattern": "República Tcheca"},
+            {"label": "GPE", "pattern": "Eslováquia"},
+            {"label": "PER", "pattern": "David Bowie"},
+        ]
+    )
+    linker = nlp.add_pipe("entity_table_linker")
+    linker.add_entries(
+        {
+            "República Tcheca": {"capital": "Praga", "iso_code": "CZ"},
+            "Eslováquia": {"capital": "Bratislava", "iso_code": "SK"},
+        }
+    )
+
+    doc = nlp("A República Tcheca e a Eslováquia ouviam David Bowie.")
+    for ent in doc.ents:
+        print(ent.text, ent.label_, ent.kb_id_, ent._.capital, ent._.wikipedia_url)
+    print(linker.cache_info())
+    """
+    Saída:
+    República Tcheca GPE CZ Praga https://en.wikipedia.org/w/index.php?search=República_Tcheca
+    Eslováquia GPE SK Bratislava https://en.wikipedia.org/w/index.php?search=Eslováquia
+    David Bowie PER  None https://en.wikipedia.org/w/index.php?search=David_Bowie
+    CacheInfo(hits=0, misses=3, maxsize=4096, currsize=3)
+    """
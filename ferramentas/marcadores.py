@@ -0,0 +1,184 @@
+"""
+Tabela de marcadores com explicações
+
+O capítulo 1 chama spacy.explain para cada marcador:
+
+print(spacy.explain("PROPN"))
+print(spacy.explain("GPE"))
+
+Cada chamada consulta o glossário da spaCy. Em um relatório que mostra a explicação de cada token de um documento
+grande, são milhares de chamadas para os mesmos poucos marcadores.
+
+A LabelTable é montada uma única vez por fluxo de processamento, com todos os marcadores que ele pode prever:
+
+    - POS: as classes gramaticais universais
+    - DEP: os termos sintáticos do analisador sintático (parser)
+    - ENT: os tipos de entidades do identificador de entidades (ner)
+
+Cada marcador é indexado pelo seu código hash (o mesmo valor retornado por token.pos, token.dep e token.ent_type, e
+pelas colunas de doc.to_array), junto com a sua explicação e a quantidade de vezes em que foi encontrado nos documentos
+contados. As explicações de uma coluna inteira de doc.to_array são obtidas com uma única consulta por marcador
+diferente.
+
+table = get_label_table(nlp)
+print(table.explain(token.pos))
+explanations = table.explanations(doc.to_array("DEP"))
+"""
+
+import weakref
+
+import numpy
+import spacy
+from spacy.attrs import IDS as ATTR_IDS
+from spacy.parts_of_speech import IDS as POS_IDS
+
+LABEL_KINDS = {"POS": "POS", "DEP": "DEP", "ENT": "ENT_TYPE"}
+
+PIPE_LABELS = {"DEP": ["parser"], "ENT": ["ner"]}
+
+
+class LabelTable:
+    """
+    Os marcadores de um fluxo de processamento, indexados pelo código hash.
+
+    Args:
+        nlp (Language): O objeto nlp.
+    """
+
+    def __init__(self, nlp):
+        self.strings = nlp.vocab.strings
+        self.entries = {}
+        for label in POS_IDS:
+            if label:
+                self.add("POS", label)
+        for kind, pipe_names in PIPE_LABELS.items():
+            for pipe_name in pipe_names:
+                if nlp.has_pipe(pipe_name):
+                    for label in nlp.get_pipe(pipe_name).labels:
+                        self.add(kind, label)
+        if nlp.has_pipe("parser"):
+            self.add("DEP", "ROOT")
+
+    def add(self, kind, label):
+        """
+        Adiciona um marcador à tabela, se ele ainda não estiver nela.
+
+        Returns:
+            dict: A entrada do marcador, com kind, label, id, explanation e count.
+        """
+        key = self.strings.add(label)
+        if key not in self.entries:
+            self.entries[key] = {
+                "kind": kind,
+                "label": label,
+                "id": key,
+                "explanation": spacy.explain(label),
+                "count": 0,
+            }
+        return self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        """Retorna a entrada de um marcador a partir do código hash (int) ou do texto."""
+        if isinstance(key, str):
+            key = self.strings[key]
+        return self.entries[key]
+
+    def labels(self, kind):
+        """Retorna as entradas de um tipo de marcador (POS, DEP ou ENT), na ordem em que foram adicionadas."""
+        return [entry for entry in self.entries.values() if entry["kind"] == kind]
+
+    def explain(self, key):
+        """Retorna a explicação de um marcador, como spacy.explain, mas a partir do código hash."""
+        if not key:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            # Marcador que o fluxo não prevê (por exemplo, de um documento criado manualmente)
+            return spacy.explain(self.strings[key])
+        return entry["explanation"]
+
+    def explanations(self, keys):
+        """
+        Retorna a explicação de cada código hash de um array, consultando a tabela uma vez por marcador diferente.
+
+        Args:
+            keys (numpy.ndarray): Os códigos hash, por exemplo uma coluna de doc.to_array.
+
+        Returns:
+            list: As explicações, na ordem do array (None para o código 0 e para marcadores sem explicação).
+        """
+        unique, inverse = numpy.unique(numpy.asarray(keys, dtype=numpy.uint64), return_inverse=True)
+        explained = [self.explain(key) for key in unique.tolist()]
+        return [explained[i] for i in inverse.ravel().tolist()]
+
+    def count(self, docs, kinds=tuple(LABEL_KINDS)):
+        """
+        Conta os marcadores dos documentos, lendo cada documento com um único doc.to_array.
+
+        Marcadores encontrados que ainda não estão na tabela são adicionados.
+
+        Args:
+            docs (iterable): Os documentos processados.
+            kinds (tuple, opcional): Os tipos de marcadores contados. Padrão: POS, DEP e ENT
+        """
+        attr_ids = [ATTR_IDS[LABEL_KINDS[kind]] for kind in kinds]
+        for doc in docs:
+            array = doc.to_array(attr_ids).reshape(len(doc), len(attr_ids))
+            for column, kind in enumerate(kinds):
+                keys, counts = numpy.unique(array[:, column], return_counts=True)
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    if key:
+                        entry = self.entries.get(key) or self.add(kind, self.strings[key])
+                        entry["count"] += count
+
+    def reset_counts(self):
+        """Zera as contagens de todos os marcadores."""
+        for entry in self.entries.values():
+            entry["count"] = 0
+
+
+_TABLES = weakref.WeakKeyDictionary()
+
+
+def get_label_table(nlp):
+    """Retorna a tabela de marcadores do fluxo de processamento, montando-a apenas na primeira chamada."""
+    table = _TABLES.get(nlp)
+    if table is None:
+        table = _TABLES[nlp] = LabelTable(nlp)
+    return table
+
+
+if __name__ == "__main__":
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("pt")
+    nlp.add_pipe("parser")
+    nlp.add_pipe("ner")
+    nlp.get_pipe("parser").add_label("nsubj")
+    nlp.get_pipe("ner").add_label("GPE")
+
+    doc = Doc(
+        nlp.vocab,
+        words=["O", "Palmeiras", "não", "tem", "mundial", "."],
+        pos=["DET", "PROPN", "ADV", "VERB", "ADJ", "PUNCT"],
+        deps=["det", "nsubj", "advmod", "ROOT", "obj", "punct"],
+        heads=[1, 3, 3, 3, 3, 3],
+        ents=["O", "B-ORG", "O", "O", "O", "O"],
+    )
+    table = get_label_table(nlp)
+    table.count([doc])
+    print(table.explain(doc[1].pos))
+    print(table.explanations(doc.to_array("DEP")))
+    print([(entry["label"], entry["count"]) for entry in table.labels("ENT")])
+    """
+    Saída:
+    proper noun
+    ['determiner', 'nominal subject', 'adverbial modifier', 'root', 'object', 'punctuation']
+    [('GPE', 0), ('ORG', 1)]
+    """
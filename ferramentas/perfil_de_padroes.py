@@ -0,0 +1,188 @@
+"""
+Diagnóstico de expressões com operadores
+
+Operadores e quantificadores dão poder às expressões, mas têm um custo. Uma expressão como
+
+[{"TEXT": "muito", "OP": "+"}, {"TEXT": "feliz"}]
+
+mantém uma correspondência parcial aberta para cada "muito" consecutivo, e a expressão ADJ_NOUN_PATTERN do capítulo 1,
+com dois tokens opcionais, equivale a quatro expressões diferentes. Em documentos longos, uma única regra ruim pode
+gerar uma quantidade de correspondências parciais que cresce mais rápido que o tamanho do documento.
+
+Este módulo executa cada expressão isoladamente em documentos de tamanhos crescentes e mede:
+
+    - o tempo de execução de cada expressão
+    - o número de estados intermediários: as correspondências parciais de cada prefixo da expressão
+      (o Matcher não expõe seus estados internos, então contamos as correspondências de pattern[:1], pattern[:2], ...)
+    - o expoente de crescimento do tempo e dos estados em relação ao tamanho do documento
+      (1 significa crescimento linear; valores bem maiores indicam crescimento super-linear)
+
+Expressões com crescimento super-linear são marcadas e recebem sugestões, como usar greedy="LONGEST" ou reescrever os
+tokens opcionais como expressões separadas.
+
+report = profile_patterns(docs, {"VERY_HAPPY": [[{"TEXT": "muito", "OP": "+"}, {"TEXT": "feliz"}]]})
+print_profile_report(report)
+"""
+
+import time
+
+import numpy
+from spacy.matcher import Matcher
+from spacy.tokens import Doc
+
+REPEATING_OPS = {"+", "*"}
+
+
+def scaled_docs(docs, sizes):
+    """
+    Cria documentos de tamanhos crescentes a partir dos documentos de exemplo.
+
+    Os documentos de exemplo são combinados em um único documento longo (repetindo-os se necessário) e cada
+    documento retornado é um prefixo dele. Assim, sequências longas (como muitos "muito" seguidos) crescem junto com
+    o documento, e é nelas que o custo super-linear aparece.
+
+    Args:
+        docs (list): Os documentos de exemplo.
+        sizes (list): O tamanho de cada documento, em múltiplos do tamanho total dos documentos de exemplo.
+    """
+    total = sum(len(doc) for doc in docs)
+    repeats = int(numpy.ceil(max(sizes)))
+    combined = Doc.from_docs([doc for _ in range(repeats) for doc in docs])
+    return [combined[: max(1, int(total * size))].as_doc() for size in sizes]
+
+
+def suggest(pattern, greedy, exponent, threshold):
+    """Retorna sugestões de reformulação para uma expressão."""
+    suggestions = []
+    ops = [token.get("OP") for token in pattern]
+    if any(op in REPEATING_OPS for op in ops) and not greedy:
+        suggestions.append('use greedy="LONGEST" para manter apenas a correspondência mais longa')
+    optional = sum(op == "?" for op in ops)
+    if optional >= 2:
+        suggestions.append(
+            f"os {optional} tokens opcionais equivalem a {2**optional} expressões: "
+            "considere adicioná-las separadamente, sem operadores"
+        )
+    if ops and (ops[0] in REPEATING_OPS or ops[-1] in REPEATING_OPS):
+        suggestions.append("evite começar ou terminar a expressão com + ou *: ancore-a em um token fixo")
+    for token, op in zip(pattern, ops):
+        if op in REPEATING_OPS and set(token) == {"OP"}:
+            suggestions.append("um token curinga ({}) com + ou * corresponde a qualquer sequência: limite-o")
+            break
+    if exponent > threshold and not suggestions:
+        suggestions.append("o custo cresce mais rápido que o documento: revise as condições da expressão")
+    return suggestions
+
+
+def _growth(lengths, values):
+    values = numpy.maximum(numpy.asarray(values, dtype=float), 1e-9)
+    return float(numpy.polyfit(numpy.log(lengths), numpy.log(values), 1)[0])
+
+
+def profile_pattern(vocab, docs, label, pattern, greedy=None, repeat=3, threshold=1.3):
+    """
+    Mede o custo de uma expressão em documentos de tamanhos diferentes.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+        docs (list): Documentos de tamanhos crescentes (veja scaled_docs).
+        label (str): O identificador da expressão.
+        pattern (list): A expressão.
+        greedy (str, opcional): O parâmetro greedy da expressão.
+        repeat (int, opcional): Quantas vezes cada medida é repetida (vale a menor). Padrão: 3
+        threshold (float, opcional): Expoente a partir do qual o crescimento é considerado super-linear. Padrão: 1.3
+
+    Returns:
+        dict: O tempo, os estados e as correspondências por tamanho de documento, os expoentes e as sugestões.
+    """
+    matcher = Matcher(vocab)
+    matcher.add(label, [pattern], greedy=greedy)
+    prefixes = []
+    for size in range(1, len(pattern)):
+        prefix = Matcher(vocab)
+        prefix.add(label, [pattern[:size]])
+        prefixes.append(prefix)
+
+    lengths, seconds, states, matches = [], [], [], []
+    for doc in docs:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = matcher(doc)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        lengths.append(len(doc))
+        seconds.append(best)
+        matches.append(len(found))
+        states.append(sum(len(prefix(doc)) for prefix in prefixes) + len(found))
+
+    time_exponent = _growth(lengths, seconds)
+    states_exponent = _growth(lengths, states) if any(states) else 0.0
+    exponent = max(time_exponent, states_exponent)
+    return {
+        "label": label,
+        "pattern": pattern,
+        "greedy": greedy,
+        "lengths": lengths,
+        "seconds": seconds,
+        "states": states,
+        "matches": matches,
+        "time_exponent": time_exponent,
+        "states_exponent": states_exponent,
+        "flagged": exponent > threshold,
+        "suggestions": suggest(pattern, greedy, exponent, threshold),
+    }
+
+
+def profile_patterns(docs, patterns, sizes=(0.125, 0.25, 0.5, 1, 2, 4), greedy=None, repeat=3, threshold=1.3):
+    """
+    Mede o custo de todas as expressões em documentos de tamanhos crescentes.
+
+    Args:
+        docs (list): Documentos de exemplo, já processados pelo fluxo que será usado com o Comparador.
+        patterns (dict): Mapeia o identificador para a lista de expressões, como no matcher.add.
+        sizes (list, opcional): Os tamanhos dos documentos medidos, em múltiplos do tamanho dos exemplos.
+        greedy (dict, opcional): Mapeia o identificador para o parâmetro greedy.
+        repeat (int, opcional): Quantas vezes cada medida é repetida. Padrão: 3
+        threshold (float, opcional): Expoente a partir do qual o crescimento é super-linear. Padrão: 1.3
+
+    Returns:
+        list: Um relatório por expressão, as mais lentas primeiro.
+    """
+    greedy = greedy or {}
+    scaled = scaled_docs(docs, sizes)
+    vocab = docs[0].vocab
+    report = []
+    for label, label_patterns in patterns.items():
+        for pattern in label_patterns:
+            report.append(
+                profile_pattern(vocab, scaled, label, pattern, greedy.get(label), repeat, threshold)
+            )
+    report.sort(key=lambda result: result["seconds"][-1], reverse=True)
+    return report
+
+
+def print_profile_report(report):
+    """Imprime o relatório das expressões, destacando as que crescem de forma super-linear."""
+    for result in report:
+        flag = "⚠️ " if result["flagged"] else ""
+        print(
+            f"{flag}{result['label']}: {result['seconds'][-1] * 1000:.2f} ms em {result['lengths'][-1]} tokens, "
+            f"{result['states'][-1]} estados, {result['matches'][-1]} correspondências "
+            f"(expoente tempo={result['time_exponent']:.2f}, estados={result['states_exponent']:.2f})"
+        )
+        for suggestion in result["suggestions"]:
+            print(f"    - {suggestion}")
+
+
+if __name__ == "__main__":
+    import spacy
+
+    nlp = spacy.blank("pt")
+    # Um documento com uma sequência longa de "muito": o pior caso para o operador +
+    docs = [nlp("Eu estou " + "muito " * 400 + "feliz.")]
+    patterns = {
+        "VERY_HAPPY": [[{"TEXT": "muito", "OP": "+"}, {"TEXT": "feliz"}]],
+        "MUITO_FELIZ": [[{"TEXT": "muito"}, {"TEXT": "feliz"}]],
+    }
+    print_profile_report(profile_patterns(docs, patterns))
@@ -0,0 +1,123 @@
+"""
+Configurações predefinidas de fluxos de processamento
+
+Os roteiros do capítulo 3 carregam o pacote completo com spacy.load("pt_core_news_sm") várias vezes, recebendo sempre
+todos os componentes:
+
+['tok2vec', 'morphologizer', 'parser', 'lemmatizer', 'attribute_ruler', 'ner']
+
+Muitas tarefas usam só uma parte desse fluxo. Para usar o Comparador com texto e atributos léxicos basta o
+toquenizador; para usar classes gramaticais e lemas não precisamos do analisador sintático nem do identificador de
+entidades. O parâmetro exclude do spacy.load evita que esses componentes sejam carregados.
+
+-----------------------------------------------------------------------------------------------------------------------
+Predefinição | Pacote            | Componentes carregados
+-----------------------------------------------------------------------------------------------------------------------
+tokenize     | pt_core_news_sm   | nenhum (apenas o toquenizador)
+-----------------------------------------------------------------------------------------------------------------------
+match        | pt_core_news_sm   | tok2vec, morphologizer, lemmatizer, attribute_ruler
+-----------------------------------------------------------------------------------------------------------------------
+ner          | pt_core_news_sm   | tok2vec, ner
+-----------------------------------------------------------------------------------------------------------------------
+full         | pt_core_news_sm   | todos
+-----------------------------------------------------------------------------------------------------------------------
+vectors      | pt_core_news_md   | nenhum (apenas o toquenizador e os vetores do vocabulário)
+-----------------------------------------------------------------------------------------------------------------------
+
+Cada predefinição é carregada uma única vez por processo, através do registro de modelos, e o mesmo objeto nlp é
+compartilhado entre todos que a pedirem. O tempo de carregamento e o aumento da memória residente (RSS) de cada
+predefinição ficam registrados e podem ser consultados com preset_report().
+
+nlp = load_preset("match")
+"""
+
+import resource
+import threading
+import time
+
+from ferramentas.registro_de_modelos import get_model
+
+PIPELINE = ["tok2vec", "morphologizer", "parser", "lemmatizer", "attribute_ruler", "ner"]
+
+PRESETS = {
+    "tokenize": {"model": "pt_core_news_sm", "exclude": PIPELINE},
+    "match": {"model": "pt_core_news_sm", "exclude": ["parser", "ner"]},
+    "ner": {
+        "model": "pt_core_news_sm",
+        "exclude": ["morphologizer", "parser", "lemmatizer", "attribute_ruler"],
+    },
+    "full": {"model": "pt_core_news_sm", "exclude": []},
+    "vectors": {"model": "pt_core_news_md", "exclude": PIPELINE},
+}
+
+_LOADED = {}
+_STATS = {}
+_LOCK = threading.Lock()
+
+
+def rss_mb():
+    """Retorna a memória residente (RSS) atual do processo em megabytes."""
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        # Fora do Linux usamos o pico de memória (em kilobytes no Linux, em bytes no macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def load_preset(name):
+    """
+    Carrega uma predefinição, ou retorna o objeto nlp já carregado neste processo.
+
+    Args:
+        name (str): O nome da predefinição: tokenize, match, ner, full ou vectors.
+
+    Returns:
+        Language: O objeto nlp compartilhado.
+    """
+    if name not in PRESETS:
+        raise KeyError(f"Predefinição '{name}' não existe. Use uma destas: {', '.join(PRESETS)}")
+    with _LOCK:
+        if name not in _LOADED:
+            preset = PRESETS[name]
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            nlp = get_model(preset["model"], exclude=preset["exclude"])
+            _STATS[name] = {
+                "model": preset["model"],
+                "pipe_names": nlp.pipe_names,
+                "seconds": time.perf_counter() - start,
+                "rss_mb": rss_mb() - rss_before,
+            }
+            _LOADED[name] = nlp
+        return _LOADED[name]
+
+
+def preset_report():
+    """
+    Retorna o tempo de carregamento e o aumento de memória de cada predefinição carregada neste processo.
+
+    Returns:
+        dict: Para cada predefinição, o pacote, os componentes, os segundos e os megabytes de RSS.
+    """
+    return {name: dict(stats) for name, stats in _STATS.items()}
+
+
+def print_preset_report():
+    """Imprime o relatório de carregamento das predefinições."""
+    print(f"{'Predefinição':<13}| {'Pacote':<16}| {'Tempo (s)':>9} | {'RSS (MB)':>8} | Componentes")
+    for name, stats in preset_report().items():
+        print(
+            f"{name:<13}| {stats['model']:<16}| {stats['seconds']:>9.2f} | "
+            f"{stats['rss_mb']:>8.1f} | {stats['pipe_names']}"
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Carregar as predefinições passadas como argumento, ou todas
+    for name in sys.argv[1:] or PRESETS:
+        load_preset(name)
+    print_preset_report()
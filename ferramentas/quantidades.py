@@ -0,0 +1,238 @@
+"""
+Extração de quantidades: percentuais, valores monetários e anos
+
+O capítulo 1 encontra percentuais percorrendo os tokens em Python:
+
+for token in doc:
+    if token.like_num:
+        next_token = doc[token.i + 1]
+        if next_token.text == "%":
+            print(f"Percentuais encontrados: {token.text}")
+
+Além de lento em grandes volumes de texto, esse laço gera um IndexError quando o documento termina com um número.
+
+Este componente obtém os atributos de todos os tokens de uma só vez com doc.to_array([LIKE_NUM, ORTH, ...]) e compara
+cada token com os seus vizinhos usando arrays deslocados, sem laços em Python:
+
+    - PERCENT: um número seguido de "%" ou de "por cento" (60%, 4 %, cinco por cento)
+    - MONEY: um símbolo de moeda seguido de um número, com "mil", "milhões", "bilhões"... opcionais (R$ 71,00, U$1 bilhão)
+    - YEAR: um número de quatro dígitos entre 1000 e 2100 que não faça parte das quantidades acima (2024). Os anos
+      são identificados comparando o código hash do token com os códigos de "1000" a "2100", sem converter o texto
+
+Os números são convertidos para float no formato brasileiro, com vírgula decimal e ponto separador de milhares
+("1.234,56" -> 1234.56). As quantidades ficam em doc.spans["quantities"], e cada partição tem as extensões tipadas
+quantity_value (float) e currency (o símbolo da moeda).
+
+nlp.add_pipe("quantity_extractor")
+doc = nlp("Em 1990, mais de 60% da população vivia na pobreza. Agora, menos de 4%.")
+for span in doc.spans["quantities"]:
+    print(span.text, span.label_, span._.quantity_value)
+"""
+
+import numpy
+from spacy.attrs import LIKE_NUM, LOWER, ORTH
+from spacy.language import Language
+from spacy.strings import get_string_id
+from spacy.tokens import Span
+
+from ferramentas.extensoes_colunares import set_column, set_typed_extension
+
+CURRENCIES = ["R$", "US$", "U$", "$", "€", "£"]
+
+YEARS = range(1000, 2101)
+
+SCALES = {
+    "mil": 1e3,
+    "milhão": 1e6,
+    "milhões": 1e6,
+    "bilhão": 1e9,
+    "bilhões": 1e9,
+    "trilhão": 1e12,
+    "trilhões": 1e12,
+}
+
+NUMBER_WORDS = {
+    "zero": 0,
+    "um": 1,
+    "uma": 1,
+    "dois": 2,
+    "duas": 2,
+    "três": 3,
+    "quatro": 4,
+    "cinco": 5,
+    "seis": 6,
+    "sete": 7,
+    "oito": 8,
+    "nove": 9,
+    "dez": 10,
+    "onze": 11,
+    "doze": 12,
+    "treze": 13,
+    "catorze": 14,
+    "quatorze": 14,
+    "quinze": 15,
+    "dezesseis": 16,
+    "dezessete": 17,
+    "dezoito": 18,
+    "dezenove": 19,
+    "vinte": 20,
+    "trinta": 30,
+    "quarenta": 40,
+    "cinquenta": 50,
+    "sessenta": 60,
+    "setenta": 70,
+    "oitenta": 80,
+    "noventa": 90,
+    "cem": 100,
+    "mil": 1000,
+}
+
+
+def parse_number(text):
+    """
+    Converte um número escrito no formato brasileiro para float.
+
+    "71,00" -> 71.0, "1.234,56" -> 1234.56, "1.000.000" -> 1000000.0, "3.5" -> 3.5, "dez" -> 10.0
+
+    Args:
+        text (str): O texto do token.
+
+    Returns:
+        float: O valor, ou None se o texto não puder ser convertido.
+    """
+    text = text.strip().lower()
+    if text in NUMBER_WORDS:
+        return float(NUMBER_WORDS[text])
+    if "," in text:
+        # Vírgula decimal: os pontos separam os milhares
+        text = text.replace(".", "").replace(",", ".")
+    elif text.count(".") > 1 or (
+        "." in text and len(text.rsplit(".", 1)[1]) == 3 and text.split(".")[0] != "0"
+    ):
+        # "1.000" e "1.000.000": pontos separando milhares
+        text = text.replace(".", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _shift(array, offset, fill=0):
+    """Retorna o array deslocado: o elemento i passa a ser array[i + offset], completando com fill."""
+    shifted = numpy.full_like(array, fill)
+    if offset > 0:
+        shifted[:-offset] = array[offset:]
+    elif offset < 0:
+        shifted[-offset:] = array[:offset]
+    else:
+        shifted[:] = array
+    return shifted
+
+
+class QuantityExtractor:
+    """
+    Componente que identifica percentuais, valores monetários e anos.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        name (str): O nome do componente no fluxo de processamento.
+        span_key (str): A chave de doc.spans onde as quantidades são armazenadas.
+    """
+
+    def __init__(self, nlp, name, span_key):
+        self.name = name
+        self.span_key = span_key
+        strings = nlp.vocab.strings
+        self.percent = strings.add("%")
+        self.por = strings.add("por")
+        self.cento = strings.add("cento")
+        self.currencies = numpy.array([strings.add(c) for c in CURRENCIES], dtype=numpy.uint64)
+        self.scales = numpy.array([strings.add(s) for s in SCALES], dtype=numpy.uint64)
+        # Apenas os códigos hash: os textos dos anos não precisam ser guardados no vocabulário
+        self.years = numpy.array([get_string_id(str(year)) for year in YEARS], dtype=numpy.uint64)
+        set_typed_extension(Span, "quantity_value", "float", force=True)
+        set_typed_extension(Span, "currency", "enum", categories=CURRENCIES, force=True)
+
+    def find(self, doc):
+        """
+        Retorna as quantidades do documento como uma lista de tuplas (rótulo, início, fim, posição do número).
+        """
+        if not len(doc):
+            return []
+        array = doc.to_array([LIKE_NUM, ORTH, LOWER]).reshape(len(doc), 3)
+        like_num = array[:, 0].astype(bool)
+        orth, lower = array[:, 1], array[:, 2]
+
+        # Número seguido de "%", ou de "por cento"
+        percent_symbol = like_num & (_shift(orth, 1) == self.percent)
+        percent_words = like_num & (_shift(lower, 1) == self.por) & (_shift(lower, 2) == self.cento)
+        # Símbolo de moeda seguido de um número, e opcionalmente de uma escala
+        money = numpy.isin(orth, self.currencies) & _shift(like_num, 1, False)
+        money_scale = money & numpy.isin(_shift(lower, 2), self.scales)
+
+        used = numpy.zeros(len(doc), dtype=bool)
+        found = []
+        for i in numpy.flatnonzero(percent_symbol | percent_words).tolist():
+            end = i + 2 if percent_symbol[i] else i + 3
+            found.append(("PERCENT", i, end, i))
+            used[i:end] = True
+        for i in numpy.flatnonzero(money).tolist():
+            end = i + 3 if money_scale[i] else i + 2
+            found.append(("MONEY", i, end, i + 1))
+            used[i:end] = True
+
+        # Anos: o texto do token é um dos anos, fora das quantidades acima
+        for i in numpy.flatnonzero(numpy.isin(orth, self.years) & ~used).tolist():
+            found.append(("YEAR", i, i + 1, i))
+        found.sort(key=lambda quantity: quantity[1])
+        return found
+
+    def __call__(self, doc):
+        found = self.find(doc)
+        spans, values, currencies = [], [], []
+        for label, start, end, number in found:
+            value = parse_number(doc[number].text)
+            currency = None
+            if label == "MONEY":
+                currency = doc[start].text
+                scale = SCALES.get(doc[end - 1].lower_) if end - start == 3 else None
+                if value is not None and scale:
+                    value *= scale
+            spans.append(Span(doc, start, end, label=label))
+            values.append(value if value is not None else numpy.nan)
+            currencies.append(currency)
+        doc.spans[self.span_key] = spans
+        bounds = [(span.start, span.end) for span in spans]
+        set_column(doc, "quantity_value", values, level="span", spans=bounds)
+        set_column(doc, "currency", currencies, level="span", spans=bounds)
+        return doc
+
+
+@Language.factory("quantity_extractor", default_config={"span_key": "quantities"})
+def create_quantity_extractor(nlp, name, span_key):
+    return QuantityExtractor(nlp, name, span_key)
+
+
+if __name__ == "__main__":
+    import spacy
+
+    nlp = spacy.blank("pt")
+    nlp.add_pipe("quantity_extractor")
+
+    doc = nlp(
+        "Em 1990, mais de 60% da população da Ásia Oriental estava em situação de extrema pobreza. "
+        "Agora, menos de 4% está nessa situação. O preço médio da picanha em 2024 foi de R$ 71,00 "
+        "e a empresa captou U$1 bilhão, cinco por cento a mais que 2"
+    )
+    for span in doc.spans["quantities"]:
+        print(span.text, span.label_, span._.quantity_value, span._.currency)
+    """
+    Saída:
+    1990 YEAR 1990.0 None
+    60% PERCENT 60.0 None
+    4% PERCENT 4.0 None
+    2024 YEAR 2024.0 None
+    R$ 71,00 MONEY 71.0 R$
+    U$1 bilhão MONEY 1000000000.0 U$
+    cinco por cento PERCENT 5.0 None
+    """
@@ -0,0 +1,116 @@
+"""
+Registro compartilhado de modelos
+
+Quase todos os roteiros chamam spacy.load ao serem importados, às vezes mais de uma vez para o mesmo pacote.
+Cada chamada lê os pesos do disco e cria um novo vocabulário: um processo que importa três módulos paga três
+carregamentos de alguns segundos e guarda três cópias do mesmo modelo na memória.
+
+O registro carrega cada pacote uma única vez por processo e entrega sempre o mesmo objeto nlp:
+
+nlp = get_model("pt_core_news_md")
+
+Se precisarmos adicionar componentes sem alterar o objeto compartilhado, podemos criar uma cópia barata: um novo
+objeto nlp que usa o mesmo vocabulário, o mesmo toquenizador e os mesmos componentes (sem copiar os pesos), ao qual
+podemos adicionar novos componentes.
+
+nlp = copy_pipeline("pt_core_news_sm")
+nlp.add_pipe("custom_component", first=True)
+
+Para servidores com vários processos, carregue os modelos no processo principal com prefork() antes de criar os
+processos filhos. Com o método "fork", os filhos compartilham as páginas de memória do modelo com o processo principal
+(copy-on-write) em vez de carregar uma cópia cada um.
+
+prefork(["pt_core_news_md"])
+with multiprocessing.get_context("fork").Pool(8) as pool:
+    ...
+"""
+
+import gc
+import threading
+import time
+
+import spacy
+
+_MODELS = {}
+_STATS = {}
+_LOCK = threading.RLock()
+
+
+def _key(name, exclude):
+    return name, tuple(sorted(exclude))
+
+
+def get_model(name, exclude=()):
+    """
+    Retorna o objeto nlp do pacote, carregando-o somente na primeira chamada do processo.
+
+    Args:
+        name (str): O nome do pacote, por exemplo "pt_core_news_sm".
+        exclude (list, opcional): Componentes que não devem ser carregados. Cada combinação de pacote e componentes
+            excluídos é carregada separadamente.
+
+    Returns:
+        Language: O objeto nlp compartilhado.
+    """
+    key = _key(name, exclude)
+    with _LOCK:
+        if key not in _MODELS:
+            start = time.perf_counter()
+            _MODELS[key] = spacy.load(name, exclude=list(exclude))
+            _STATS[key] = {"seconds": time.perf_counter() - start}
+        return _MODELS[key]
+
+
+def copy_pipeline(name, exclude=()):
+    """
+    Cria um novo objeto nlp que reutiliza o vocabulário, o toquenizador e os componentes do modelo compartilhado.
+
+    Os componentes não são copiados: a cópia aponta para os mesmos objetos. Adicionar ou remover componentes da cópia
+    não altera o modelo compartilhado, mas alterar um componente existente (por exemplo, adicionar regras a um
+    entity_ruler) afeta ambos.
+
+    Args:
+        name (str): O nome do pacote.
+        exclude (list, opcional): Componentes excluídos do modelo compartilhado.
+
+    Returns:
+        Language: A cópia do fluxo de processamento.
+    """
+    base = get_model(name, exclude)
+    nlp = spacy.blank(base.lang, vocab=base.vocab)
+    nlp.tokenizer = base.tokenizer
+    for pipe_name in base.pipe_names:
+        nlp.add_pipe(pipe_name, source=base)
+    return nlp
+
+
+def prefork(names):
+    """
+    Carrega os modelos no processo principal e congela os objetos existentes antes de criar processos filhos.
+
+    O gc.freeze() move os objetos já criados para uma geração permanente, evitando que o coletor de lixo dos
+    processos filhos escreva nesses objetos e force a cópia das páginas de memória compartilhadas.
+
+    Args:
+        names (list): Nomes dos pacotes, ou tuplas (nome, componentes excluídos).
+    """
+    for name in names:
+        if isinstance(name, str):
+            get_model(name)
+        else:
+            get_model(*name)
+    gc.freeze()
+
+
+def loaded_models():
+    """
+    Retorna os modelos carregados neste processo e o tempo de carregamento de cada um.
+
+    Returns:
+        dict: Para cada (pacote, componentes excluídos), os componentes carregados e os segundos.
+    """
+    with _LOCK:
+        return {
+            key: {"pipe_names": _MODELS[key].pipe_names, **_STATS[key]}
+            for key in _MODELS
+        }
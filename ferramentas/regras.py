@@ -0,0 +1,231 @@
+"""
+Arquivos de regras para o Comparador
+
+As expressões dos capítulos 1 e 2 (LOVE_CATS, VERY_HAPPY, PATTERN1, PATTERN2, DOWNLOAD_THINGS_PATTERN, ...) são
+escritas diretamente no código. Para incluir ou alterar uma regra é preciso editar o roteiro, e em um serviço isso
+significa publicar uma nova versão e carregar o modelo novamente.
+
+Com este módulo as regras ficam em um arquivo JSONL, uma regra por linha:
+
+{"label": "LOVE_CATS", "pattern": [{"LEMMA": "amar", "POS": "VERB"}, {"LOWER": "gatos"}]}
+{"label": "VERY_HAPPY", "pattern": [{"TEXT": "muito", "OP": "+"}, {"TEXT": "feliz"}], "greedy": "LONGEST"}
+
+    - label: o identificador da expressão (o primeiro argumento do matcher.add)
+    - pattern: a expressão, uma lista de dicionários
+    - greedy (opcional): "FIRST" ou "LONGEST", como no matcher.add
+
+Ao carregar o arquivo, todas as regras são validadas e os erros são informados com o número da linha. Regras
+idênticas são consideradas apenas uma vez e o Comparador é criado uma única vez com todas elas.
+
+O RuleSetMatcher observa o arquivo: quando ele muda, as regras são carregadas e validadas novamente, um novo
+Comparador é criado e só então substitui o anterior. Se o novo arquivo tiver erros, o Comparador anterior continua em
+uso. O objeto nlp não é carregado novamente.
+
+matcher = RuleSetMatcher(nlp.vocab, "capitulo_2/regras.jsonl")
+matches = matcher(doc)
+"""
+
+import json
+import os
+import threading
+
+from spacy.matcher import Matcher
+from spacy.schemas import validate_token_pattern
+
+GREEDY_VALUES = (None, "FIRST", "LONGEST")
+
+
+class RuleError(ValueError):
+    """Erro gerado quando um arquivo de regras contém regras inválidas."""
+
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = errors
+        lines = "\n".join(f"    linha {line}: {error}" for line, error in errors)
+        super().__init__(f"Regras inválidas em {path}:\n{lines}")
+
+
+def validate_rule(rule):
+    """
+    Valida uma regra e retorna a lista de erros encontrados (vazia se a regra for válida).
+
+    Args:
+        rule (dict): A regra com as chaves label, pattern e greedy (opcional).
+    """
+    if not isinstance(rule, dict):
+        return ["a regra deve ser um objeto JSON"]
+    errors = []
+    unknown = set(rule) - {"label", "pattern", "greedy"}
+    if unknown:
+        errors.append(f"chaves desconhecidas: {', '.join(sorted(unknown))}")
+    if not isinstance(rule.get("label"), str) or not rule.get("label"):
+        errors.append("label deve ser uma string não vazia")
+    if rule.get("greedy") not in GREEDY_VALUES:
+        errors.append("greedy deve ser FIRST ou LONGEST")
+    errors.extend(validate_token_pattern(rule.get("pattern")))
+    return errors
+
+
+def read_rules(path):
+    """
+    Lê e valida um arquivo de regras, removendo as regras duplicadas.
+
+    Args:
+        path (str): O caminho do arquivo JSONL.
+
+    Returns:
+        list: As regras válidas, na ordem do arquivo.
+
+    Raises:
+        RuleError: Se alguma linha não for JSON válido ou contiver uma regra inválida.
+    """
+    rules = []
+    seen = set()
+    errors = []
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                rule = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append((line_number, f"JSON inválido: {e}"))
+                continue
+            rule_errors = validate_rule(rule)
+            if rule_errors:
+                errors.extend((line_number, error) for error in rule_errors)
+                continue
+            key = json.dumps(
+                [rule["label"], rule["pattern"], rule.get("greedy")], sort_keys=True
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            rules.append(rule)
+    if errors:
+        raise RuleError(path, errors)
+    return rules
+
+
+def build_matcher(vocab, rules, matcher_factory=Matcher):
+    """
+    Cria um Comparador com todas as regras.
+
+    As regras com o mesmo label e o mesmo greedy são adicionadas com uma única chamada ao matcher.add.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+        rules (list): As regras já validadas.
+        matcher_factory (opcional): A classe do Comparador, por exemplo Matcher ou CompiledMatcher. Padrão: Matcher
+    """
+    grouped = {}
+    for rule in rules:
+        grouped.setdefault((rule["label"], rule.get("greedy")), []).append(rule["pattern"])
+    matcher = matcher_factory(vocab)
+    for (label, greedy), patterns in grouped.items():
+        matcher.add(label, patterns, greedy=greedy)
+    return matcher
+
+
+class RuleSetMatcher:
+    """
+    Comparador criado a partir de um arquivo de regras, recarregado quando o arquivo muda.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+        path (str): O caminho do arquivo JSONL.
+        matcher_factory (opcional): A classe do Comparador. Padrão: Matcher
+    """
+
+    def __init__(self, vocab, path, matcher_factory=Matcher):
+        self.vocab = vocab
+        self.path = path
+        self.matcher_factory = matcher_factory
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._signature = self._file_signature()
+        self.rules = read_rules(path)
+        self.matcher = build_matcher(vocab, self.rules, matcher_factory)
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __call__(self, doc):
+        # Uma única leitura do atributo: a chamada usa sempre um Comparador completo
+        matcher = self.matcher
+        return matcher(doc)
+
+    def reload(self):
+        """
+        Carrega o arquivo novamente e substitui o Comparador.
+
+        Returns:
+            bool: True se o Comparador foi substituído, False se o arquivo contém erros.
+        """
+        with self._lock:
+            signature = self._file_signature()
+            try:
+                rules = read_rules(self.path)
+                matcher = build_matcher(self.vocab, rules, self.matcher_factory)
+            except (OSError, RuleError) as e:
+                self.last_error = e
+                self._signature = signature
+                return False
+            self.rules, self.matcher = rules, matcher
+            self.last_error = None
+            self._signature = signature
+            return True
+
+    def reload_if_changed(self):
+        """Carrega o arquivo novamente se ele mudou desde a última leitura. Retorna True se recarregou."""
+        try:
+            changed = self._file_signature() != self._signature
+        except OSError:
+            return False
+        return changed and self.reload()
+
+    def watch(self, interval=1.0):
+        """Inicia uma thread que verifica o arquivo a cada interval segundos."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=run, name="rule-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """Interrompe a thread que observa o arquivo."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+if __name__ == "__main__":
+    from ferramentas.predefinicoes import load_preset
+
+    # As regras usam classes gramaticais e lemas
+    nlp = load_preset("match")
+    path = os.path.join(os.getcwd(), "capitulo_2", "regras.jsonl")
+    matcher = RuleSetMatcher(nlp.vocab, path)
+    print(f"Regras carregadas: {len(matcher)}")
+
+    doc = nlp("A maioria da roupagem do iOS 11 permanece a mesma que o iOS 10.")
+    for match_id, start, end in matcher(doc):
+        print(nlp.vocab.strings[match_id], doc[start:end].text)
+    """
+    Saída:
+    Regras carregadas: 7
+    IOS_VERSION_PATTERN iOS 11
+    IOS_VERSION_PATTERN iOS 10
+    """
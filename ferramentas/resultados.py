@@ -0,0 +1,190 @@
+"""
+Resultados de correspondências com partições criadas sob demanda
+
+Os exemplos dos capítulos 1 e 2 percorrem as correspondências e criam uma partição para cada uma:
+
+for match_id, start, end in matches:
+    matched_span = doc[start:end]
+    print(f"Correspondências: {matched_span.text}")
+
+Com milhões de correspondências, a maior parte do tempo e da memória vai para a criação de tuplas, objetos Span e
+strings que muitas vezes nem são usados: às vezes só queremos contar as correspondências, filtrar por rótulo ou
+remover as sobrepostas.
+
+O MatchResults guarda os trios (match_id, start, end) em arrays NumPy e permite contar, filtrar e resolver
+sobreposições sem criar partições. As partições e os textos só são criados quando pedidos.
+
+results = MatchResults.from_matcher(matcher, doc)
+print(f"Quantidade de correspondências: {len(results)}")
+for text in results.filter("IOS_VERSION_PATTERN").texts():
+    print(text)
+"""
+
+import numpy
+from spacy.attrs import IDX, LENGTH
+from spacy.tokens import Span
+
+from ferramentas.dependencias import VERB_POS, analyze_spans
+
+
+class MatchResults:
+    """
+    Correspondências de um documento armazenadas em arrays.
+
+    Args:
+        doc (Doc): O documento.
+        match_ids: Os identificadores (hash) das expressões.
+        starts: Os índices dos tokens iniciais.
+        ends: Os índices dos tokens finais (não incluídos).
+    """
+
+    def __init__(self, doc, match_ids, starts, ends):
+        self.doc = doc
+        self.match_ids = numpy.asarray(match_ids, dtype=numpy.uint64)
+        self.starts = numpy.asarray(starts, dtype=numpy.int32)
+        self.ends = numpy.asarray(ends, dtype=numpy.int32)
+
+    @classmethod
+    def from_matches(cls, doc, matches):
+        """Cria os resultados a partir da lista de tuplas (match_id, start, end) retornada pelo Matcher."""
+        if not matches:
+            return cls(doc, [], [], [])
+        array = numpy.array(matches, dtype=numpy.uint64).reshape(-1, 3)
+        return cls(doc, array[:, 0], array[:, 1], array[:, 2])
+
+    @classmethod
+    def from_matcher(cls, matcher, doc):
+        """
+        Executa o Comparador no documento e guarda as correspondências.
+
+        Comparadores que já produzem arrays (como o CompiledMatcher) não criam a lista de tuplas.
+        """
+        if hasattr(matcher, "find_arrays"):
+            return cls(doc, *matcher.find_arrays(doc))
+        return cls.from_matches(doc, matcher(doc))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.match_ids.tolist(), self.starts.tolist(), self.ends.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, numpy.integer)):
+            return int(self.match_ids[key]), int(self.starts[key]), int(self.ends[key])
+        return self.select(key)
+
+    def select(self, selection):
+        """Retorna novos resultados com as correspondências selecionadas por uma máscara, índices ou fatia."""
+        return type(self)(
+            self.doc, self.match_ids[selection], self.starts[selection], self.ends[selection]
+        )
+
+    def _label_ids(self, labels):
+        if isinstance(labels, (str, int)):
+            labels = [labels]
+        strings = self.doc.vocab.strings
+        return numpy.array(
+            [strings[label] if isinstance(label, str) else label for label in labels],
+            dtype=numpy.uint64,
+        )
+
+    def filter(self, labels):
+        """Retorna somente as correspondências com o rótulo (ou um dos rótulos) informado."""
+        return self.select(numpy.isin(self.match_ids, self._label_ids(labels)))
+
+    def label_counts(self):
+        """Retorna um dicionário com a quantidade de correspondências de cada rótulo."""
+        ids, counts = numpy.unique(self.match_ids, return_counts=True)
+        strings = self.doc.vocab.strings
+        return {strings[int(i)]: int(count) for i, count in zip(ids, counts)}
+
+    def lengths(self):
+        """Retorna o número de tokens de cada correspondência."""
+        return self.ends - self.starts
+
+    def filter_overlaps(self):
+        """
+        Remove correspondências sobrepostas, como spacy.util.filter_spans.
+
+        As correspondências mais longas têm prioridade; entre as de mesmo tamanho, a que começa antes.
+        O resultado fica ordenado pelo início.
+
+        As correspondências que não se sobrepõem a nenhuma outra são mantidas sem laço, com uma varredura pelo
+        início. Só as que disputam tokens passam pelo laço em Python: a escolha de cada uma depende das escolhas
+        anteriores, e em cadeias de sobreposições (como as de expressões de pares de palavras vizinhas) uma versão
+        com arrays precisaria de uma rodada para cada correspondência mantida.
+        """
+        order = numpy.lexsort((self.ends, self.starts))
+        starts = self.starts[order]
+        ends = self.ends[order]
+        # Ordenadas pelo início, uma correspondência se sobrepõe a uma anterior se começa antes do maior fim anterior
+        # e a uma seguinte se a próxima começa antes do seu fim
+        conflicts = numpy.zeros(len(order), dtype=bool)
+        conflicts[1:] = starts[1:] < numpy.maximum.accumulate(ends)[:-1]
+        conflicts[:-1] |= starts[1:] < ends[:-1]
+        candidates = order[conflicts]
+        candidates = candidates[numpy.lexsort((self.starts[candidates], -self.lengths()[candidates]))]
+        taken = numpy.zeros(len(self.doc), dtype=bool)
+        keep = [order[~conflicts]]
+        for i, start, end in zip(candidates.tolist(), self.starts[candidates].tolist(), self.ends[candidates].tolist()):
+            if not taken[start:end].any():
+                taken[start:end] = True
+                keep.append([i])
+        keep = numpy.concatenate(keep).astype(numpy.intp)
+        return self.select(keep[numpy.argsort(self.starts[keep], kind="stable")])
+
+    def dependencies(self, verb_pos=VERB_POS):
+        """Retorna a raiz, o token principal, o verbo e o token anterior de cada correspondência (veja dependencias)."""
+        return analyze_spans(self.doc, self.starts, self.ends, verb_pos)
+
+    def span(self, i):
+        """Cria a partição da i-ésima correspondência, com o rótulo da expressão."""
+        match_id, start, end = self[i]
+        return Span(self.doc, start, end, label=match_id)
+
+    def spans(self):
+        """Cria as partições das correspondências, uma de cada vez."""
+        for i in range(len(self)):
+            yield self.span(i)
+
+    def offsets(self):
+        """Retorna dois arrays com as posições dos caracteres de início e fim de cada correspondência."""
+        if not len(self):
+            empty = numpy.empty(0, dtype=numpy.int64)
+            return empty, empty
+        array = self.doc.to_array([IDX, LENGTH]).astype(numpy.int64)
+        start_chars = array[self.starts, 0]
+        end_chars = array[self.ends - 1, 0] + array[self.ends - 1, 1]
+        return start_chars, end_chars
+
+    def texts(self):
+        """Retorna o texto de cada correspondência, uma de cada vez, sem criar partições."""
+        text = self.doc.text
+        start_chars, end_chars = self.offsets()
+        for start_char, end_char in zip(start_chars.tolist(), end_chars.tolist()):
+            yield text[start_char:end_char]
+
+
+if __name__ == "__main__":
+    import spacy
+    from spacy.matcher import Matcher
+
+    nlp = spacy.blank("pt")
+    matcher = Matcher(nlp.vocab)
+    matcher.add("IOS_VERSION_PATTERN", [[{"TEXT": "iOS"}, {"IS_DIGIT": True}]])
+    matcher.add("IOS", [[{"TEXT": "iOS"}]])
+
+    doc = nlp("A maioria da roupagem do iOS 11 permanece a mesma que o iOS 10.")
+    results = MatchResults.from_matcher(matcher, doc)
+    print(f"Quantidade de correspondências: {len(results)}")
+    print(results.label_counts())
+    print(list(results.filter("IOS_VERSION_PATTERN").texts()))
+    print([(span.text, span.label_) for span in results.filter_overlaps().spans()])
+    """
+    Saída:
+    Quantidade de correspondências: 4
+    {'IOS': 2, 'IOS_VERSION_PATTERN': 2}
+    ['iOS 11', 'iOS 10']
+    [('iOS 11', 'IOS_VERSION_PATTERN'), ('iOS 10', 'IOS_VERSION_PATTERN')]
+    """
@@ -0,0 +1,168 @@
+"""
+Busca de sequências de marcadores com arrays
+
+O capítulo 2 procura um nome próprio seguido de um verbo percorrendo os tokens em Python:
+
+for token in doc:
+    if token.pos_ == "PROPN":
+        if doc[token.i + 1].pos_ == "VERB":
+            print(token.text)
+
+Cada verificação cria objetos Token e strings, e o laço gera um IndexError quando o documento termina com um nome
+próprio. Com dezenas de verificações desse tipo em cada documento, o interpretador Python vira o gargalo.
+
+O SequenceScanner lê as colunas de atributos de cada documento uma única vez com doc.to_array e avalia todas as
+sequências com comparações de arrays deslocados, sem laços em Python:
+
+    - cada sequência é uma lista de posições; cada posição aceita um marcador ("PROPN"), um conjunto de marcadores
+      ({"NOUN", "PROPN"}) ou qualquer token (None)
+    - o atributo comparado é POS por padrão, mas pode ser qualquer atributo de doc.to_array (TAG, DEP, LOWER...)
+    - as sequências nunca passam do fim do documento
+
+scanner = SequenceScanner(nlp.vocab)
+scanner.add("PROPN_VERB", ["PROPN", "VERB"])
+scanner.add("DET_ADJ_NOUN", ["DET", "ADJ", "NOUN"])
+for name, starts in scanner(doc).items():
+    print(name, starts)
+"""
+
+import numpy
+from spacy.attrs import IDS as ATTR_IDS
+
+
+class SequenceScanner:
+    """
+    Encontra sequências de marcadores em tokens vizinhos.
+
+    Args:
+        vocab (Vocab): O vocabulário compartilhado.
+    """
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.sequences = {}
+        self.attrs = []
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def __contains__(self, name):
+        return name in self.sequences
+
+    def add(self, name, sequence, attr="POS"):
+        """
+        Adiciona uma sequência.
+
+        Args:
+            name (str): O identificador da sequência.
+            sequence (list): Um item por token: um marcador, um conjunto de marcadores ou None (qualquer token).
+            attr (str, opcional): O atributo comparado. Padrão: POS
+        """
+        if not sequence:
+            raise ValueError(f"A sequência '{name}' está vazia")
+        if attr not in ATTR_IDS:
+            raise ValueError(f"Atributo '{attr}' desconhecido")
+        if attr not in self.attrs:
+            self.attrs.append(attr)
+        strings = self.vocab.strings
+        steps = []
+        for labels in sequence:
+            if labels is None:
+                steps.append(None)
+                continue
+            if isinstance(labels, str):
+                labels = [labels]
+            steps.append(numpy.array([strings.add(label) for label in labels], dtype=numpy.uint64))
+        self.sequences[name] = (attr, steps)
+
+    def remove(self, name):
+        """Remove uma sequência."""
+        del self.sequences[name]
+
+    def _columns(self, doc):
+        array = doc.to_array([ATTR_IDS[attr] for attr in self.attrs]).reshape(len(doc), len(self.attrs))
+        return {attr: array[:, i] for i, attr in enumerate(self.attrs)}
+
+    def _find(self, columns, length, attr, steps):
+        size = length - len(steps) + 1
+        if size <= 0:
+            return numpy.empty(0, dtype=numpy.int64)
+        column = columns[attr]
+        mask = numpy.ones(size, dtype=bool)
+        for offset, labels in enumerate(steps):
+            if labels is None:
+                continue
+            window = column[offset : offset + size]
+            mask &= window == labels[0] if len(labels) == 1 else numpy.isin(window, labels)
+        return numpy.flatnonzero(mask)
+
+    def __call__(self, doc):
+        """
+        Procura todas as sequências em um documento.
+
+        Returns:
+            dict: Mapeia o identificador de cada sequência para o array com os índices dos tokens iniciais.
+        """
+        columns = self._columns(doc)
+        return {
+            name: self._find(columns, len(doc), attr, steps) for name, (attr, steps) in self.sequences.items()
+        }
+
+    def scan(self, docs):
+        """
+        Procura todas as sequências em um lote de documentos.
+
+        Args:
+            docs (iterable): Os documentos.
+
+        Returns:
+            dict: Mapeia o identificador de cada sequência para dois arrays: o número do documento e o índice do
+                token inicial de cada ocorrência.
+        """
+        doc_indices = {name: [] for name in self.sequences}
+        starts = {name: [] for name in self.sequences}
+        for i, doc in enumerate(docs):
+            for name, found in self(doc).items():
+                doc_indices[name].append(numpy.full(len(found), i, dtype=numpy.int64))
+                starts[name].append(found)
+        empty = numpy.empty(0, dtype=numpy.int64)
+        return {
+            name: (
+                numpy.concatenate(doc_indices[name]) if doc_indices[name] else empty,
+                numpy.concatenate(starts[name]) if starts[name] else empty,
+            )
+            for name in self.sequences
+        }
+
+    def counts(self, docs):
+        """Retorna a quantidade de ocorrências de cada sequência em um lote de documentos."""
+        return {name: len(starts) for name, (_, starts) in self.scan(docs).items()}
+
+
+if __name__ == "__main__":
+    import spacy
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("pt")
+    doc = Doc(
+        nlp.vocab,
+        words=["Berlin", "parece", "ser", "uma", "cidade", "bonita", "como", "Lisboa"],
+        pos=["PROPN", "VERB", "AUX", "DET", "NOUN", "ADJ", "ADP", "PROPN"],
+    )
+    scanner = SequenceScanner(nlp.vocab)
+    scanner.add("PROPN_VERB", ["PROPN", "VERB"])
+    scanner.add("DET_NOUN_ADJ", ["DET", "NOUN", "ADJ"])
+    scanner.add("NOME_NO_FIM", [{"NOUN", "PROPN"}, None], attr="POS")
+    scanner.add("COMO", ["como", None], attr="LOWER")
+
+    for name, starts in scanner(doc).items():
+        print(name, [doc[i].text for i in starts.tolist()])
+    print(scanner.counts([doc, doc[:2].as_doc()]))
+    """
+    Saída:
+    PROPN_VERB ['Berlin']
+    DET_NOUN_ADJ ['uma']
+    NOME_NO_FIM ['Berlin', 'cidade']
+    COMO ['como']
+    {'PROPN_VERB': 2, 'DET_NOUN_ADJ': 1, 'NOME_NO_FIM': 3, 'COMO': 1}
+    """
@@ -0,0 +1,220 @@
+"""
+Similaridade entre muitos objetos de uma só vez
+
+O capítulo 2 compara os objetos aos pares:
+
+doc1.similarity(doc2)
+token1.similarity(token2)
+span1.similarity(span2)
+
+Cada chamada obtém os dois vetores e calcula as suas normas novamente. Para comparar todos os pares de uma lista
+(por exemplo, para encontrar sentenças duplicadas entre milhares de notícias) são n * (n - 1) / 2 chamadas em Python.
+
+Este módulo empilha os vetores de uma lista de Docs, Spans ou Tokens em uma matriz uma única vez, normaliza as linhas
+e calcula as similaridades (cosseno) com produtos de matrizes. O cálculo é feito em blocos de linhas e colunas, para
+que a memória usada fique limitada (chunk_size * chunk_size similaridades por vez) mesmo com milhões de objetos.
+
+Assim como no .similarity, objetos sem vetor (vetor nulo) têm similaridade 0 com todos os outros.
+
+vectors = vector_matrix(docs)
+indices, scores = top_k(vectors, k=5)
+for i, j, score in duplicates(vectors, threshold=0.95):
+    print(docs[i].text, "<->", docs[j].text, score)
+"""
+
+from itertools import groupby
+from operator import itemgetter
+
+import numpy
+
+
+def vector_matrix(objs):
+    """
+    Empilha os vetores de Docs, Spans ou Tokens em uma matriz float32 com uma linha por objeto.
+
+    Args:
+        objs (list): Os objetos. Também podem ser arrays com os vetores.
+
+    Returns:
+        numpy.ndarray: A matriz (objetos, dimensões).
+    """
+    vectors = [obj if isinstance(obj, numpy.ndarray) else obj.vector for obj in objs]
+    if not vectors:
+        return numpy.zeros((0, 0), dtype=numpy.float32)
+    return numpy.vstack(vectors).astype(numpy.float32, copy=False)
+
+
+def normalize(matrix):
+    """Divide cada linha pela sua norma. Linhas nulas continuam nulas."""
+    matrix = numpy.asarray(matrix, dtype=numpy.float32)
+    norms = numpy.linalg.norm(matrix, axis=1, keepdims=True)
+    return numpy.divide(matrix, norms, out=numpy.zeros_like(matrix), where=norms > 0)
+
+
+def _as_normalized(objs):
+    if objs is None:
+        return None
+    if not isinstance(objs, numpy.ndarray):
+        objs = vector_matrix(objs)
+    return normalize(objs)
+
+
+def iter_similarity_blocks(objs, others=None, chunk_size=1024, upper=False):
+    """
+    Calcula a matriz de similaridades em blocos de linhas e colunas.
+
+    Cada bloco tem no máximo chunk_size * chunk_size similaridades (4 MB com o padrão), independentemente da
+    quantidade de objetos. Os blocos são gerados linha a linha: todos os blocos de um grupo de linhas, em ordem de
+    coluna, antes do próximo grupo.
+
+    Args:
+        objs: Os objetos (ou a matriz de vetores) das linhas.
+        others (opcional): Os objetos das colunas. Padrão: os mesmos objetos das linhas
+        chunk_size (int, opcional): Quantidade de linhas e de colunas por bloco. Padrão: 1024
+        upper (bool, opcional): Quando others não é informado, calcula apenas os blocos da diagonal e acima dela, já
+            que a matriz é simétrica. Padrão: False
+
+    Yields:
+        tuple: O índice da primeira linha, o índice da primeira coluna e a matriz de similaridades do bloco.
+    """
+    rows = _as_normalized(objs)
+    columns = rows if others is None else _as_normalized(others)
+    upper = upper and others is None
+    for row_start in range(0, len(rows), chunk_size):
+        row_block = rows[row_start : row_start + chunk_size]
+        for column_start in range(row_start if upper else 0, len(columns), chunk_size):
+            yield row_start, column_start, row_block @ columns[column_start : column_start + chunk_size].T
+
+
+def similarity_matrix(objs, others=None, chunk_size=1024):
+    """
+    Retorna a matriz completa de similaridades entre os objetos.
+
+    Args:
+        objs: Os objetos (ou a matriz de vetores) das linhas.
+        others (opcional): Os objetos das colunas. Padrão: os mesmos objetos das linhas
+        chunk_size (int, opcional): Quantidade de linhas e de colunas calculadas por vez. Padrão: 1024
+
+    Returns:
+        numpy.ndarray: A matriz float32 (len(objs), len(others)).
+    """
+    n_rows = len(objs)
+    n_columns = n_rows if others is None else len(others)
+    matrix = numpy.zeros((n_rows, n_columns), dtype=numpy.float32)
+    for row_start, column_start, block in iter_similarity_blocks(objs, others, chunk_size):
+        matrix[row_start : row_start + block.shape[0], column_start : column_start + block.shape[1]] = block
+    return matrix
+
+
+def _best(scores, indices, k):
+    """Mantém, em cada linha, as k maiores similaridades (sem ordenar)."""
+    size = min(k, scores.shape[1])
+    best = numpy.argpartition(-scores, size - 1, axis=1)[:, :size]
+    return numpy.take_along_axis(scores, best, axis=1), numpy.take_along_axis(indices, best, axis=1)
+
+
+def top_k(objs, others=None, k=10, chunk_size=1024):
+    """
+    Retorna, para cada objeto, os k objetos mais similares.
+
+    Quando others não é informado, cada objeto é comparado com os demais da mesma lista, sem incluir ele mesmo; nesse
+    caso, k fica limitado a len(objs) - 1.
+    A memória usada é de um bloco de chunk_size * chunk_size similaridades mais os k melhores de cada linha do grupo
+    atual: os candidatos de cada bloco de colunas são combinados com os melhores encontrados até então.
+
+    Args:
+        objs: Os objetos (ou a matriz de vetores) das linhas.
+        others (opcional): Os objetos comparados. Padrão: os mesmos objetos
+        k (int, opcional): Quantidade de objetos similares por objeto. Padrão: 10
+        chunk_size (int, opcional): Quantidade de linhas e de colunas calculadas por vez. Padrão: 1024
+
+    Returns:
+        tuple: Dois arrays (len(objs), k): os índices dos objetos mais similares e as similaridades, em ordem
+            decrescente.
+    """
+    if others is None:
+        # Sem o próprio objeto, cada linha tem apenas len(objs) - 1 candidatos
+        k = min(k, len(objs) - 1)
+    indices, scores = [], []
+    for _, blocks in groupby(iter_similarity_blocks(objs, others, chunk_size), key=itemgetter(0)):
+        best_scores = best_indices = None
+        for row_start, column_start, block in blocks:
+            n_rows, n_columns = block.shape
+            if others is None:
+                # Remove o próprio objeto: a coluna de cada linha, se estiver neste bloco
+                diagonal = numpy.arange(n_rows) + row_start - column_start
+                inside = (diagonal >= 0) & (diagonal < n_columns)
+                block[numpy.flatnonzero(inside), diagonal[inside]] = -numpy.inf
+            block_indices = numpy.broadcast_to(numpy.arange(column_start, column_start + n_columns), block.shape)
+            if best_scores is not None:
+                block = numpy.hstack([best_scores, block])
+                block_indices = numpy.hstack([best_indices, block_indices])
+            best_scores, best_indices = _best(block, block_indices, k)
+        order = numpy.argsort(-best_scores, axis=1, kind="stable")
+        indices.append(numpy.take_along_axis(best_indices, order, axis=1))
+        scores.append(numpy.take_along_axis(best_scores, order, axis=1))
+    if not indices:
+        return numpy.zeros((0, 0), dtype=numpy.intp), numpy.zeros((0, 0), dtype=numpy.float32)
+    return numpy.vstack(indices), numpy.vstack(scores)
+
+
+def duplicates(objs, threshold=0.95, chunk_size=1024):
+    """
+    Encontra os pares de objetos com similaridade maior ou igual ao limite.
+
+    Apenas os blocos da diagonal e acima dela são calculados, já que a similaridade de (i, j) é igual à de (j, i).
+
+    Args:
+        objs: Os objetos (ou a matriz de vetores).
+        threshold (float, opcional): A similaridade mínima. Padrão: 0.95
+        chunk_size (int, opcional): Quantidade de linhas e de colunas calculadas por vez. Padrão: 1024
+
+    Yields:
+        tuple: (i, j, similaridade), com i < j, em ordem de i.
+    """
+    for _, blocks in groupby(iter_similarity_blocks(objs, None, chunk_size, upper=True), key=itemgetter(0)):
+        pairs = []
+        for row_start, column_start, block in blocks:
+            rows, columns = numpy.nonzero(block >= threshold)
+            scores = block[rows, columns]
+            rows, columns = rows + row_start, columns + column_start
+            upper = columns > rows
+            pairs.append((rows[upper], columns[upper], scores[upper]))
+        rows, columns, scores = (numpy.concatenate(arrays) for arrays in zip(*pairs))
+        order = numpy.lexsort((columns, rows))
+        yield from zip(rows[order].tolist(), columns[order].tolist(), scores[order].tolist())
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = numpy.random.default_rng(0)
+    # Vetores de 300 dimensões, como os do pt_core_news_md, com algumas linhas quase duplicadas
+    vectors = rng.normal(size=(2000, 300)).astype(numpy.float32)
+    vectors[1000:1010] = vectors[:10] + rng.normal(scale=0.01, size=(10, 300))
+
+    start = time.perf_counter()
+    norms = numpy.linalg.norm(vectors, axis=1)
+    pairs = [
+        (i, j)
+        for i in range(200)
+        for j in range(i + 1, len(vectors))
+        if vectors[i] @ vectors[j] / (norms[i] * norms[j]) >= 0.95
+    ]
+    elapsed = time.perf_counter() - start
+    print(f"Par a par (apenas as 200 primeiras linhas): {elapsed:.2f}s, {len(pairs)} duplicados")
+
+    start = time.perf_counter()
+    pairs = list(duplicates(vectors, threshold=0.95, chunk_size=256))
+    print(f"Em blocos (todas as linhas): {time.perf_counter() - start:.2f}s, {len(pairs)} duplicados")
+
+    indices, scores = top_k(vectors[:3], vectors, k=2)
+    print(indices)
+    """
+    Saída (os tempos variam):
+    Par a par (apenas as 200 primeiras linhas): 1.35s, 10 duplicados
+    Em blocos (todas as linhas): 0.06s, 10 duplicados
+    [[   0 1000]
+     [   1 1001]
+     [   2 1002]]
+    """
@@ -0,0 +1,175 @@
+"""
+Tabela de vetores compartilhada entre processos
+
+Cada processo que carrega o pt_core_news_md (o chatbot, o capítulo 2, os roteiros de países) lê a tabela de vetores
+inteira para a sua própria memória. Com N processos, existem N cópias da mesma tabela.
+
+Este módulo grava a tabela uma única vez em um arquivo .npy e a abre em cada processo com numpy.load(mmap_mode="r"):
+o arquivo é mapeado na memória em modo somente leitura, e o sistema operacional mantém uma única cópia física das
+páginas (no cache de páginas), compartilhada por todos os processos. Abrir a tabela custa praticamente apenas a
+chamada mmap; as páginas são lidas do disco quando usadas pela primeira vez.
+
+O pacote é carregado com exclude=["vectors"], para que a spaCy não leia a sua própria cópia da tabela, e a tabela
+compartilhada é colocada em nlp.vocab.vectors.
+
+O mapeamento dos códigos hash para as linhas da tabela (key2row) é um dicionário Python e não pode ser mapeado na
+memória. Ele é gravado no mesmo formato msgpack que a spaCy usa no pacote e atribuído de uma vez a vectors.key2row,
+sem chamar vectors.add para cada código. Com as 500 mil palavras do pt_core_news_md, ler o dicionário leva de 0,1 a
+0,2s por processo (vectors.add, um código por vez, levava cerca de 0,9s). Para não pagar esse custo em cada processo,
+carregue o objeto nlp com load_with_shared_vectors antes de criar os processos com fork: eles herdam o dicionário
+já pronto.
+
+-----------------------------------------------------------------------------------------------------------------------
+Arquivo        | Conteúdo
+-----------------------------------------------------------------------------------------------------------------------
+vectors.npy    | a tabela (linhas, dimensões), em float32 ou float16 (veja abaixo)
+key2row        | a linha da tabela de cada código hash, em msgpack (o mesmo arquivo key2row dos pacotes)
+meta.json      | o nome da tabela de vetores
+-----------------------------------------------------------------------------------------------------------------------
+
+Uma tabela float16 ocupa metade da memória, mas só serve para .similarity, token.vector e doc.vector (calculados em
+float16) em fluxos cujos componentes não leem os vetores estáticos. O tok2vec do pt_core_news_md lê a tabela com a
+camada static_vectors, que só aceita float32: para esses fluxos, a tabela float16 é recusada.
+
+# Uma única vez:
+export_vectors(spacy.load("pt_core_news_md"), "vetores_md")
+# Em cada processo:
+nlp = load_with_shared_vectors("pt_core_news_md", "vetores_md")
+"""
+
+import json
+import os
+
+import numpy
+import srsly
+from spacy.vectors import Vectors
+
+from ferramentas.registro_de_modelos import get_model
+from ferramentas.vetores_quantizados import static_vector_pipes
+
+VECTORS_FILE = "vectors.npy"
+KEY2ROW_FILE = "key2row"
+META_FILE = "meta.json"
+
+
+def export_vectors(nlp, path, dtype=None):
+    """
+    Grava a tabela de vetores do objeto nlp em um diretório.
+
+    Args:
+        nlp (Language): O objeto nlp com os vetores.
+        path (str): O diretório.
+        dtype (str, opcional): Converte a tabela, por exemplo para "float16". Padrão: mantém o tipo da tabela.
+            Apenas float32 é aceito quando algum componente do fluxo usa os vetores estáticos.
+    """
+    vectors = nlp.vocab.vectors
+    data = numpy.asarray(vectors.data)
+    if dtype is not None:
+        data = data.astype(dtype)
+    _check_dtype(nlp, data.dtype)
+    os.makedirs(path, exist_ok=True)
+    numpy.save(os.path.join(path, VECTORS_FILE), data)
+    srsly.write_msgpack(os.path.join(path, KEY2ROW_FILE), vectors.key2row)
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as file:
+        json.dump({"name": vectors.name}, file)
+
+
+def shared_vectors(path):
+    """
+    Abre uma tabela gravada por export_vectors, mapeada na memória em modo somente leitura.
+
+    Returns:
+        Vectors: A tabela de vetores, que pode ser atribuída a nlp.vocab.vectors.
+    """
+    data = numpy.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+        meta = json.load(file)
+    vectors = Vectors(data=data, name=meta["name"])
+    # Uma tabela criada com data já tem todas as linhas marcadas como usadas, então basta atribuir o dicionário
+    vectors.key2row = srsly.read_msgpack(os.path.join(path, KEY2ROW_FILE))
+    return vectors
+
+
+def _check_dtype(nlp, dtype):
+    pipes = static_vector_pipes(nlp)
+    if dtype != numpy.float32 and pipes:
+        raise ValueError(
+            f"Os componentes {', '.join(pipes)} usam os vetores estáticos, que precisam ser float32, "
+            f"e a tabela é {numpy.dtype(dtype).name}"
+        )
+
+
+def attach_shared_vectors(nlp, path):
+    """
+    Substitui a tabela de vetores do objeto nlp pela tabela compartilhada.
+
+    Uma tabela que não é float32 gera um ValueError se algum componente do fluxo usa os vetores estáticos.
+    """
+    vectors = shared_vectors(path)
+    _check_dtype(nlp, vectors.data.dtype)
+    nlp.vocab.vectors = vectors
+    return nlp
+
+
+def load_with_shared_vectors(name, path, exclude=()):
+    """
+    Carrega um pacote sem a sua tabela de vetores e usa a tabela compartilhada.
+
+    O objeto nlp é obtido pelo registro de modelos, então cada processo carrega o pacote e abre a tabela uma única
+    vez.
+
+    Args:
+        name (str): O nome do pacote, por exemplo "pt_core_news_md".
+        path (str): O diretório gravado por export_vectors.
+        exclude (list, opcional): Outros componentes que não devem ser carregados.
+
+    Returns:
+        Language: O objeto nlp compartilhado.
+    """
+    nlp = get_model(name, tuple(exclude) + ("vectors",))
+    if not isinstance(nlp.vocab.vectors.data, numpy.memmap):
+        attach_shared_vectors(nlp, path)
+    return nlp
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    import spacy
+
+    # Um pacote com o mesmo formato de tabela do pt_core_news_md: 500 mil palavras em 20 mil linhas de 300 dimensões
+    nlp = spacy.blank("pt")
+    rng = numpy.random.default_rng(0)
+    data = rng.normal(size=(20000, 300)).astype(numpy.float32)
+    vectors = Vectors(data=data)
+    for i in range(500000):
+        vectors.add(nlp.vocab.strings.add(f"palavra{i}"), row=i % len(data))
+    vectors.add(nlp.vocab.strings.add("pizza"), row=0)
+    vectors.add(nlp.vocab.strings.add("torta"), row=1)
+    nlp.vocab.vectors = vectors
+    directory = tempfile.mkdtemp()
+    package = os.path.join(directory, "pacote")
+    nlp.to_disk(package)
+    expected = nlp("pizza torta")[0].similarity(nlp("pizza torta")[1])
+
+    path = os.path.join(directory, "vetores")
+    export_vectors(nlp, path)
+
+    start = time.perf_counter()
+    Vectors().from_disk(os.path.join(package, "vocab"), exclude=["strings"])
+    print(f"Lendo a tabela do pacote: {time.perf_counter() - start:.4f}s")
+
+    start = time.perf_counter()
+    shared_vectors(path)
+    print(f"Abrindo a tabela compartilhada: {time.perf_counter() - start:.4f}s")
+
+    worker = load_with_shared_vectors(package, path)
+    doc = worker("pizza torta")
+    print(type(worker.vocab.vectors.data).__name__, round(doc[0].similarity(doc[1]), 4) == round(expected, 4))
+    """
+    Saída (os tempos variam):
+    Lendo a tabela do pacote: 0.1886s
+    Abrindo a tabela compartilhada: 0.1484s
+    memmap True
+    """
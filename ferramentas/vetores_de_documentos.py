@@ -0,0 +1,242 @@
+"""
+Vetores de documentos ponderados (SIF e TF-IDF)
+
+O doc.vector usado por Doc.similarity no capítulo 2 e no chatbot é a média simples dos vetores dos tokens. Palavras
+muito frequentes, como "de", "um" e "Eu", pesam tanto quanto as palavras que dão sentido à frase, e todos os documentos
+acabam parecidos entre si:
+
+doc1 = nlp("Eu gosto de comida rápida")
+doc2 = nlp("Eu gosto de pizza")
+doc1.similarity(doc2)
+
+Este componente calcula o vetor do documento como uma média ponderada:
+
+    - sif (smooth inverse frequency): cada palavra pesa a / (a + p), onde p é a frequência relativa da palavra no
+      corpus
+    - tfidf: cada palavra pesa a sua frequência no documento vezes log((1 + N) / (1 + df)) + 1, onde N é a quantidade
+      de documentos do corpus e df a quantidade de documentos em que a palavra aparece
+
+Em seguida remove a componente comum (a direção principal dos vetores dos documentos do corpus), que é compartilhada
+por praticamente todos os documentos.
+
+As frequências são calculadas uma única vez a partir de um corpus e guardadas em arrays NumPy indexados pelo rank do
+lexema (lexeme.rank, a linha da palavra na tabela de vetores). Os vetores dos tokens são obtidos da tabela com uma
+única consulta por documento, sem criar objetos Token.
+
+stats = WordStatistics.from_corpus(nlp, texts)
+stats.save("frequencias.npz")
+nlp.add_pipe("weighted_doc_vector", config={"stats_path": "frequencias.npz"})
+"""
+
+import numpy
+from spacy.attrs import ORTH
+from spacy.language import Language
+from spacy.tokens import Span
+
+MODES = ("sif", "tfidf")
+
+
+class WordStatistics:
+    """
+    Frequências das palavras de um corpus, indexadas pelo rank do lexema.
+
+    Args:
+        counts (numpy.ndarray): Quantidade de ocorrências de cada linha da tabela de vetores.
+        doc_counts (numpy.ndarray): Quantidade de documentos em que cada linha aparece.
+        n_docs (int): Quantidade de documentos do corpus.
+        components (numpy.ndarray, opcional): As componentes comuns (componentes, dimensões) removidas dos vetores.
+    """
+
+    def __init__(self, counts, doc_counts, n_docs, components=None):
+        self.counts = counts
+        self.doc_counts = doc_counts
+        self.n_docs = n_docs
+        self.total = max(int(counts.sum()), 1)
+        self.components = components
+
+    @classmethod
+    def from_corpus(cls, nlp, texts, batch_size=1000):
+        """
+        Conta as palavras de um corpus. Apenas o toquenizador é usado.
+
+        Args:
+            nlp (Language): O objeto nlp com a tabela de vetores.
+            texts (iterable): Os textos do corpus.
+            batch_size (int, opcional): Quantidade de textos toquenizados por lote. Padrão: 1000
+        """
+        vectors = nlp.vocab.vectors
+        counts = numpy.zeros(vectors.shape[0], dtype=numpy.int64)
+        doc_counts = numpy.zeros(vectors.shape[0], dtype=numpy.int64)
+        n_docs = 0
+        for doc in nlp.tokenizer.pipe(texts, batch_size=batch_size):
+            rows = vectors.find(keys=doc.to_array(ORTH))
+            rows = rows[rows >= 0]
+            numpy.add.at(counts, rows, 1)
+            doc_counts[numpy.unique(rows)] += 1
+            n_docs += 1
+        return cls(counts, doc_counts, n_docs)
+
+    def save(self, path):
+        """Grava as frequências em um arquivo .npz."""
+        arrays = {"counts": self.counts, "doc_counts": self.doc_counts, "n_docs": numpy.array(self.n_docs)}
+        if self.components is not None:
+            arrays["components"] = self.components
+        numpy.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Lê as frequências gravadas por save."""
+        with numpy.load(path) as arrays:
+            components = arrays["components"] if "components" in arrays.files else None
+            return cls(arrays["counts"], arrays["doc_counts"], int(arrays["n_docs"]), components)
+
+    def weights(self, rows, mode="sif", a=1e-3):
+        """
+        Retorna o peso de cada ocorrência das linhas da tabela em um documento.
+
+        Args:
+            rows (numpy.ndarray): As linhas da tabela de vetores dos tokens do documento.
+            mode (str, opcional): sif ou tfidf. Padrão: sif
+            a (float, opcional): O parâmetro de suavização do SIF. Padrão: 0.001
+        """
+        if mode == "sif":
+            return a / (a + self.counts[rows] / self.total)
+        if mode == "tfidf":
+            # Cada ocorrência soma o idf da palavra: a soma das ocorrências de uma palavra é tf * idf
+            return numpy.log((1 + self.n_docs) / (1 + self.doc_counts[rows])) + 1
+        raise ValueError(f"Modo '{mode}' inválido. Use um destes: {', '.join(MODES)}")
+
+
+def weighted_vector(vectors, stats, orths, mode="sif", a=1e-3):
+    """
+    Calcula o vetor ponderado de uma sequência de tokens, sem remover as componentes comuns.
+
+    Args:
+        vectors (Vectors): A tabela de vetores.
+        stats (WordStatistics): As frequências do corpus.
+        orths (numpy.ndarray): Os códigos hash dos tokens (doc.to_array(ORTH)).
+        mode (str, opcional): sif ou tfidf. Padrão: sif
+        a (float, opcional): O parâmetro de suavização do SIF. Padrão: 0.001
+
+    Returns:
+        numpy.ndarray: O vetor float32 (nulo se nenhum token tiver vetor).
+    """
+    rows = vectors.find(keys=orths)
+    rows = rows[rows >= 0]
+    if not len(rows):
+        return numpy.zeros(vectors.shape[1], dtype=numpy.float32)
+    weights = stats.weights(rows, mode, a)
+    table = numpy.asarray(vectors.data[rows], dtype=numpy.float32)
+    return (weights @ table / len(rows)).astype(numpy.float32)
+
+
+def remove_components(vector, components):
+    """Remove do vetor (ou das linhas de uma matriz) as projeções nas componentes comuns."""
+    if components is None or not len(components):
+        return vector
+    return vector - (vector @ components.T) @ components
+
+
+def fit_components(nlp, stats, texts, n_components=1, mode="sif", a=1e-3, batch_size=1000):
+    """
+    Calcula as componentes comuns dos vetores ponderados dos documentos do corpus e as guarda em stats.
+
+    Args:
+        nlp (Language): O objeto nlp com a tabela de vetores.
+        stats (WordStatistics): As frequências do corpus.
+        texts (iterable): Os textos do corpus.
+        n_components (int, opcional): Quantidade de componentes removidas. Padrão: 1
+        mode (str, opcional): sif ou tfidf. Padrão: sif
+        a (float, opcional): O parâmetro de suavização do SIF. Padrão: 0.001
+    """
+    vectors = nlp.vocab.vectors
+    matrix = numpy.array(
+        [
+            weighted_vector(vectors, stats, doc.to_array(ORTH), mode, a)
+            for doc in nlp.tokenizer.pipe(texts, batch_size=batch_size)
+        ]
+    )
+    # As direções principais são os primeiros vetores singulares à direita da matriz dos documentos
+    _, _, vt = numpy.linalg.svd(matrix, full_matrices=False)
+    stats.components = vt[:n_components].astype(numpy.float32)
+    return stats
+
+
+class WeightedDocVector:
+    """
+    Componente que substitui doc.vector e span.vector pelos vetores ponderados.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        name (str): O nome do componente no fluxo de processamento.
+        mode (str): sif ou tfidf.
+        a (float): O parâmetro de suavização do SIF.
+        stats_path (str): O arquivo gravado por WordStatistics.save. Também pode ser definido depois com
+            set_statistics.
+    """
+
+    def __init__(self, nlp, name, mode, a, stats_path):
+        if mode not in MODES:
+            raise ValueError(f"Modo '{mode}' inválido. Use um destes: {', '.join(MODES)}")
+        self.name = name
+        self.vocab = nlp.vocab
+        self.mode = mode
+        self.a = a
+        self.stats = WordStatistics.load(stats_path) if stats_path else None
+
+    def set_statistics(self, stats):
+        """Define as frequências usadas pelo componente."""
+        self.stats = stats
+
+    def vector(self, doc_or_span):
+        """Calcula o vetor ponderado de um documento ou partição, removendo as componentes comuns."""
+        if isinstance(doc_or_span, Span):
+            orths = doc_or_span.doc.to_array(ORTH)[doc_or_span.start : doc_or_span.end]
+        else:
+            orths = doc_or_span.to_array(ORTH)
+        vector = weighted_vector(self.vocab.vectors, self.stats, orths, self.mode, self.a)
+        return remove_components(vector, self.stats.components).astype(numpy.float32)
+
+    def __call__(self, doc):
+        if self.stats is None:
+            raise ValueError(f"O componente '{self.name}' precisa das frequências: use stats_path ou set_statistics")
+        doc.user_hooks["vector"] = self.vector
+        doc.user_span_hooks["vector"] = self.vector
+        return doc
+
+
+@Language.factory("weighted_doc_vector", default_config={"mode": "sif", "a": 1e-3, "stats_path": None})
+def create_weighted_doc_vector(nlp, name, mode, a, stats_path):
+    return WeightedDocVector(nlp, name, mode, a, stats_path)
+
+
+if __name__ == "__main__":
+    import spacy
+    from spacy.vectors import Vectors
+
+    nlp = spacy.blank("pt")
+    rng = numpy.random.default_rng(0)
+    # Palavras frequentes com uma direção em comum, como acontece nos vetores reais
+    common = rng.normal(size=50) * 3
+    words = ["eu", "gosto", "de", "um", "comida", "rápida", "pizza", "livro", "novo", "ler", "preciso", "quero"]
+    data = rng.normal(size=(len(words), 50)) + common
+    data[words.index("pizza")] = data[words.index("comida")] + rng.normal(scale=0.5, size=50)
+    nlp.vocab.vectors = Vectors(data=data.astype(numpy.float32), keys=[nlp.vocab.strings.add(w) for w in words])
+
+    # As palavras funcionais aparecem em quase todos os documentos; as palavras de conteúdo, em poucos
+    corpus = ["eu gosto de um", "eu preciso de um", "eu quero de um", "eu gosto de"] * 50
+    corpus += ["eu gosto de pizza", "comida rápida", "um livro novo", "eu quero ler um livro"]
+    stats = WordStatistics.from_corpus(nlp, corpus)
+    fit_components(nlp, stats, corpus)
+
+    doc1, doc2, doc3 = nlp("eu gosto de comida rápida"), nlp("eu gosto de pizza"), nlp("eu gosto de um livro")
+    print(f"Média simples: {doc1.similarity(doc2):.2f} (pizza), {doc1.similarity(doc3):.2f} (livro)")
+
+    nlp.add_pipe("weighted_doc_vector").set_statistics(stats)
+    doc1, doc2, doc3 = nlp("eu gosto de comida rápida"), nlp("eu gosto de pizza"), nlp("eu gosto de um livro")
+    print(f"SIF: {doc1.similarity(doc2):.2f} (pizza), {doc1.similarity(doc3):.2f} (livro)")
+    """
+    Saída:
+    Média simples: 1.00 (pizza), 0.99 (livro)
+    SIF: 0.34 (pizza), -0.70 (livro)
+    """
@@ -0,0 +1,285 @@
+"""
+Vetores para palavras fora do vocabulário
+
+No capítulo 2, tokens que não estão na tabela de vetores recebem um vetor nulo: a similaridade com eles é sempre 0 e a
+spaCy emite um aviso. Isso é comum nas mensagens do chatbot, cheias de erros de digitação, gírias e palavras raras.
+
+Este componente cria vetores para essas palavras a partir dos seus pedaços (n-gramas de caracteres), como o fastText:
+
+    - cada palavra da tabela de vetores é dividida em n-gramas ("<pizza>" -> "<pi", "piz", "izz", ..., "zza>") e cada
+      n-grama é associado, por um código hash, a um de n_buckets grupos
+    - o vetor de cada grupo é a média dos vetores das palavras que têm n-gramas nele
+    - o vetor de uma palavra desconhecida é a média dos vetores dos grupos dos seus n-gramas
+
+Os vetores calculados ficam em um cache LRU, pois as mesmas palavras desconhecidas se repetem. O componente pode ser
+ativado ou desativado em cada fluxo de processamento (nlp.add_pipe, nlp.disable_pipe), e só muda token.vector,
+token.has_vector e .similarity dos documentos processados por ele.
+
+A tabela dos grupos é criada uma única vez, fora dos processos que atendem as requisições, e gravada em disco. Cada
+processo apenas a mapeia na memória:
+
+# Uma única vez:
+SubwordVectors.from_vocab(nlp.vocab).save("ngramas")
+# Em cada processo:
+nlp.add_pipe("oov_vectors", config={"table_path": "ngramas"})
+doc = nlp("Eu gosto de pizzas e tortinhas")
+print(doc[3].has_vector, doc[3].similarity(doc[5]))
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy
+from spacy.language import Language
+from thinc.api import NumpyOps
+
+DATA_FILE = "buckets.npy"
+KNOWN_FILE = "known.npy"
+META_FILE = "meta.json"
+
+# Constantes do hash FNV-1a de 64 bits, aplicado aos códigos Unicode dos caracteres
+FNV_OFFSET = numpy.uint64(0xCBF29CE484222325)
+FNV_PRIME = numpy.uint64(0x100000001B3)
+
+WORDS_PER_CHUNK = 20000
+PAIRS_PER_CHUNK = 65536
+
+
+def char_ngrams(text, n_min=3, n_max=5):
+    """Retorna os n-gramas de caracteres da palavra, com os marcadores de início e fim (< e >)."""
+    word = f"<{text.lower()}>"
+    return [word[i : i + n] for n in range(n_min, n_max + 1) for i in range(len(word) - n + 1)]
+
+
+def ngram_buckets(texts, n_buckets, n_min=3, n_max=5):
+    """
+    Retorna os grupos de todos os n-gramas de uma lista de palavras, calculados de uma só vez com NumPy.
+
+    Os caracteres de cada palavra ("<" + palavra + ">") ficam em uma matriz (palavras, caracteres), e o hash FNV-1a
+    de todos os n-gramas de um mesmo tamanho é calculado com operações sobre colunas deslocadas. O hash é o mesmo em
+    todos os processos.
+
+    Args:
+        texts (list): As palavras.
+        n_buckets (int): A quantidade de grupos.
+        n_min, n_max (int, opcional): O tamanho mínimo e máximo dos n-gramas. Padrão: 3 e 5
+
+    Returns:
+        tuple: Dois arrays com um elemento por n-grama: o índice da palavra em texts e o grupo.
+    """
+    words = [f"<{text.lower()}>" for text in texts]
+    lengths = numpy.array([len(word) for word in words], dtype=numpy.int64)
+    if not len(words):
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+    chars = numpy.frombuffer("".join(words).encode("utf-32-le"), dtype=numpy.uint32)
+    # A posição de cada caractere na matriz: a linha da palavra e a distância até o início da palavra
+    starts = numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+    matrix = numpy.zeros((len(words), lengths.max()), dtype=numpy.uint64)
+    matrix[numpy.repeat(numpy.arange(len(words)), lengths), numpy.arange(len(chars)) - starts] = chars
+    word_indices, buckets = [], []
+    for n in range(n_min, n_max + 1):
+        width = matrix.shape[1] - n + 1
+        if width <= 0:
+            continue
+        hashes = numpy.full((len(words), width), FNV_OFFSET, dtype=numpy.uint64)
+        for offset in range(n):
+            hashes = (hashes ^ matrix[:, offset : offset + width]) * FNV_PRIME
+        # Apenas os n-gramas que terminam dentro da palavra
+        rows, columns = numpy.nonzero(numpy.arange(width) + n <= lengths[:, None])
+        hashes = hashes[rows, columns]
+        word_indices.append(rows)
+        buckets.append(((hashes ^ (hashes >> numpy.uint64(32))) % numpy.uint64(n_buckets)).astype(numpy.int64))
+    return numpy.concatenate(word_indices), numpy.concatenate(buckets)
+
+
+class SubwordVectors:
+    """
+    Vetores dos grupos de n-gramas, criados a partir de uma tabela de vetores.
+
+    A tabela é guardada em float16: com o padrão de 32768 grupos e 300 dimensões, ocupa cerca de 19 MB.
+
+    Args:
+        data (numpy.ndarray): Os vetores dos grupos (n_buckets, dimensões).
+        known (numpy.ndarray): Indica os grupos que receberam algum n-grama.
+        n_min, n_max (int): O tamanho mínimo e máximo dos n-gramas.
+        cache_size (int, opcional): Quantidade de palavras no cache LRU. Padrão: 10000
+    """
+
+    def __init__(self, data, known, n_min=3, n_max=5, cache_size=10000):
+        self.data = data
+        self.known = known
+        self.n_min = n_min
+        self.n_max = n_max
+        self.vector = lru_cache(maxsize=cache_size)(self._vector)
+
+    @classmethod
+    def from_vocab(cls, vocab, n_min=3, n_max=5, n_buckets=2**15, cache_size=10000):
+        """
+        Cria os vetores dos grupos a partir de vocab.vectors.
+
+        As palavras são processadas em blocos: os grupos dos n-gramas são calculados com ngram_buckets e os vetores
+        são somados aos grupos com o scatter_add da thinc (bem mais rápido que numpy.add.at). A criação leva alguns
+        segundos para tabelas grandes: faça-a uma única vez e grave o resultado com save.
+
+        Args:
+            vocab (Vocab): O vocabulário, com a tabela de vetores.
+            n_min, n_max (int, opcional): O tamanho mínimo e máximo dos n-gramas. Padrão: 3 e 5
+            n_buckets (int, opcional): A quantidade de grupos. Padrão: 32768
+            cache_size (int, opcional): Quantidade de palavras no cache LRU. Padrão: 10000
+        """
+        vectors = vocab.vectors
+        strings = vocab.strings
+        items = [(strings[key], row) for key, row in vectors.key2row.items() if key in strings]
+        texts = [text for text, _ in items]
+        rows = numpy.array([row for _, row in items], dtype=numpy.int64)
+        data = numpy.zeros((n_buckets, vectors.shape[1]), dtype=numpy.float32)
+        counts = numpy.zeros(n_buckets, dtype=numpy.int64)
+        table = vectors.data
+        ops = NumpyOps()
+        for start in range(0, len(texts), WORDS_PER_CHUNK):
+            word_indices, buckets = ngram_buckets(texts[start : start + WORDS_PER_CHUNK], n_buckets, n_min, n_max)
+            word_rows = rows[start + word_indices]
+            counts += numpy.bincount(buckets, minlength=n_buckets)
+            # Soma os vetores de cada grupo, um bloco de n-gramas de cada vez para limitar a memória
+            for pair in range(0, len(buckets), PAIRS_PER_CHUNK):
+                block = slice(pair, pair + PAIRS_PER_CHUNK)
+                values = numpy.asarray(table[word_rows[block]], dtype=numpy.float32)
+                ops.scatter_add(data, buckets[block].astype(numpy.int32), values)
+        known = counts > 0
+        data[known] /= counts[known, None]
+        return cls(data.astype(numpy.float16), known, n_min, n_max, cache_size)
+
+    def save(self, path):
+        """Grava a tabela em um diretório, para que os processos a carreguem com load em vez de recriá-la."""
+        os.makedirs(path, exist_ok=True)
+        numpy.save(os.path.join(path, DATA_FILE), self.data)
+        numpy.save(os.path.join(path, KNOWN_FILE), self.known)
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as file:
+            json.dump({"n_min": self.n_min, "n_max": self.n_max}, file)
+
+    @classmethod
+    def load(cls, path, cache_size=10000, mmap=True):
+        """
+        Lê uma tabela gravada por save.
+
+        Args:
+            path (str): O diretório.
+            cache_size (int, opcional): Quantidade de palavras no cache LRU. Padrão: 10000
+            mmap (bool, opcional): Mapeia a tabela na memória em modo somente leitura, compartilhando as páginas entre
+                os processos. Padrão: True
+        """
+        data = numpy.load(os.path.join(path, DATA_FILE), mmap_mode="r" if mmap else None)
+        known = numpy.load(os.path.join(path, KNOWN_FILE))
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+            meta = json.load(file)
+        return cls(data, known, meta["n_min"], meta["n_max"], cache_size)
+
+    def _vector(self, text):
+        _, buckets = ngram_buckets([text], len(self.data), self.n_min, self.n_max)
+        buckets = buckets[self.known[buckets]]
+        if not len(buckets):
+            return numpy.zeros(self.data.shape[1], dtype=numpy.float32)
+        vector = numpy.asarray(self.data[buckets], dtype=numpy.float32).mean(axis=0)
+        vector.flags.writeable = False
+        return vector
+
+    def cache_info(self):
+        """Retorna as estatísticas do cache LRU."""
+        return self.vector.cache_info()
+
+
+class OOVVectors:
+    """
+    Componente que completa token.vector com os vetores de n-gramas para as palavras sem vetor.
+
+    A tabela de n-gramas não é criada durante o processamento. Ela pode ser:
+
+        - lida de table_path, um diretório gravado por SubwordVectors.save (mapeado na memória)
+        - criada com initialize, a partir da tabela de vetores do vocabulário naquele momento, e gravada junto com o
+          fluxo por nlp.to_disk, para ser lida por nlp.from_disk / spacy.load
+
+    Args:
+        nlp (Language): O objeto nlp.
+        name (str): O nome do componente no fluxo de processamento.
+        n_min, n_max (int): O tamanho mínimo e máximo dos n-gramas.
+        n_buckets (int): A quantidade de grupos.
+        cache_size (int): Quantidade de palavras no cache LRU.
+        table_path (str): O diretório de uma tabela gravada por SubwordVectors.save.
+    """
+
+    def __init__(self, nlp, name, n_min, n_max, n_buckets, cache_size, table_path):
+        self.name = name
+        self.vocab = nlp.vocab
+        self.n_min = n_min
+        self.n_max = n_max
+        self.n_buckets = n_buckets
+        self.cache_size = cache_size
+        self.subwords = SubwordVectors.load(table_path, cache_size) if table_path else None
+
+    def initialize(self, get_examples=None, nlp=None):
+        """Cria a tabela de n-gramas a partir da tabela de vetores do vocabulário."""
+        self.subwords = SubwordVectors.from_vocab(
+            self.vocab, self.n_min, self.n_max, self.n_buckets, self.cache_size
+        )
+
+    def to_disk(self, path, exclude=tuple()):
+        if self.subwords is not None:
+            self.subwords.save(path)
+
+    def from_disk(self, path, exclude=tuple()):
+        if os.path.exists(os.path.join(path, META_FILE)):
+            self.subwords = SubwordVectors.load(path, self.cache_size)
+        return self
+
+    def token_vector(self, token):
+        if token.vocab.has_vector(token.orth):
+            return token.vocab.get_vector(token.orth)
+        return self.subwords.vector(token.text)
+
+    def token_has_vector(self, token):
+        return token.vocab.has_vector(token.orth) or bool(self.subwords.vector(token.text).any())
+
+    def __call__(self, doc):
+        if self.subwords is None:
+            raise ValueError(
+                f"O componente '{self.name}' precisa da tabela de n-gramas: use table_path ou chame initialize()"
+            )
+        doc.user_token_hooks["vector"] = self.token_vector
+        doc.user_token_hooks["has_vector"] = self.token_has_vector
+        return doc
+
+
+@Language.factory(
+    "oov_vectors",
+    default_config={"n_min": 3, "n_max": 5, "n_buckets": 2**15, "cache_size": 10000, "table_path": None},
+)
+def create_oov_vectors(nlp, name, n_min, n_max, n_buckets, cache_size, table_path):
+    return OOVVectors(nlp, name, n_min, n_max, n_buckets, cache_size, table_path)
+
+
+if __name__ == "__main__":
+    import spacy
+    from spacy.vectors import Vectors
+
+    nlp = spacy.blank("pt")
+    rng = numpy.random.default_rng(0)
+    comida, bebida = rng.normal(size=300), rng.normal(size=300)
+    words = {"pizza": comida, "torta": comida, "tortas": comida, "pizzaria": comida, "cerveja": bebida}
+    data = numpy.array([vector + rng.normal(scale=0.3, size=300) for vector in words.values()], dtype=numpy.float32)
+    nlp.vocab.vectors = Vectors(data=data, keys=[nlp.vocab.strings.add(word) for word in words])
+
+    doc = nlp("pizzas tortinhas cervejas")
+    print(doc[0].has_vector, doc[0].similarity(doc[1]))
+
+    nlp.add_pipe("oov_vectors").initialize()
+    doc = nlp("pizzas tortinhas cervejas")
+    print(doc[0].has_vector, f"{doc[0].similarity(doc[1]):.2f}", f"{doc[0].similarity(doc[2]):.2f}")
+    with nlp.select_pipes(disable=["oov_vectors"]):
+        print(nlp("pizzas")[0].has_vector)
+    """
+    Saída:
+    False 0.0
+    True 0.97 0.19
+    False
+    """
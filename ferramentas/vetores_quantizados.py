@@ -0,0 +1,258 @@
+"""
+Vetores com precisão reduzida
+
+Os vetores do pt_core_news_md têm 300 dimensões em float32: 1200 bytes por linha da tabela. Cada processo que carrega
+o pacote guarda a sua própria cópia da tabela, e em servidores com dezenas de processos as tabelas de vetores ocupam
+vários gigabytes.
+
+Este módulo oferece duas representações menores:
+
+-----------------------------------------------------------------------------------------------------------------------
+Modo     | Bytes por valor | Como funciona
+-----------------------------------------------------------------------------------------------------------------------
+float16  | 2               | Os valores são convertidos para float16. A tabela pode substituir nlp.vocab.vectors
+         |                 | (use_float16) em fluxos cujos componentes não usam os vetores estáticos: token.vector,
+         |                 | doc.vector e .similarity passam a ser calculados em float16.
+-----------------------------------------------------------------------------------------------------------------------
+int8     | 1               | Cada linha é dividida por uma escala (o maior valor absoluto da linha / 127) e
+         |                 | arredondada para int8. As similaridades são calculadas diretamente com os inteiros.
+-----------------------------------------------------------------------------------------------------------------------
+
+O relatório quantization_report compara a memória das tabelas e o erro das similaridades em relação ao float32.
+
+print_quantization_report(quantization_report(nlp.vocab.vectors))
+use_float16(nlp)
+"""
+
+import numpy
+from spacy.vectors import Vectors
+
+MODES = ("float32", "float16", "int8")
+
+NORM_CHUNK_SIZE = 65536
+
+
+class QuantizedVectors:
+    """
+    Uma tabela de vetores em float32, float16 ou int8, com os mesmos códigos hash de nlp.vocab.vectors.
+
+    Args:
+        key2row (dict): Mapeia o código hash de cada palavra para a linha da tabela.
+        data (numpy.ndarray): A tabela.
+        scales (numpy.ndarray, opcional): A escala de cada linha (apenas no modo int8).
+    """
+
+    def __init__(self, key2row, data, scales=None):
+        self.key2row = key2row
+        self.data = data
+        self.scales = scales
+        self.mode = data.dtype.name
+        # As normas são calculadas uma única vez, a partir dos valores já quantizados, em blocos para não criar uma
+        # cópia float32 da tabela inteira
+        self.norms = numpy.zeros(len(data), dtype=numpy.float32)
+        for start in range(0, len(data), NORM_CHUNK_SIZE):
+            rows = numpy.arange(start, min(start + NORM_CHUNK_SIZE, len(data)))
+            self.norms[rows] = numpy.linalg.norm(self._dequantize(rows), axis=1)
+
+    @classmethod
+    def from_vectors(cls, vectors, mode="int8"):
+        """
+        Cria a tabela a partir de nlp.vocab.vectors.
+
+        Args:
+            vectors (Vectors): A tabela de vetores da spaCy.
+            mode (str, opcional): float32, float16 ou int8. Padrão: int8
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo '{mode}' inválido. Use um destes: {', '.join(MODES)}")
+        data = numpy.asarray(vectors.data, dtype=numpy.float32)
+        key2row = dict(vectors.key2row)
+        if mode != "int8":
+            return cls(key2row, data.astype(mode))
+        scales = numpy.abs(data).max(axis=1) / 127
+        scales[scales == 0] = 1
+        quantized = numpy.round(data / scales[:, None]).astype(numpy.int8)
+        return cls(key2row, quantized, scales.astype(numpy.float32))
+
+    @property
+    def nbytes(self):
+        """A memória ocupada pela tabela (e pelas escalas), em bytes."""
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __contains__(self, key):
+        return key in self.key2row
+
+    def _dequantize(self, rows):
+        data = self.data[rows].astype(numpy.float32)
+        if self.scales is not None:
+            data *= self.scales[rows, None]
+        return data
+
+    def find(self, keys):
+        """Retorna as linhas dos códigos hash, ou -1 para as palavras sem vetor."""
+        return numpy.array([self.key2row.get(key, -1) for key in keys], dtype=numpy.intp)
+
+    def get(self, keys):
+        """Retorna os vetores float32 dos códigos hash (vetores nulos para palavras sem vetor)."""
+        rows = self.find(keys)
+        vectors = numpy.zeros((len(rows), self.data.shape[1]), dtype=numpy.float32)
+        known = rows >= 0
+        vectors[known] = self._dequantize(rows[known])
+        return vectors
+
+    def doc_vector(self, doc):
+        """Retorna o vetor do documento (ou partição): a média dos vetores dos tokens, como em doc.vector."""
+        if not len(doc):
+            return numpy.zeros(self.data.shape[1], dtype=numpy.float32)
+        return self.get([token.orth for token in doc]).mean(axis=0)
+
+    def row_similarity(self, rows, other_rows):
+        """
+        Calcula as similaridades (cosseno) entre duas listas de linhas da tabela.
+
+        No modo int8, o produto é calculado com os inteiros (acumulados em int32) e multiplicado pelas escalas.
+
+        Returns:
+            numpy.ndarray: A matriz float32 (len(rows), len(other_rows)).
+        """
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        other_rows = numpy.asarray(other_rows, dtype=numpy.intp)
+        if self.scales is not None:
+            dots = self.data[rows].astype(numpy.int32) @ self.data[other_rows].astype(numpy.int32).T
+            dots = dots * numpy.outer(self.scales[rows], self.scales[other_rows])
+        else:
+            dots = self.data[rows].astype(numpy.float32) @ self.data[other_rows].astype(numpy.float32).T
+        norms = numpy.outer(self.norms[rows], self.norms[other_rows])
+        return numpy.divide(dots, norms, out=numpy.zeros(dots.shape, dtype=numpy.float32), where=norms > 0)
+
+    def pair_similarity(self, rows, other_rows):
+        """Calcula a similaridade entre rows[i] e other_rows[i] para cada i."""
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        other_rows = numpy.asarray(other_rows, dtype=numpy.intp)
+        if self.scales is not None:
+            dots = (self.data[rows].astype(numpy.int32) * self.data[other_rows].astype(numpy.int32)).sum(axis=1)
+            dots = dots * self.scales[rows] * self.scales[other_rows]
+        else:
+            dots = (self.data[rows].astype(numpy.float32) * self.data[other_rows].astype(numpy.float32)).sum(axis=1)
+        norms = self.norms[rows] * self.norms[other_rows]
+        return numpy.divide(dots, norms, out=numpy.zeros(dots.shape, dtype=numpy.float32), where=norms > 0)
+
+    def similarity(self, key1, key2):
+        """Retorna a similaridade entre duas palavras (0 se alguma delas não tiver vetor)."""
+        row1, row2 = self.find([key1, key2]).tolist()
+        if row1 < 0 or row2 < 0:
+            return 0.0
+        return float(self.row_similarity([row1], [row2])[0, 0])
+
+
+def static_vector_pipes(nlp):
+    """
+    Retorna os nomes dos componentes cujo modelo lê a tabela de vetores (a camada static_vectors).
+
+    É o caso do tok2vec do pt_core_news_md, criado com include_static_vectors=True. Essa camada só aceita tabelas
+    float32: com uma tabela float16, nlp(texto) gera um TypeError.
+    """
+    names = []
+    for name, pipe in nlp.pipeline:
+        model = getattr(pipe, "model", None)
+        if model is not None and any(node.name == "static_vectors" for node in model.walk()):
+            names.append(name)
+    return names
+
+
+def use_float16(nlp):
+    """
+    Substitui a tabela de vetores do objeto nlp por uma cópia em float16, com os mesmos códigos hash.
+
+    token.vector e doc.vector passam a retornar arrays float16, e .similarity é calculado em float16. Como a camada
+    static_vectors só aceita float32, a troca é recusada quando algum componente usa os vetores estáticos: nesses
+    fluxos, use QuantizedVectors, que calcula as similaridades sem alterar nlp.vocab.vectors.
+
+    Returns:
+        dict: A memória da tabela antes e depois, em bytes.
+    """
+    pipes = static_vector_pipes(nlp)
+    if pipes:
+        raise ValueError(
+            f"Os componentes {', '.join(pipes)} usam os vetores estáticos, que precisam ser float32. "
+            f"Use QuantizedVectors.from_vectors(nlp.vocab.vectors, 'float16') para calcular as similaridades"
+        )
+    vectors = nlp.vocab.vectors
+    before = vectors.data.nbytes
+    half = Vectors(data=numpy.asarray(vectors.data).astype(numpy.float16), name=vectors.name)
+    for key, row in vectors.key2row.items():
+        half.add(key, row=row)
+    nlp.vocab.vectors = half
+    return {"before": before, "after": half.data.nbytes}
+
+
+def quantization_report(vectors, modes=("float16", "int8"), sample=2000, seed=0):
+    """
+    Compara a memória e o erro das similaridades de cada modo em relação ao float32.
+
+    Args:
+        vectors (Vectors): A tabela de vetores da spaCy.
+        modes (tuple, opcional): Os modos comparados. Padrão: float16 e int8
+        sample (int, opcional): Quantidade de pares de linhas sorteados para medir o erro. Padrão: 2000
+        seed (int, opcional): A semente do sorteio. Padrão: 0
+
+    Returns:
+        list: Um dicionário por modo, com a memória (bytes), a economia e o erro médio e máximo das similaridades.
+    """
+    reference = QuantizedVectors.from_vectors(vectors, "float32")
+    rng = numpy.random.default_rng(seed)
+    rows = rng.integers(0, len(reference.data), size=sample)
+    other_rows = rng.integers(0, len(reference.data), size=sample)
+    expected = reference.pair_similarity(rows, other_rows)
+    report = []
+    for mode in modes:
+        quantized = QuantizedVectors.from_vectors(vectors, mode)
+        error = numpy.abs(quantized.pair_similarity(rows, other_rows) - expected)
+        report.append(
+            {
+                "mode": mode,
+                "nbytes": quantized.nbytes,
+                "float32_nbytes": reference.nbytes,
+                "savings": 1 - quantized.nbytes / reference.nbytes,
+                "mean_error": float(error.mean()),
+                "max_error": float(error.max()),
+            }
+        )
+    return report
+
+
+def print_quantization_report(report):
+    """Imprime o relatório de quantization_report."""
+    for result in report:
+        print(
+            f"{result['mode']}: {result['nbytes'] / 2**20:.1f} MB "
+            f"(float32: {result['float32_nbytes'] / 2**20:.1f} MB, economia de {result['savings']:.0%}), "
+            f"erro médio {result['mean_error']:.5f}, erro máximo {result['max_error']:.5f}"
+        )
+
+
+if __name__ == "__main__":
+    import spacy
+
+    # Uma tabela com o mesmo formato da do pt_core_news_md (300 dimensões)
+    nlp = spacy.blank("pt")
+    rng = numpy.random.default_rng(0)
+    words = [f"palavra{i}" for i in range(20000)] + ["pizza", "torta"]
+    data = rng.normal(size=(len(words), 300)).astype(numpy.float32)
+    data[-1] = data[-2] + rng.normal(scale=0.8, size=300)
+    nlp.vocab.vectors = Vectors(data=data, keys=[nlp.vocab.strings.add(word) for word in words])
+
+    print_quantization_report(quantization_report(nlp.vocab.vectors))
+
+    doc = nlp("pizza torta")
+    int8 = QuantizedVectors.from_vectors(nlp.vocab.vectors, "int8")
+    print(f"float32: {doc[0].similarity(doc[1]):.4f}, int8: {int8.similarity(doc[0].orth, doc[1].orth):.4f}")
+    use_float16(nlp)
+    print(f"float16: {doc[0].similarity(doc[1]):.4f}")
+    """
+    Saída:
+    float16: 11.4 MB (float32: 22.9 MB, economia de 50%), erro médio 0.00001, erro máximo 0.00005
+    int8: 5.8 MB (float32: 22.9 MB, economia de 75%), erro médio 0.00046, erro máximo 0.00214
+    float32: 0.7754, int8: 0.7757
+    float16: 0.7759
+    """
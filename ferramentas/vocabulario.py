@@ -0,0 +1,160 @@
+"""
+Pré-carregamento do vocabulário e das strings
+
+O capítulo 2 mostra que os códigos hash não podem ser revertidos: se uma string não foi registrada em
+nlp.vocab.strings, a consulta pelo código hash gera um erro.
+
+# Gera um erro se a string não foi mapeada anteriomente
+string = nlp.vocab.strings[3197928453018144401]
+
+Em processos de trabalho (workers), isso acontece com códigos hash recebidos de outros processos, como os arrays de
+ferramentas/lexico.py ou os arquivos de ferramentas/exportacao.py. Além disso, a primeira ocorrência de cada palavra
+cria um lexema novo no vocabulário, calculando os seus atributos léxicos durante o processamento.
+
+Este módulo:
+
+    - registra em lote as strings e os lexemas de um corpus (textos) ou de uma lista de termos (gazetteer)
+    - grava um instantâneo (snapshot) das strings e dos lexemas em disco
+    - carrega o instantâneo ao iniciar cada processo, antes de processar qualquer texto
+    - informa o tamanho do vocabulário e a memória residente antes e depois
+
+report = preload_vocab(nlp, texts=corpus, words=read_terms("capitulo_2/countries.json"))
+save_snapshot(nlp, "vocabulario")
+# Em cada processo:
+load_snapshot(nlp, "vocabulario")
+"""
+
+import json
+import os
+
+import numpy
+
+from ferramentas.predefinicoes import rss_mb
+
+STRINGS_FILE = "strings.json"
+LEXEMES_FILE = "lexemes.npy"
+
+
+def vocab_stats(nlp):
+    """Retorna a quantidade de lexemas e de strings do vocabulário e a memória residente (MB) do processo."""
+    return {"lexemes": len(nlp.vocab), "strings": len(nlp.vocab.strings), "rss_mb": rss_mb()}
+
+
+def _report(before, after):
+    return {"before": before, "after": after, **{f"added_{key}": after[key] - before[key] for key in before}}
+
+
+def read_terms(path):
+    """
+    Lê uma lista de termos: um arquivo JSON com uma lista de strings, ou um arquivo de texto com um termo por linha.
+    """
+    with open(path, encoding="utf-8") as file:
+        if path.endswith(".json"):
+            return json.load(file)
+        return [line.strip() for line in file if line.strip()]
+
+
+def preload_vocab(nlp, texts=(), words=(), batch_size=1000):
+    """
+    Registra em lote as strings e os lexemas de textos e de termos.
+
+    Os textos são apenas toquenizados: cada token novo cria o seu lexema e registra as suas strings (texto, forma em
+    minúsculas, formato, prefixo e sufixo). Os termos também são toquenizados, e o termo inteiro é registrado como
+    string, para que os códigos hash das expressões do PhraseMatcher e das regras possam ser revertidos.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        texts (iterable, opcional): Os textos do corpus.
+        words (iterable, opcional): Os termos, por exemplo nomes de países.
+        batch_size (int, opcional): Quantidade de textos toquenizados por lote. Padrão: 1000
+
+    Returns:
+        dict: O tamanho do vocabulário e a memória antes e depois, e as diferenças.
+    """
+    before = vocab_stats(nlp)
+    for _ in nlp.tokenizer.pipe(texts, batch_size=batch_size):
+        pass
+    strings = nlp.vocab.strings
+    words = list(words)
+    for word in words:
+        strings.add(word)
+    for _ in nlp.tokenizer.pipe(words, batch_size=batch_size):
+        pass
+    return _report(before, vocab_stats(nlp))
+
+
+def save_snapshot(nlp, path):
+    """
+    Grava as strings e os lexemas do vocabulário em um diretório.
+
+    Args:
+        nlp (Language): O objeto nlp com o vocabulário pré-carregado.
+        path (str): O diretório do instantâneo.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, STRINGS_FILE), "w", encoding="utf-8") as file:
+        json.dump(list(nlp.vocab.strings), file, ensure_ascii=False)
+    lexemes = numpy.array([lexeme.orth for lexeme in nlp.vocab], dtype=numpy.uint64)
+    numpy.save(os.path.join(path, LEXEMES_FILE), lexemes)
+
+
+def load_snapshot(nlp, path):
+    """
+    Carrega um instantâneo no vocabulário, sem remover as strings e os lexemas que já existem.
+
+    Chame esta função ao iniciar cada processo (por exemplo, no initializer do multiprocessing.Pool), antes de
+    processar qualquer texto.
+
+    Args:
+        nlp (Language): O objeto nlp.
+        path (str): O diretório do instantâneo.
+
+    Returns:
+        dict: O tamanho do vocabulário e a memória antes e depois, e as diferenças.
+    """
+    before = vocab_stats(nlp)
+    strings = nlp.vocab.strings
+    with open(os.path.join(path, STRINGS_FILE), encoding="utf-8") as file:
+        for string in json.load(file):
+            strings.add(string)
+    vocab = nlp.vocab
+    for orth in numpy.load(os.path.join(path, LEXEMES_FILE)).tolist():
+        # Consultar o vocabulário pelo código hash cria o lexema, se ele ainda não existir
+        vocab[orth]
+    return _report(before, vocab_stats(nlp))
+
+
+def missing_hashes(nlp, hashes):
+    """Retorna os códigos hash que não podem ser revertidos para strings com o vocabulário atual."""
+    strings = nlp.vocab.strings
+    keys = numpy.unique(numpy.asarray(hashes, dtype=numpy.uint64)).tolist()
+    return [key for key in keys if key and key not in strings]
+
+
+def print_vocab_report(report):
+    """Imprime o relatório de preload_vocab ou load_snapshot."""
+    before, after = report["before"], report["after"]
+    print(f"Lexemas: {before['lexemes']} -> {after['lexemes']} (+{report['added_lexemes']})")
+    print(f"Strings: {before['strings']} -> {after['strings']} (+{report['added_strings']})")
+    print(f"Memória: {before['rss_mb']:.1f} MB -> {after['rss_mb']:.1f} MB ({report['added_rss_mb']:+.1f} MB)")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import spacy
+
+    nlp = spacy.blank("pt")
+    with open("capitulo_2/paises.txt", encoding="utf-8") as file:
+        corpus = file.read().splitlines()
+    print_vocab_report(preload_vocab(nlp, texts=corpus, words=read_terms("capitulo_2/countries.json")))
+
+    path = os.path.join(tempfile.mkdtemp(), "vocabulario")
+    save_snapshot(nlp, path)
+
+    # Um novo processo começa com um vocabulário vazio e carrega o instantâneo
+    worker = spacy.blank("pt")
+    hashes = [nlp.vocab.strings["Afeganistão"], nlp.vocab.strings["Antígua e Barbuda"]]
+    print(f"Códigos hash desconhecidos antes: {len(missing_hashes(worker, hashes))}")
+    print_vocab_report(load_snapshot(worker, path))
+    print(f"Códigos hash desconhecidos depois: {len(missing_hashes(worker, hashes))}")